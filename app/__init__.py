@@ -1,15 +1,20 @@
-from flask import Flask, jsonify
+from flask import Flask, g, jsonify, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
 import os
+import time
 from datetime import timedelta
 import logging
 from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv
-from app.utils.frpc_manager import FrpcManager
+from app.services.frpc_registry import get_frpc_manager
+from app.services.instance_catalog import get_instance_catalog
+from app.services.panel_metrics import http_request_duration
+from app.services.proxy_metrics import ensure_traffic_collector
+from app.services.shard_supervisor import get_shard_supervisor, is_sharding_enabled
 import threading
-from app.runtime_settings import load_runtime_settings, resolve_runtime_path, sync_legacy_runtime_files
+from app.runtime_settings import instance_runtime_settings, load_runtime_settings, resolve_runtime_path, sync_legacy_runtime_files
 
 # 加载环境变量
 load_dotenv()
@@ -88,6 +93,24 @@ def create_app():
     def unauthorized_error(error):
         return jsonify({'error': 'Unauthorized', 'message': '请先登录'}), 401
 
+    # 按路由规则统计请求耗时，WebSocket 长连接不计入
+    @app.before_request
+    def start_request_timer():
+        g.request_started_at = time.perf_counter()
+
+    @app.after_request
+    def record_request_duration(response):
+        started_at = g.get('request_started_at')
+        rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        if started_at is not None and rule != '/ws':
+            http_request_duration.observe(
+                time.perf_counter() - started_at,
+                method=request.method,
+                route=rule,
+                status=response.status_code
+            )
+        return response
+
     # 配置日志
     def setup_logging():
         # 获取日志配置
@@ -208,32 +231,41 @@ def create_app():
     for source_path, target_path in synced_files:
         logger.info(f'已将旧版运行文件同步到持久化目录: {source_path} -> {target_path}')
 
-    # 检查并自动启动 frpc
+    # 检查并自动启动 frpc（默认实例与 instances.json 中登记的实例）
     def auto_start_frpc():
-        try:
-            frpc_path = runtime_settings.frpc_binary_path
-            config_path = runtime_settings.frpc_config_path
-            
-            # 检查文件是否存在
-            if os.path.exists(frpc_path) and os.path.exists(config_path):
-                logger.info('检测到 frpc 和配置文件存在，尝试自动启动服务')
-                frpc_manager = FrpcManager()
-                
-                # 检查服务是否已经在运行
-                if not frpc_manager.is_running():
-                    success, message = frpc_manager.start()
-                    if success:
-                        logger.info('frpc 服务自动启动成功')
+        for instance_id in get_instance_catalog(runtime_settings).ids():
+            try:
+                instance_settings = instance_runtime_settings(runtime_settings, instance_id)
+                frpc_path = instance_settings.frpc_binary_path
+                config_path = instance_settings.frpc_config_path
+
+                # 检查文件是否存在
+                if os.path.exists(frpc_path) and os.path.exists(config_path):
+                    logger.info(f'检测到 frpc 和配置文件存在，尝试自动启动服务: {instance_id}')
+                    frpc_manager = get_frpc_manager(instance_id=instance_id)
+                    if is_sharding_enabled(frpc_manager):
+                        # 分片模式下由各分片进程承载代理
+                        results = get_shard_supervisor(frpc_manager).start()
+                        logger.info(f'已自动启动代理分片: {instance_id}, 共 {len(results)} 个')
+                        continue
+
+                    # 检查服务是否已经在运行
+                    if not frpc_manager.is_running():
+                        success, message = frpc_manager.start()
+                        if success:
+                            logger.info(f'frpc 服务自动启动成功: {instance_id}')
+                        else:
+                            logger.error(f'frpc 服务自动启动失败: {instance_id}, {message}')
                     else:
-                        logger.error(f'frpc 服务自动启动失败: {message}')
+                        logger.info(f'frpc 服务已经在运行: {instance_id}')
                 else:
-                    logger.info('frpc 服务已经在运行')
-            else:
-                logger.info('未检测到 frpc 或配置文件，跳过自动启动')
-        except Exception as e:
-            logger.error(f'自动启动 frpc 服务时出错: {str(e)}')
+                    logger.info(f'未检测到 frpc 或配置文件，跳过自动启动: {instance_id}')
+            except Exception as e:
+                logger.error(f'自动启动 frpc 服务时出错: {instance_id}, {str(e)}')
 
     # 在后台线程中启动 frpc
-    threading.Thread(target=auto_start_frpc, daemon=True).start()
+    threading.Thread(target=auto_start_frpc, name='frpc-auto-start', daemon=True).start()
+    # 配置了 FRPS_DASHBOARD_URL 时定时采集各代理流量
+    ensure_traffic_collector()
     
     return app 
@@ -1,6 +1,7 @@
-from flask import render_template, jsonify, request
+from flask import Response, render_template, jsonify, request
 from flask_login import login_required, current_user
 from app.main import bp
+import hmac
 import json
 import os
 import requests
@@ -8,27 +9,87 @@ import subprocess
 import tarfile
 import shutil
 from pathlib import Path
-import threading
-import time
 import logging
+import time
+from functools import wraps
 from flask_sock import Sock
-from app.utils.frpc_manager import FrpcManager
-from app.runtime_settings import load_runtime_settings
+from app.runtime_settings import DEFAULT_INSTANCE_ID, load_runtime_settings
+from app.services.frpc_registry import frpc_registry, get_frpc_manager
+from app.services.config_store import thaw
+from app.services.instance_catalog import get_instance_catalog
+from app.services.panel_metrics import download_bytes_total, download_duration, registry as panel_metrics_registry
+from app.services.proxy_editor import (
+    WEB_ONLY_CONFIG_FIELDS,
+    ProxyEditError,
+    delete_proxy,
+    get_proxy,
+    list_proxies,
+    patch_proxy,
+    put_proxy,
+)
+from app.services.proxy_metrics import metrics_store
+from app.services.shard_supervisor import get_shard_supervisor
+from app.utils.config_diff import ACTION_RESTART, ACTION_SHARD_RESTART, diff_configs, summarize_diff
 from app.services.runtime_state import runtime_state, DownloadCancelledError
 from app.utils.input_validator import InputValidator
+from app.utils.log_index import LogCursorError
+from app.utils.prometheus import CONTENT_TYPE as PROMETHEUS_CONTENT_TYPE
+from app.utils.verify_cache import verify_cache_key
 
 logger = logging.getLogger(__name__)
 
-# Web 管理专用配置字段，只写入 config.json，不写入 frpc.json
-WEB_ONLY_CONFIG_FIELDS = ('autoRetry',)
-
 # 创建 WebSocket 实例
 sock = Sock()
 
-frpc_manager = FrpcManager(enable_auto_retry_watchdog=True)
+frpc_manager = get_frpc_manager(enable_auto_retry_watchdog=True)
+for _instance_id in get_instance_catalog(load_runtime_settings()).ids():
+    # 每个实例都有独立的自动重试策略，面板启动即开始监视
+    get_frpc_manager(enable_auto_retry_watchdog=True, instance_id=_instance_id)
 runtime_state.ensure_log_broadcaster_started()
 
 
+def resolve_instance_manager(instance_id: str):
+    """按实例 id 返回共享的 FrpcManager，未登记的实例返回 None。"""
+    if instance_id == DEFAULT_INSTANCE_ID:
+        return frpc_manager
+    if get_instance_catalog(get_runtime_settings()).get(instance_id) is None:
+        return None
+    return get_frpc_manager(enable_auto_retry_watchdog=True, instance_id=instance_id)
+
+
+def build_service_status_message(status: dict, instance_id: str = DEFAULT_INSTANCE_ID):
+    """构建推送给 WebSocket 客户端的服务状态消息。"""
+    return {
+        'type': 'service_status',
+        'instance': instance_id,
+        'status': status['status'],
+        'pid': status.get('pid'),
+        'error_message': status.get('error_message', ''),
+        'frpc_version': status.get('frpc_version', '待检测'),
+        'frpc_version_hint': status.get('frpc_version_hint', ''),
+        'frps_version': status.get('frps_version', '待检测'),
+        'frps_version_hint': status.get('frps_version_hint', ''),
+        'auto_retry': status.get('auto_retry', {}),
+        'proxies': status.get('proxies', {}),
+        'resources': status.get('resources')
+    }
+
+
+def build_service_status_messages(instance_ids):
+    """为被订阅的实例构建状态消息，需要回退扫描进程表的实例共用一次遍历。"""
+    managers = [
+        manager for manager in (resolve_instance_manager(instance_id) for instance_id in instance_ids)
+        if manager is not None
+    ]
+    return {
+        instance_id: build_service_status_message(status, instance_id)
+        for instance_id, status in frpc_registry.collect_status(managers).items()
+    }
+
+
+runtime_state.status_publisher.ensure_started(build_service_status_messages)
+
+
 def get_runtime_settings():
     """统一读取运行时路径配置。"""
     return load_runtime_settings()
@@ -39,6 +100,23 @@ def json_error(message: str, status_code: int = 500):
     return jsonify({'status': 'error', 'message': message}), status_code
 
 
+def instance_route(rule: str, **options):
+    """注册 /instances/<instance_id> 前缀的同名接口，视图函数的第一个参数为该实例的 FrpcManager。"""
+    def decorator(view):
+        @wraps(view)
+        def instance_view(instance_id, *args, **kwargs):
+            manager = resolve_instance_manager(instance_id)
+            if manager is None:
+                return json_error(f'实例 {instance_id} 不存在', 404)
+            return view(manager, *args, **kwargs)
+
+        bp.route(f'/instances/<instance_id>{rule}', endpoint=f'instance_{view.__name__}', **options)(
+            login_required(instance_view)
+        )
+        return view
+    return decorator
+
+
 def normalize_proxies_list(config: dict, with_enabled: bool | None = None):
     """统一校验并规范化 proxies 字段。"""
     proxies = config.get('proxies')
@@ -65,12 +143,23 @@ def normalize_proxies_list(config: dict, with_enabled: bool | None = None):
     return normalized, []
 
 
-def normalize_web_config_payload(config: dict):
-    """统一规范化 Web 配置结构，避免前端因缺省字段崩溃。"""
+def normalize_web_config_payload(config: dict, existing=None):
+    """统一规范化 Web 配置结构，避免前端因缺省字段崩溃。
+
+    existing 为当前 config.json；payload 未携带的 Web 专用字段（如前端不编辑的 sharding）沿用其中的值，
+    避免保存时被默认值覆盖。
+    """
     normalized = dict(config)
+    if isinstance(existing, dict):
+        for field in WEB_ONLY_CONFIG_FIELDS:
+            if field not in normalized and field in existing:
+                normalized[field] = thaw(existing[field])
     normalized['autoRetry'] = InputValidator.normalize_auto_retry_config(
         normalized.get('autoRetry')
     )
+    normalized['sharding'] = InputValidator.normalize_sharding_config(
+        normalized.get('sharding')
+    )
 
     normalized_proxies, proxy_errors = normalize_proxies_list(normalized, with_enabled=True)
     if proxy_errors:
@@ -105,15 +194,18 @@ def strip_web_only_fields(config: dict):
     }
 
 
-def verify_saved_frpc_config(runtime_settings, config_path=None):
-    """使用 frpc 官方 verify 命令校验运行配置。"""
+def run_frpc_verify(runtime_settings, config_path=None):
+    """使用 frpc 官方 verify 命令校验运行配置，返回 (是否通过, 说明, 是否由 frpc 给出结论)。
+
+    可执行文件缺失、超时或无法执行时结论不确定，调用方不应缓存。
+    """
     frpc_binary_path = Path(runtime_settings.frpc_binary_path)
     frpc_config_path = Path(config_path or runtime_settings.frpc_config_path)
 
     if not frpc_binary_path.is_file():
-        return False, f'未检测到 frpc 可执行文件：{frpc_binary_path}'
+        return False, f'未检测到 frpc 可执行文件：{frpc_binary_path}', False
     if not frpc_config_path.is_file():
-        return False, f'未检测到 frpc.json 配置文件：{frpc_config_path}'
+        return False, f'未检测到 frpc.json 配置文件：{frpc_config_path}', False
 
     try:
         if os.name != 'nt' and not os.access(frpc_binary_path, os.X_OK):
@@ -128,10 +220,10 @@ def verify_saved_frpc_config(runtime_settings, config_path=None):
             timeout=15
         )
     except subprocess.TimeoutExpired:
-        return False, 'frpc.json 校验超时，请检查配置是否异常'
+        return False, 'frpc.json 校验超时，请检查配置是否异常', False
     except Exception as exc:
         logger.exception('执行 frpc 配置校验失败')
-        return False, f'执行 frpc 配置校验失败：{exc}'
+        return False, f'执行 frpc 配置校验失败：{exc}', False
 
     verify_output = '\n'.join(
         item.strip()
@@ -142,16 +234,118 @@ def verify_saved_frpc_config(runtime_settings, config_path=None):
     if result.returncode != 0:
         if not verify_output:
             verify_output = f'frpc verify 退出码：{result.returncode}'
-        return False, f'frpc.json 校验失败：\n{verify_output}'
+        return False, f'frpc.json 校验失败：\n{verify_output}', True
+
+    return True, verify_output or 'frpc.json 校验通过', True
+
+
+def verify_saved_frpc_config(manager, config_path):
+    """校验待保存的配置；规范化内容与可执行文件摘要都相同时直接复用上次的 verify 结果。"""
+    key = None
+    binary = manager.get_binary_fingerprint()
+    if binary is not None:
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                key = verify_cache_key(json.load(f), binary['sha256'])
+        except (OSError, ValueError):
+            key = None
+    if key is not None:
+        cached = manager.verify_cache.get(key)
+        if cached is not None:
+            logger.debug(f'frpc verify 命中缓存: {manager.instance_id}')
+            return cached['success'], cached['message']
+
+    success, message, conclusive = run_frpc_verify(manager.runtime_settings, config_path)
+    if key is not None and conclusive:
+        manager.verify_cache.put(key, success, message)
+    return success, message
+
+
+def read_current_config(reader):
+    """读取现有配置用于比较，文件不存在或无法解析时返回 None。"""
+    try:
+        return reader()
+    except Exception as e:
+        logger.warning(f'读取现有配置失败，按全新配置处理: {str(e)}')
+        return None
+
+
+def apply_shard_changes(manager, config_diff: dict):
+    """分片模式下把 config.json 的代理变化应用到受影响的分片，返回各分片的处理结果。"""
+    config, proxy_errors = normalize_web_config_payload(thaw(manager.config_store.get_web_config() or {}))
+    if proxy_errors:
+        return {'mode': 'shard_restart', 'success': False, 'message': '；'.join(proxy_errors), 'shards': []}
+    result = get_shard_supervisor(manager).apply_changes(
+        config,
+        config_diff['affected_shards'],
+        verify=lambda temp_path: verify_saved_frpc_config(manager, temp_path),
+        exclude_fields=WEB_ONLY_CONFIG_FIELDS
+    )
+    indexes = ', '.join(str(item['index']) for item in result['shards'])
+    return {
+        'mode': 'shard_restart',
+        'success': result['success'],
+        'message': f'已应用到分片 {indexes}' if result['success'] else '部分分片应用失败，请查看 shards 中的详情',
+        'shards': result['shards'],
+    }
+
+
+def get_sharding_config(manager):
+    """返回实例 config.json 中规范化后的分片设置，读取失败时视为未启用。"""
+    web_config = read_current_config(manager.config_store.get_web_config)
+    payload = web_config.get('sharding') if isinstance(web_config, dict) else None
+    return InputValidator.normalize_sharding_config(payload)
+
+
+def hot_reload_saved_config(manager, config_diff: dict):
+    """保存配置后，若服务正在运行则尝试热加载；无法热加载时提示手动重启，不自动中断隧道。
+
+    分片模式下单进程不运行，代理变化只应用到 diff 中受影响的分片。
+    """
+    if config_diff['action'] == ACTION_SHARD_RESTART and not manager.is_running():
+        return apply_shard_changes(manager, config_diff)
+    if not manager.is_running():
+        return {'mode': 'none', 'success': True, 'message': 'frpc 未运行，配置将在下次启动时生效'}
+    if config_diff['action'] == ACTION_RESTART:
+        return {
+            'mode': 'restart_required',
+            'success': False,
+            'message': f"全局配置已变化（{', '.join(config_diff['globals'])}），请重启服务使配置生效"
+        }
+    success, message = manager.reload()
+    if success:
+        return {'mode': 'reload', 'success': True, 'message': message}
+    return {'mode': 'restart_required', 'success': False, 'message': f'{message}，请重启服务使配置生效'}
+
+
+RESTART_MODES = ('restart', 'reload')
+
 
-    return True, verify_output or 'frpc.json 校验通过'
+def get_restart_mode():
+    """读取重启方式：默认 restart 完整停止再启动；reload 优先通过管理接口热加载，失败时回退为完整重启。
+
+    返回 (方式, 错误信息)。
+    """
+    payload = request.get_json(silent=True)
+    mode = request.args.get('mode') or (payload.get('mode') if isinstance(payload, dict) else None) or 'restart'
+    if mode not in RESTART_MODES:
+        return None, f"mode 只能是 {' 或 '.join(RESTART_MODES)}"
+    return mode, ''
 
 
-def run_restart_in_background():
-    """在后台执行 frpc 重启并持续更新任务状态。"""
+def run_restart_in_background(mode: str = 'restart'):
+    """在后台执行 frpc 重启并持续更新任务状态，mode 为 reload 时优先热加载。"""
     restart_manager = runtime_state.restart_manager
     try:
-        restart_manager.update('stopping', '正在停止 frpc 服务...', 30)
+        if mode == 'reload' and frpc_manager.is_running():
+            restart_manager.update('reloading', '正在通过管理接口热加载配置...', 20, mode='reload')
+            reload_success, reload_message = frpc_manager.reload()
+            if reload_success:
+                restart_manager.complete_success(reload_message, mode='reload')
+                return
+            logger.info(f'无法热加载，回退为完整重启: {reload_message}')
+
+        restart_manager.update('stopping', '正在停止 frpc 服务...', 30, mode='restart')
         stop_success, stop_message = frpc_manager.stop()
         if not stop_success and stop_message != 'frpc 服务未运行':
             restart_manager.complete_error(f'停止服务失败：{stop_message}')
@@ -220,26 +414,6 @@ def ws_handler(ws):
 
     logger.info('新的 WebSocket 连接')
     runtime_state.websocket_hub.add(ws)
-    status_thread = None
-    status_thread_stop = threading.Event()
-    def push_status():
-        try:
-            while not status_thread_stop.is_set():
-                status = frpc_manager.get_status()
-                ws.send(json.dumps({
-                    'type': 'service_status',
-                    'status': status['status'],
-                    'pid': status.get('pid'),
-                    'error_message': status.get('error_message', ''),
-                    'frpc_version': status.get('frpc_version', '待检测'),
-                    'frpc_version_hint': status.get('frpc_version_hint', ''),
-                    'frps_version': status.get('frps_version', '待检测'),
-                    'frps_version_hint': status.get('frps_version_hint', ''),
-                    'auto_retry': status.get('auto_retry', {})
-                }))
-                time.sleep(2)
-        except Exception as e:
-            logger.error(f'WebSocket 状态推送中断: {str(e)}')
     try:
         while True:
             try:
@@ -247,36 +421,43 @@ def ws_handler(ws):
                 logger.debug(f'收到 WebSocket 消息: {message}')
                 if message:
                     data = json.loads(message)
-                    if data.get('type') == 'start_download_progress':
+                    instance_id = data.get('instance') or DEFAULT_INSTANCE_ID
+                    manager = resolve_instance_manager(instance_id)
+                    if manager is None:
+                        runtime_state.websocket_hub.send([ws], {
+                            'type': 'error',
+                            'instance': instance_id,
+                            'message': f'实例 {instance_id} 不存在'
+                        })
+                    elif data.get('type') == 'start_download_progress':
                         logger.info('开始订阅下载进度')
                         download_snapshot = get_download_snapshot()
-                        ws.send(json.dumps({
+                        runtime_state.websocket_hub.send([ws], {
                             'type': 'download_progress',
                             'message': download_snapshot['progress'],
                             'completed': download_snapshot['completed'],
                             'error': download_snapshot['error'],
                             'cancelled': download_snapshot['cancelled'],
                             'error_message': download_snapshot['error_message']
-                        }))
+                        })
                     elif data.get('type') == 'get_log':
-                        # 直接读取最新日志并推送
-                        logs = frpc_manager.get_logs()
-                        ws.send(json.dumps({
+                        # 从内存缓冲区读取最新日志并推送
+                        logs = manager.get_logs()
+                        runtime_state.websocket_hub.send([ws], {
                             'type': 'log',
+                            'instance': instance_id,
                             'content': '\n'.join(logs)
-                        }))
+                        })
                     elif data.get('type') == 'clear_log':
-                        frpc_manager.clear_logs()
-                        ws.send(json.dumps({
+                        manager.clear_logs()
+                        runtime_state.websocket_hub.send([ws], {
                             'type': 'log',
+                            'instance': instance_id,
                             'content': ''
-                        }))
+                        })
                     elif data.get('type') == 'get_status':
-                        # 启动独立线程持续推送状态
-                        if status_thread is None or not status_thread.is_alive():
-                            status_thread_stop.clear()
-                            status_thread = threading.Thread(target=push_status, daemon=True)
-                            status_thread.start()
+                        # 加入共享的状态扇出，由单一后台线程统一推送
+                        runtime_state.status_publisher.subscribe(ws, instance_id)
             except Exception as e:
                 logger.error(f'处理 WebSocket 消息时出错: {str(e)}')
                 break
@@ -285,7 +466,6 @@ def ws_handler(ws):
     finally:
         logger.info('WebSocket 连接关闭')
         runtime_state.websocket_hub.discard(ws)
-        status_thread_stop.set()
 
 def broadcast_download_status():
     """广播下载状态到所有 WebSocket 客户端"""
@@ -310,12 +490,80 @@ def index():
 def health():
     return jsonify({'status': 'ok'}), 200
 
+def collect_runtime_metrics():
+    """抓取时读取各实例的进程状态、自动重试与代理状态，以及 WebSocket 连接数。
+
+    进程状态取自跟踪器缓存的 PID 与启动时间（进程退出时由 ExitWatcher 清除），抓取不访问进程表。
+    """
+    managers = frpc_registry.managers()
+    now = time.time()
+    up, started, uptime, retry_waiting, retry_count, proxies = [], [], [], [], [], []
+    for manager in managers:
+        labels = {'instance': manager.instance_id}
+        tracked = manager.process_tracker.cached()
+        up.append((labels, 1 if tracked is not None else 0))
+        if tracked is not None:
+            created_at = tracked[1]
+            started.append((labels, created_at))
+            uptime.append((labels, max(now - created_at, 0.0)))
+        retry = manager.get_auto_retry_snapshot()
+        retry_waiting.append((labels, 1 if retry.get('waiting') else 0))
+        retry_count.append((labels, retry.get('retryCount', 0)))
+        for status, count in manager.proxy_status_poller.snapshot()['counts'].items():
+            proxies.append(({**labels, 'status': status}, count))
+    return [
+        ('frpc_up', 'gauge', 'frpc 进程是否在运行', up),
+        ('frpc_process_start_time_seconds', 'gauge', 'frpc 进程启动时间（Unix 时间戳）', started),
+        ('frpc_process_uptime_seconds', 'gauge', 'frpc 进程已运行时长（秒）', uptime),
+        ('frpc_auto_retry_waiting', 'gauge', '是否正在等待下一次自动重试', retry_waiting),
+        ('frpc_auto_retry_count', 'gauge', '当前这一轮故障已执行的自动重试次数', retry_count),
+        ('frpc_proxies', 'gauge', '管理接口报告的代理数量，按状态分组', proxies),
+        ('frpc_web_websocket_clients', 'gauge', '当前 WebSocket 连接数',
+         [({}, len(runtime_state.websocket_hub.snapshot()))]),
+        ('frpc_web_download_in_progress', 'gauge', '是否有下载任务正在进行',
+         [({}, 1 if runtime_state.download_manager.is_running() else 0)]),
+    ]
+
+
+panel_metrics_registry.add_collector(collect_runtime_metrics)
+
+
+def metrics_request_authorized() -> bool:
+    """抓取 /metrics 需已登录面板，或携带 Authorization: Bearer <METRICS_TOKEN>。
+
+    METRICS_ALLOW_ANONYMOUS=true 时允许匿名抓取，仅适用于只在内网暴露的部署。
+    """
+    if current_user.is_authenticated:
+        return True
+    token = os.getenv('METRICS_TOKEN', '')
+    header = request.headers.get('Authorization', '')
+    if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:].encode(), token.encode()):
+        return True
+    return os.getenv('METRICS_ALLOW_ANONYMOUS', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+
+@bp.route('/metrics')
+def metrics():
+    """Prometheus 抓取接口。"""
+    if not metrics_request_authorized():
+        return Response('unauthorized\n', status=401, mimetype='text/plain',
+                        headers={'WWW-Authenticate': 'Bearer'})
+    try:
+        return Response(panel_metrics_registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+    except Exception as e:
+        logger.exception(f'生成指标失败: {str(e)}')
+        return Response('metrics unavailable\n', status=500, mimetype='text/plain')
+
 @bp.route('/save', methods=['POST'])
 @login_required
 def save_frpc_config():
-    logger.info('收到保存 frpc.json 请求')
+    return save_instance_frpc_config(frpc_manager)
+
+@instance_route('/save', methods=['POST'])
+def save_instance_frpc_config(manager):
+    logger.info(f'收到保存 frpc.json 请求: {manager.instance_id}')
     try:
-        runtime_settings = get_runtime_settings()
+        runtime_settings = manager.runtime_settings
         config = request.get_json(silent=True) or {}
         logger.debug(f'保存的配置内容: {config}')
 
@@ -341,31 +589,37 @@ def save_frpc_config():
                 'errors': validation_errors
             }), 400
         
-        os.makedirs(runtime_settings.frpc_work_dir, exist_ok=True)
-        frpc_config_path = Path(runtime_settings.frpc_config_path)
-        temp_config_path = frpc_config_path.with_name(f'.{frpc_config_path.name}.verify.tmp')
-        with open(temp_config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+        config_diff = diff_configs(
+            read_current_config(manager.config_store.get_frpc_config), config, sharding=get_sharding_config(manager)
+        )
+        if not config_diff['changed']:
+            # 内容与现有 frpc.json 完全一致，无需重写与重新校验
+            return jsonify({
+                'status': 'success',
+                'message': 'frpc.json 未变化',
+                'diff': config_diff,
+                'apply': {'mode': 'none', 'success': True, 'message': '配置未变化，无需应用'}
+            })
 
-        verify_success, verify_message = verify_saved_frpc_config(runtime_settings, temp_config_path)
+        # 先写入临时文件并执行 frpc verify，通过后再原子替换 frpc.json
+        verify_success, verify_message = manager.config_store.save_frpc_config(
+            config,
+            validate=lambda temp_path: verify_saved_frpc_config(manager, temp_path)
+        )
         if not verify_success:
-            try:
-                temp_config_path.unlink(missing_ok=True)
-            except Exception:
-                logger.warning(f'删除临时校验文件失败: {temp_config_path}')
             logger.warning(f'frpc.json 校验失败: {verify_message}')
             return jsonify({
                 'status': 'error',
                 'message': verify_message
             }), 400
 
-        os.replace(temp_config_path, frpc_config_path)
-
-        logger.info('frpc.json 保存成功')
+        logger.info(f'frpc.json 保存成功: {manager.instance_id}, {summarize_diff(config_diff)}')
         return jsonify({
             'status': 'success',
             'message': 'frpc.json 已保存',
-            'verify_message': verify_message
+            'verify_message': verify_message,
+            'diff': config_diff,
+            'apply': hot_reload_saved_config(manager, config_diff)
         })
     except Exception as e:
         return log_internal_error('保存 frpc.json 失败', e, '保存 frpc.json 失败，请稍后重试')
@@ -373,10 +627,14 @@ def save_frpc_config():
 @bp.route('/frpc.json')
 @login_required
 def get_config():
+    return get_instance_config(frpc_manager)
+
+@instance_route('/frpc.json')
+def get_instance_config(manager):
     try:
-        runtime_settings = get_runtime_settings()
-        with open(runtime_settings.frpc_config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        config = manager.config_store.get_frpc_config()
+        if config is None:
+            return json_error('frpc.json 不存在', 404)
         return jsonify(config)
     except Exception as e:
         return log_internal_error('读取 frpc.json 失败', e, '读取 frpc.json 失败，请稍后重试')
@@ -384,53 +642,47 @@ def get_config():
 @bp.route('/config.json')
 @login_required
 def get_config_file():
+    return get_instance_config_file(frpc_manager)
+
+@instance_route('/config.json')
+def get_instance_config_file(manager):
     try:
-        runtime_settings = get_runtime_settings()
-        if os.path.exists(runtime_settings.web_config_path):
-            with open(runtime_settings.web_config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            normalized_config, proxy_errors = normalize_web_config_payload(config)
-            if proxy_errors:
-                return jsonify({
-                    'status': 'error',
-                    'message': '；'.join(proxy_errors),
-                    'errors': proxy_errors
-                }), 400
-            return jsonify(normalized_config)
-        else:
-            # 如果 config.json 不存在，尝试从 frpc.json 读取并添加 enabled 字段
-            if os.path.exists(runtime_settings.frpc_config_path):
-                with open(runtime_settings.frpc_config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                normalized_config, proxy_errors = normalize_web_config_payload(config)
-                if proxy_errors:
-                    return jsonify({
-                        'status': 'error',
-                        'message': '；'.join(proxy_errors),
-                        'errors': proxy_errors
-                    }), 400
-                # 保存为 config.json
-                os.makedirs(runtime_settings.frpc_work_dir, exist_ok=True)
-                with open(runtime_settings.web_config_path, 'w', encoding='utf-8') as f:
-                    json.dump(normalized_config, f, indent=2, ensure_ascii=False)
-                return jsonify(normalized_config)
+        config_store = manager.config_store
+        config = config_store.get_web_config()
+        if config is None:
+            # 如果 config.json 不存在，从 frpc.json 推导并补充 enabled 字段；只读请求不落盘，首次保存时才写入
+            config = config_store.get_frpc_config()
+        if config is None:
             return jsonify({
                 'status': 'error',
                 'message': '配置文件不存在'
             }), 404
+
+        normalized_config, proxy_errors = normalize_web_config_payload(config)
+        if proxy_errors:
+            return jsonify({
+                'status': 'error',
+                'message': '；'.join(proxy_errors),
+                'errors': proxy_errors
+            }), 400
+        return jsonify(normalized_config)
     except Exception as e:
         return log_internal_error('读取 config.json 失败', e, '读取配置文件失败，请稍后重试')
 
 @bp.route('/save-config', methods=['POST'])
 @login_required
 def save_config_file():
+    return save_instance_config_file(frpc_manager)
+
+@instance_route('/save-config', methods=['POST'])
+def save_instance_config_file(manager):
     try:
-        runtime_settings = get_runtime_settings()
         config = request.get_json(silent=True) or {}
         if not isinstance(config, dict):
             return json_error('配置内容必须是 JSON 对象', 400)
 
-        normalized_config, proxy_errors = normalize_web_config_payload(config)
+        previous_config = read_current_config(manager.config_store.get_web_config)
+        normalized_config, proxy_errors = normalize_web_config_payload(config, existing=previous_config)
         if proxy_errors:
             return jsonify({
                 'status': 'error',
@@ -445,17 +697,121 @@ def save_config_file():
                 'message': '；'.join(validation_errors),
                 'errors': validation_errors
             }), 400
-        
-        os.makedirs(runtime_settings.frpc_work_dir, exist_ok=True)
-        with open(runtime_settings.web_config_path, 'w', encoding='utf-8') as f:
-            json.dump(normalized_config, f, indent=2, ensure_ascii=False)
-        return jsonify({
+
+        config_diff = diff_configs(
+            previous_config,
+            normalized_config,
+            ignore_fields=('autoRetry',),
+            sharding=normalized_config['sharding']
+        )
+        if previous_config == normalized_config:
+            return jsonify({
+                'status': 'success',
+                'message': '配置未变化',
+                'diff': config_diff
+            })
+
+        manager.config_store.save_web_config(normalized_config)
+        logger.info(f'config.json 保存成功: {manager.instance_id}, {summarize_diff(config_diff)}')
+        # 自动重试策略可能已变化，通知调度线程重新评估
+        manager.notify_auto_retry_config_changed()
+        payload = {
             'status': 'success',
-            'message': '配置已保存'
-        })
+            'message': '配置已保存',
+            'diff': config_diff
+        }
+        if config_diff['action'] == ACTION_SHARD_RESTART and not manager.is_running():
+            # 分片由 config.json 推导，代理变化在这里直接应用到受影响的分片；单进程运行时仍由 /save 热加载
+            payload['apply'] = apply_shard_changes(manager, config_diff)
+        if not normalized_config['sharding']['enabled']:
+            # 关闭分片后停止并注销残留的分片进程，否则网络恢复与状态汇总仍会处理它们
+            removed = get_shard_supervisor(manager).disable()
+            if removed:
+                payload['removed_shards'] = removed
+        return jsonify(payload)
     except Exception as e:
         return log_internal_error('保存 config.json 失败', e, '保存配置失败，请稍后重试')
 
+def proxy_edit_response(manager, result: dict, status_code: int = 200):
+    """返回单个代理修改的结果，frpc.json 有变化时尝试热加载。"""
+    config_diff = result['diff']
+    if config_diff['changed']:
+        apply_result = hot_reload_saved_config(manager, config_diff)
+    else:
+        apply_result = {'mode': 'none', 'success': True, 'message': '配置未变化，无需应用'}
+    if result['proxy'] is None:
+        response = jsonify({'status': 'success', 'message': '代理已删除', 'diff': config_diff, 'apply': apply_result})
+    else:
+        response = jsonify({
+            'status': 'success',
+            'message': '代理已创建' if result['created'] else '代理已保存',
+            'proxy': result['proxy'],
+            'diff': config_diff,
+            'apply': apply_result
+        })
+        response.set_etag(result['etag'])
+    response.status_code = status_code
+    return response
+
+def proxy_edit_error(error: ProxyEditError):
+    """返回代理修改被拒绝的原因。"""
+    payload = {'status': 'error', 'message': error.message}
+    if error.errors:
+        payload['errors'] = error.errors
+    return jsonify(payload), error.status_code
+
+@bp.route('/proxies')
+@login_required
+def proxies_list():
+    return instance_proxies_list(frpc_manager)
+
+@instance_route('/proxies')
+def instance_proxies_list(manager):
+    """列出 config.json 中的代理及各自的 ETag。"""
+    try:
+        return jsonify({'status': 'success', 'proxies': list_proxies(manager.config_store)})
+    except Exception as e:
+        return log_internal_error('读取代理列表失败', e, '读取代理列表失败，请稍后重试')
+
+@bp.route('/proxies/<name>', methods=['GET', 'PUT', 'PATCH', 'DELETE'])
+@login_required
+def proxy_item(name):
+    return instance_proxy_item(frpc_manager, name)
+
+@instance_route('/proxies/<name>', methods=['GET', 'PUT', 'PATCH', 'DELETE'])
+def instance_proxy_item(manager, name):
+    """读取、创建、修改或删除单个代理，只重写这一项并同步 frpc.json；写操作可用 If-Match 防止覆盖他人的修改。"""
+    config_store = manager.config_store
+    verify = lambda temp_path: verify_saved_frpc_config(manager, temp_path)
+    try:
+        if request.method == 'GET':
+            found = get_proxy(config_store, name)
+            if found is None:
+                return json_error(f'代理 {name} 不存在', 404)
+            proxy, etag = found
+            response = jsonify(proxy)
+            response.set_etag(etag)
+            return response.make_conditional(request)
+
+        if request.method == 'DELETE':
+            result = delete_proxy(config_store, name, verify=verify, if_match=request.if_match)
+            return proxy_edit_response(manager, result)
+
+        payload = request.get_json(silent=True)
+        if request.method == 'PUT':
+            result = put_proxy(
+                config_store, name, payload, verify=verify,
+                if_match=request.if_match, if_none_match=request.if_none_match
+            )
+            return proxy_edit_response(manager, result, 201 if result['created'] else 200)
+
+        result = patch_proxy(config_store, name, payload, verify=verify, if_match=request.if_match)
+        return proxy_edit_response(manager, result)
+    except ProxyEditError as e:
+        return proxy_edit_error(e)
+    except Exception as e:
+        return log_internal_error('修改代理失败', e, '修改代理失败，请稍后重试')
+
 @bp.route('/check-frpc')
 @login_required
 def check_frpc():
@@ -574,6 +930,7 @@ def download_and_extract():
                     if chunk:
                         file.write(chunk)
                         downloaded += len(chunk)
+                        download_bytes_total.inc(len(chunk))
                         if total:
                             percent = downloaded * 100.0 / total
                             set_progress(f'下载进度: {percent:.1f}%')
@@ -624,6 +981,9 @@ def download_and_extract():
         # 7) 设置可执行权限（非Windows）
         if os.name != 'nt':
             os.chmod(binary_path, 0o755)
+        # 可执行文件已替换，丢弃各实例的旧版本号与摘要缓存
+        for manager in frpc_registry.managers():
+            manager.invalidate_binary_cache()
         set_progress(f'已下载最新版本 {tag} 并解压完成。', completed=True)
         return True, f'已下载最新版本 {tag}，并解压完成。frpc 已保存到持久化目录。'
     except DownloadCancelledError as e:
@@ -647,9 +1007,13 @@ def download_frpc():
             return json_error('已有下载任务正在进行', 400)
 
         def run_download():
+            started_at = time.monotonic()
+            result = 'error'
             try:
-                download_and_extract()
+                success, _ = download_and_extract()
+                result = 'success' if success else 'failure'
             finally:
+                download_duration.observe(time.monotonic() - started_at, result=result)
                 download_manager.finish_thread()
 
         download_manager.start(run_download)
@@ -697,18 +1061,43 @@ def download_progress():
 @login_required
 def frpc_status():
     """获取 frpc 服务状态"""
+    return instance_status(frpc_manager)
+
+@instance_route('/status')
+def instance_status(manager):
+    """获取指定实例的 frpc 服务状态"""
     try:
-        status = frpc_manager.get_status()
+        status = manager.get_status()
         return jsonify(status)
     except Exception as e:
         return log_internal_error('获取 frpc 状态失败', e, '获取 frpc 状态失败，请稍后重试')
 
+@bp.route('/frpc/resources')
+@login_required
+def frpc_resources():
+    """获取 frpc 进程资源采样历史"""
+    return instance_resources(frpc_manager)
+
+@instance_route('/resources')
+def instance_resources(manager):
+    """获取指定实例的 frpc 进程资源采样历史，limit 限制返回的样本数"""
+    try:
+        limit = request.args.get('limit', type=int)
+        return jsonify({'status': 'success', **manager.get_resource_history(limit)})
+    except Exception as e:
+        return log_internal_error('获取资源采样失败', e, '获取资源采样失败，请稍后重试')
+
 @bp.route('/frpc/start', methods=['POST'])
 @login_required
 def frpc_start():
     """启动 frpc 服务"""
+    return instance_start(frpc_manager)
+
+@instance_route('/start', methods=['POST'])
+def instance_start(manager):
+    """启动指定实例的 frpc 服务"""
     try:
-        success, message = frpc_manager.start()
+        success, message = manager.start()
         return jsonify({
             'success': success,
             'message': message
@@ -720,8 +1109,13 @@ def frpc_start():
 @login_required
 def frpc_stop():
     """停止 frpc 服务"""
+    return instance_stop(frpc_manager)
+
+@instance_route('/stop', methods=['POST'])
+def instance_stop(manager):
+    """停止指定实例的 frpc 服务"""
     try:
-        success, message = frpc_manager.stop()
+        success, message = manager.stop()
         return jsonify({
             'success': success,
             'message': message
@@ -732,8 +1126,11 @@ def frpc_stop():
 @bp.route('/frpc/restart', methods=['POST'])
 @login_required
 def frpc_restart():
-    """重启 frpc 服务"""
+    """重启 frpc 服务，默认完整重启；mode=reload 时优先热加载。"""
     try:
+        mode, mode_error = get_restart_mode()
+        if mode_error:
+            return json_error(mode_error, 400)
         restart_manager = runtime_state.restart_manager
         if not restart_manager.can_start():
             snapshot = get_restart_snapshot()
@@ -743,7 +1140,7 @@ def frpc_restart():
                 'restart': snapshot
             }), 409
 
-        snapshot = restart_manager.start(run_restart_in_background, initial_delay=1.0)
+        snapshot = restart_manager.start(lambda: run_restart_in_background(mode), initial_delay=1.0)
         return jsonify({
             'success': True,
             'accepted': True,
@@ -754,6 +1151,26 @@ def frpc_restart():
         return log_internal_error('重启 frpc 服务失败', e, '重启服务失败，请稍后重试')
 
 
+@instance_route('/restart', methods=['POST'])
+def instance_restart(manager):
+    """同步重启指定实例的 frpc 服务，默认完整重启，mode=reload 时优先热加载；默认实例的后台重启任务仍走 /frpc/restart。"""
+    try:
+        mode, mode_error = get_restart_mode()
+        if mode_error:
+            return json_error(mode_error, 400)
+        if mode == 'reload':
+            success, message, mode = manager.reload_or_restart()
+        else:
+            success, message = manager.restart()
+        return jsonify({
+            'success': success,
+            'message': message,
+            'mode': mode
+        })
+    except Exception as e:
+        return log_internal_error('重启 frpc 服务失败', e, '重启服务失败，请稍后重试')
+
+
 @bp.route('/frpc/restart-status')
 @login_required
 def frpc_restart_status():
@@ -772,21 +1189,255 @@ def frpc_restart_status():
 @login_required
 def frpc_logs():
     """获取 frpc 日志"""
+    return instance_logs(frpc_manager)
+
+@instance_route('/logs')
+def instance_logs(manager):
+    """获取指定实例的 frpc 日志"""
     try:
-        logs = frpc_manager.get_logs()
+        logs = manager.get_logs()
         # 将日志放入队列以广播给所有客户端
-        runtime_state.enqueue_logs(logs)
-        return jsonify({'logs': logs})
+        runtime_state.enqueue_logs(logs, manager.instance_id)
+        return jsonify({
+            'logs': logs,
+            'buffer': manager.get_log_buffer_stats(),
+            'follower': manager.get_log_follower_stats()
+        })
     except Exception as e:
         return log_internal_error('获取 frpc 日志失败', e, '获取日志失败，请稍后重试')
 
+
+def parse_log_search_time(value: str | None):
+    """解析检索时间参数，支持 Unix 时间戳与 “YYYY-MM-DD HH:MM:SS” 格式。"""
+    if value is None or not value.strip():
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for time_format in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return time.mktime(time.strptime(value, time_format))
+        except ValueError:
+            continue
+    raise ValueError(f'无法识别的时间格式: {value}')
+
+
+@bp.route('/frpc/logs/search')
+@login_required
+def frpc_logs_search():
+    """按关键字、级别、代理名、错误类别与时间范围检索历史日志。"""
+    return instance_logs_search(frpc_manager)
+
+@instance_route('/logs/search')
+def instance_logs_search(manager):
+    """检索指定实例的历史日志。"""
+    try:
+        since = parse_log_search_time(request.args.get('since'))
+        until = parse_log_search_time(request.args.get('until'))
+    except ValueError as e:
+        return json_error(str(e), 400)
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return json_error('limit 必须为整数', 400)
+
+    try:
+        result = manager.search_logs(
+            query=request.args.get('q', ''),
+            level=request.args.get('level'),
+            proxy=request.args.get('proxy'),
+            error_class=request.args.get('error_class'),
+            since=since,
+            until=until,
+            cursor=request.args.get('cursor'),
+            limit=limit
+        )
+        return jsonify(result)
+    except LogCursorError as e:
+        return json_error(str(e), 400)
+    except Exception as e:
+        return log_internal_error('检索 frpc 日志失败', e, '检索日志失败，请稍后重试')
+
+@bp.route('/instances')
+@login_required
+def list_instances():
+    """列出全部 frpc 实例及其状态，进程表最多遍历一次。"""
+    try:
+        catalog = get_instance_catalog(get_runtime_settings())
+        instances = catalog.instances()
+        managers = [resolve_instance_manager(instance['id']) for instance in instances]
+        statuses = frpc_registry.collect_status([manager for manager in managers if manager is not None])
+        return jsonify({
+            'instances': [
+                {**instance, 'service_status': statuses.get(instance['id'])}
+                for instance in instances
+            ]
+        })
+    except Exception as e:
+        return log_internal_error('获取实例列表失败', e, '获取实例列表失败，请稍后重试')
+
+@bp.route('/instances', methods=['POST'])
+@login_required
+def create_instance():
+    """登记新的 frpc 实例，配置文件随后通过 /instances/<id>/save 写入。"""
+    try:
+        payload = request.get_json(silent=True) or {}
+        if not isinstance(payload, dict):
+            return json_error('请求内容必须是 JSON 对象', 400)
+        instance_id = str(payload.get('id') or '').strip()
+        success, message = get_instance_catalog(get_runtime_settings()).add(instance_id, str(payload.get('name') or ''))
+        if not success:
+            return json_error(message, 400)
+        manager = resolve_instance_manager(instance_id)
+        logger.info(f'已创建 frpc 实例: {instance_id}')
+        return jsonify({
+            'status': 'success',
+            'message': f'实例 {instance_id} 已创建',
+            'instance': get_instance_catalog(get_runtime_settings()).get(instance_id),
+            'config_path': manager.config_path
+        }), 201
+    except Exception as e:
+        return log_internal_error('创建实例失败', e, '创建实例失败，请稍后重试')
+
+@bp.route('/instances/<instance_id>', methods=['DELETE'])
+@login_required
+def delete_instance(instance_id):
+    """注销 frpc 实例；实例仍在运行时拒绝删除，配置与日志文件保留在磁盘上。"""
+    try:
+        if instance_id == DEFAULT_INSTANCE_ID:
+            return json_error('默认实例不能删除', 400)
+        manager = resolve_instance_manager(instance_id)
+        if manager is None:
+            return json_error(f'实例 {instance_id} 不存在', 404)
+        if manager.is_running() or get_shard_supervisor(manager).running_shards():
+            return json_error('实例仍在运行，请先停止服务', 409)
+        success, message = get_instance_catalog(get_runtime_settings()).remove(instance_id)
+        if not success:
+            return json_error(message, 400)
+        frpc_registry.remove(instance_id)
+        logger.info(f'已删除 frpc 实例: {instance_id}')
+        return jsonify({
+            'status': 'success',
+            'message': f'实例 {instance_id} 已删除'
+        })
+    except Exception as e:
+        return log_internal_error('删除实例失败', e, '删除实例失败，请稍后重试')
+
+@bp.route('/shards')
+@login_required
+def shards_status():
+    """获取代理分片状态。"""
+    return instance_shards_status(frpc_manager)
+
+@instance_route('/shards')
+def instance_shards_status(manager):
+    """汇总指定实例各分片的运行状态与代理归属。"""
+    try:
+        return jsonify(get_shard_supervisor(manager).status())
+    except Exception as e:
+        return log_internal_error('获取代理分片状态失败', e, '获取分片状态失败，请稍后重试')
+
+@bp.route('/shards/apply', methods=['POST'])
+@login_required
+def shards_apply():
+    """按 config.json 应用代理分片。"""
+    return instance_shards_apply(frpc_manager)
+
+@instance_route('/shards/apply', methods=['POST'])
+def instance_shards_apply(manager):
+    """按实例的 config.json 重新规划分片，只重启代理有变化的分片。"""
+    try:
+        config = manager.config_store.get_web_config()
+        if config is None:
+            return json_error('config.json 不存在，请先保存配置', 404)
+        normalized_config, proxy_errors = normalize_web_config_payload(thaw(config))
+        if proxy_errors:
+            return json_error('；'.join(proxy_errors), 400)
+        if not normalized_config['sharding']['enabled']:
+            return json_error('config.json 未启用代理分片 (sharding.enabled)', 400)
+
+        result = get_shard_supervisor(manager).apply(
+            normalized_config,
+            verify=lambda temp_path: verify_saved_frpc_config(manager, temp_path),
+            exclude_fields=WEB_ONLY_CONFIG_FIELDS
+        )
+        return jsonify({
+            'status': 'success' if result['success'] else 'error',
+            'message': '代理分片已应用' if result['success'] else '部分分片应用失败，请查看 shards 中的详情',
+            **result
+        })
+    except Exception as e:
+        return log_internal_error('应用代理分片失败', e, '应用代理分片失败，请稍后重试')
+
+@bp.route('/shards/stop', methods=['POST'])
+@login_required
+def shards_stop():
+    """停止全部代理分片。"""
+    return instance_shards_stop(frpc_manager)
+
+@instance_route('/shards/stop', methods=['POST'])
+def instance_shards_stop(manager):
+    """并行停止指定实例的全部代理分片。"""
+    try:
+        results = get_shard_supervisor(manager).stop()
+        return jsonify({
+            'success': all(item['success'] for item in results),
+            'shards': results
+        })
+    except Exception as e:
+        return log_internal_error('停止代理分片失败', e, '停止代理分片失败，请稍后重试')
+
+@bp.route('/system/threads')
+@login_required
+def system_threads():
+    """列出后台线程及其用途，便于排查线程泄漏。"""
+    try:
+        return jsonify(frpc_registry.describe_threads())
+    except Exception as e:
+        return log_internal_error('获取线程信息失败', e, '获取线程信息失败，请稍后重试')
+
+@bp.route('/metrics/query')
+@login_required
+def metrics_query():
+    """查询代理指标历史；未指定代理与指标时列出实例下已有的序列。"""
+    instance_id = request.args.get('instance') or DEFAULT_INSTANCE_ID
+    proxy = request.args.get('proxy')
+    metric = request.args.get('metric')
+    try:
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+        resolution = request.args.get('resolution', type=int)
+        if not proxy or not metric:
+            return jsonify({
+                'status': 'success',
+                'series': metrics_store.series(instance_id),
+                'stats': metrics_store.stats(),
+            })
+        result = metrics_store.query(instance_id, proxy, metric, start=start, end=end, resolution=resolution)
+        return jsonify({
+            'status': 'success',
+            'instance': instance_id,
+            'proxy': proxy,
+            'metric': metric,
+            **result,
+            'events': metrics_store.events(instance_id, proxy, start=start or 0.0),
+        })
+    except ValueError as e:
+        return json_error(str(e), 400)
+    except Exception as e:
+        return log_internal_error('查询指标失败', e, '查询指标失败，请稍后重试')
+
 @bp.route('/delete-frpc-config', methods=['POST'])
 @login_required
 def delete_frpc_config():
+    return delete_instance_frpc_config(frpc_manager)
+
+@instance_route('/delete-frpc-config', methods=['POST'])
+def delete_instance_frpc_config(manager):
     try:
-        runtime_settings = get_runtime_settings()
-        if os.path.exists(runtime_settings.frpc_config_path):
-            os.remove(runtime_settings.frpc_config_path)
+        manager.config_store.delete_frpc_config()
         return jsonify({
             'status': 'success',
             'message': 'frpc.json 已删除'
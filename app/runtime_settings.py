@@ -1,12 +1,13 @@
 import os
 import shutil
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 
 DEFAULT_WEB_PORT = 8001
 CONTAINER_APP_ROOT = "/app"
 CONTAINER_DATA_ROOT = "/app/data"
 CONTAINER_LOG_ROOT = "/var/log/frpc-web"
+DEFAULT_INSTANCE_ID = "default"
 
 
 @dataclass(frozen=True)
@@ -21,6 +22,7 @@ class RuntimeSettings:
     web_config_path: str
     logs_dir: str
     app_port: int
+    frpc_log_name: str = "frpc.log"
 
 
 def resolve_path(path_value: str, base_dir: str) -> str:
@@ -98,6 +100,34 @@ def load_runtime_settings(base_dir: str | None = None) -> RuntimeSettings:
     )
 
 
+def instance_runtime_settings(runtime_settings: RuntimeSettings, instance_id: str) -> RuntimeSettings:
+    """返回指定 frpc 实例的运行时配置：默认实例沿用原有路径，其余实例使用 instances/<id>/ 下的独立文件。"""
+    if instance_id == DEFAULT_INSTANCE_ID:
+        return runtime_settings
+    instance_dir = os.path.join(runtime_settings.frpc_work_dir, "instances", instance_id)
+    return replace(
+        runtime_settings,
+        frpc_work_dir=instance_dir,
+        frpc_config_path=os.path.join(instance_dir, "frpc.json"),
+        web_config_path=os.path.join(instance_dir, "config.json"),
+        frpc_log_name=f"frpc-{instance_id}.log",
+    )
+
+
+def shard_runtime_settings(runtime_settings: RuntimeSettings, index: int) -> RuntimeSettings:
+    """返回实例第 index 个代理分片的运行时配置，分片文件位于实例工作目录的 shards/<index>/ 下。"""
+    shard_dir = os.path.join(runtime_settings.frpc_work_dir, "shards", str(index))
+    log_stem = os.path.splitext(runtime_settings.frpc_log_name)[0]
+    # 实例 id 不允许包含 "."，以 ".shard-" 区分分片日志，避免与 id 形如 shard-N 的实例日志 frpc-shard-N.log 重名
+    return replace(
+        runtime_settings,
+        frpc_work_dir=shard_dir,
+        frpc_config_path=os.path.join(shard_dir, "frpc.json"),
+        web_config_path=os.path.join(shard_dir, "config.json"),
+        frpc_log_name=f"{log_stem}.shard-{index}.log",
+    )
+
+
 def sync_legacy_runtime_files(runtime_settings: RuntimeSettings) -> list[tuple[str, str]]:
     """将旧版根目录文件同步到新的持久化目录。"""
     legacy_file_map = {
@@ -0,0 +1,422 @@
+"""配置文件缓存与统一写入。"""
+import itertools
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+from app.utils.input_validator import InputValidator, ProxyConflictIndex
+
+logger = logging.getLogger(__name__)
+
+_temp_counter = itertools.count()
+
+# update_configs 中表示 frpc.json 保持不变
+FRPC_UNCHANGED = object()
+
+
+class FrozenDict(dict):
+    """只读字典：缓存快照在多个请求间共享，禁止就地修改。"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('配置快照为只读，请先复制再修改')
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+class FrozenList(list):
+    """只读列表。"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('配置快照为只读，请先复制再修改')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(value):
+    """递归转换为只读结构，已冻结的部分直接复用。"""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """递归复制为可修改的普通结构。"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+class ConfigChangedError(Exception):
+    """配置文件在读取与替换之间被其他写入者修改。"""
+
+
+class ConfigFile:
+    """单个 JSON 配置文件的内存缓存：按 mtime_ns、大小与 inode 判断失效，stat 调用按间隔节流。"""
+
+    STAT_INTERVAL = 1.0
+    UPDATE_ATTEMPTS = 5
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._snapshot = None
+        self._error = None
+        self._checked_at = 0.0
+        self._loaded = False
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _refresh_locked(self, force: bool = False):
+        """必要时重新读取文件；两次 stat 之间的读取直接命中内存。"""
+        now = time.monotonic()
+        if self._loaded and not force and now - self._checked_at < self.STAT_INTERVAL:
+            return
+        self._checked_at = now
+        signature = self._stat_signature()
+        if self._loaded and signature == self._signature:
+            return
+
+        self._signature = signature
+        self._loaded = True
+        self._snapshot = None
+        self._error = None
+        if signature is None:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._snapshot = freeze(json.load(f))
+        except Exception as e:
+            # 缓存解析失败结果，文件未变化前不再重复解析
+            self._error = e
+
+    def read_versioned(self):
+        """返回 (只读快照, 版本号)；文件不存在时快照为 None，解析失败时抛出原异常。"""
+        with self._lock:
+            self._refresh_locked()
+            if self._error is not None:
+                raise self._error
+            return self._snapshot, self._version_locked()
+
+    def read(self):
+        """返回只读快照，文件不存在时返回 None。"""
+        return self.read_versioned()[0]
+
+    def exists(self) -> bool:
+        """文件是否存在（基于缓存状态）。"""
+        with self._lock:
+            self._refresh_locked()
+            return self._signature is not None
+
+    def version(self):
+        """返回当前文件版本号，文件不存在时返回 None。"""
+        with self._lock:
+            self._refresh_locked()
+            return self._version_locked()
+
+    def _version_locked(self):
+        if self._signature is None:
+            return None
+        mtime_ns, size, inode = self._signature
+        return f'{mtime_ns:x}-{size:x}-{inode:x}'
+
+    def write(self, data, validate=None):
+        """原子写入配置；validate 接收临时文件路径并返回 (是否通过, 说明)，不通过时保留原文件。
+
+        临时文件的写入与校验在锁外进行，锁只在替换文件与更新缓存时持有，校验期间的读取不受影响。
+        """
+        temp_path = self._stage(data)
+        try:
+            valid, message = self._validate(temp_path, validate)
+            if not valid:
+                return False, message
+            with self._lock:
+                self._replace_locked(temp_path, data)
+            return True, message
+        finally:
+            self._discard(temp_path)
+
+    def update(self, mutate, validate=None):
+        """读取最新内容、修改并原子写回。
+
+        mutate 接收只读快照（文件不存在时为 None）并返回要写入的新内容，可抛出异常放弃本次修改。
+        写入与校验在锁外进行，替换前在锁内确认文件未被其他写入者修改；若已修改则基于新内容重新执行
+        mutate，重试 UPDATE_ATTEMPTS 次仍冲突时抛出 ConfigChangedError。
+        """
+        for _ in range(self.UPDATE_ATTEMPTS):
+            snapshot, signature = self._read_latest()
+            data = mutate(snapshot)
+            temp_path = self._stage(data)
+            try:
+                valid, message = self._validate(temp_path, validate)
+                if not valid:
+                    return False, message
+                with self._lock:
+                    if self._stat_signature() == signature:
+                        self._replace_locked(temp_path, data)
+                        return True, message
+            finally:
+                self._discard(temp_path)
+            logger.info(f'{os.path.basename(self.path)} 在校验期间被其他请求修改，正在基于最新内容重试')
+        raise ConfigChangedError(f'{os.path.basename(self.path)} 正被频繁修改，请稍后重试')
+
+    def _read_latest(self):
+        """绕过 stat 节流读取最新内容，返回 (只读快照, 文件签名)。"""
+        with self._lock:
+            self._refresh_locked(force=True)
+            if self._error is not None:
+                raise self._error
+            return self._snapshot, self._signature
+
+    def _temp_path(self, suffix: str) -> str:
+        directory, name = os.path.split(self.path)
+        os.makedirs(directory or '.', exist_ok=True)
+        return os.path.join(directory, f'.{name}.{os.getpid()}-{next(_temp_counter)}.{suffix}')
+
+    def _stage(self, data) -> str:
+        """把内容写入同目录下的独立临时文件并返回路径，并发写入者互不覆盖。"""
+        temp_path = self._temp_path('tmp')
+        try:
+            with open(temp_path, 'x', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            self._discard(temp_path)
+            raise
+        return temp_path
+
+    @staticmethod
+    def _validate(temp_path: str, validate):
+        if validate is None:
+            return True, ''
+        return validate(temp_path)
+
+    @staticmethod
+    def _discard(temp_path: str):
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                logger.warning(f'删除临时配置文件失败: {temp_path}')
+
+    def _replace_locked(self, temp_path: str, data):
+        os.replace(temp_path, self.path)
+        self._signature = self._stat_signature()
+        # freeze 会复制可修改的部分，已冻结的子结构直接复用
+        self._snapshot = freeze(data)
+        self._error = None
+        self._loaded = True
+        self._checked_at = time.monotonic()
+
+    def delete(self) -> bool:
+        """删除配置文件，返回删除前文件是否存在。"""
+        with self._lock:
+            return self._delete_locked()
+
+    def _delete_locked(self) -> bool:
+        try:
+            os.remove(self.path)
+            existed = True
+        except FileNotFoundError:
+            existed = False
+        self._signature = None
+        self._snapshot = None
+        self._error = None
+        self._loaded = True
+        self._checked_at = time.monotonic()
+        return existed
+
+    def _backup_locked(self):
+        """为当前文件建立硬链接备份（文件系统不支持时复制），文件不存在时返回 None。"""
+        if not os.path.exists(self.path):
+            return None
+        backup_path = self._temp_path('bak')
+        try:
+            os.link(self.path, backup_path)
+        except OSError:
+            shutil.copy2(self.path, backup_path)
+        return backup_path
+
+    def _restore_locked(self, backup_path):
+        """用备份恢复文件，备份为 None 表示原本不存在；缓存在下次读取时重新加载。"""
+        if backup_path is None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        else:
+            os.replace(backup_path, self.path)
+        self._loaded = False
+
+
+class ConfigStore:
+    """config.json 与 frpc.json 的共享缓存，也是这两个文件唯一的写入入口。"""
+
+    def __init__(self, web_config_path: str, frpc_config_path: str):
+        self.web = ConfigFile(web_config_path)
+        self.frpc = ConfigFile(frpc_config_path)
+        self._auto_retry_lock = threading.Lock()
+        self._auto_retry_cache = (object(), None)
+        self._proxy_index_lock = threading.Lock()
+        self._proxy_index = (None, None)
+
+    def get_web_config(self):
+        """返回 config.json 的只读快照，不存在时返回 None。"""
+        return self.web.read()
+
+    def get_frpc_config(self):
+        """返回 frpc.json 的只读快照，不存在时返回 None。"""
+        return self.frpc.read()
+
+    def save_web_config(self, config: dict):
+        """保存 config.json。"""
+        return self.web.write(config)
+
+    def save_frpc_config(self, config: dict, validate=None):
+        """保存 frpc.json，validate 可在替换前校验临时文件。"""
+        return self.frpc.write(config, validate=validate)
+
+    def delete_frpc_config(self) -> bool:
+        """删除 frpc.json。"""
+        return self.frpc.delete()
+
+    def update_configs(self, mutate, validate=None):
+        """在 config.json 的最新内容上执行 mutate，并把 config.json 与 frpc.json 作为一次修改提交。
+
+        mutate 接收 config.json 的只读快照，返回 (config.json 新内容, frpc.json 新内容)；frpc.json 为 None 表示删除，
+        为 FRPC_UNCHANGED 表示不变。两个文件先写入临时文件，validate 在锁外校验 frpc.json 的临时文件；全部就绪后
+        在两个文件锁内确认期间没有其他写入，先替换 frpc.json，最后替换 config.json，后者失败时恢复原 frpc.json。
+        文件被其他写入者修改时基于最新内容重试，多次冲突后抛出 ConfigChangedError。
+        """
+        for _ in range(ConfigFile.UPDATE_ATTEMPTS):
+            web_snapshot, web_signature = self.web._read_latest()
+            frpc_signature = self.frpc._stat_signature()
+            web_data, frpc_data = mutate(web_snapshot)
+
+            web_temp = frpc_temp = None
+            try:
+                web_temp = self.web._stage(web_data)
+                message = ''
+                if frpc_data is not FRPC_UNCHANGED and frpc_data is not None:
+                    frpc_temp = self.frpc._stage(frpc_data)
+                    valid, message = ConfigFile._validate(frpc_temp, validate)
+                    if not valid:
+                        return False, message
+                with self.web._lock, self.frpc._lock:
+                    unchanged = (self.web._stat_signature() == web_signature
+                                 and self.frpc._stat_signature() == frpc_signature)
+                    if unchanged:
+                        self._commit_locked(web_temp, web_data, frpc_temp, frpc_data)
+                        return True, message
+            finally:
+                for temp_path in (web_temp, frpc_temp):
+                    if temp_path is not None:
+                        ConfigFile._discard(temp_path)
+            logger.info('配置文件在校验期间被其他请求修改，正在基于最新内容重试')
+        raise ConfigChangedError('配置文件正被频繁修改，请稍后重试')
+
+    def _commit_locked(self, web_temp: str, web_data, frpc_temp, frpc_data):
+        """持有两个文件锁时依次替换 frpc.json 与 config.json。"""
+        if frpc_data is FRPC_UNCHANGED:
+            self.web._replace_locked(web_temp, web_data)
+            return
+        backup_path = self.frpc._backup_locked()
+        try:
+            if frpc_data is None:
+                self.frpc._delete_locked()
+            else:
+                self.frpc._replace_locked(frpc_temp, frpc_data)
+            self.web._replace_locked(web_temp, web_data)
+        except BaseException:
+            logger.error('替换 config.json 失败，已恢复原 frpc.json')
+            self.frpc._restore_locked(backup_path)
+            raise
+        finally:
+            if backup_path is not None:
+                ConfigFile._discard(backup_path)
+
+    def proxy_index(self, proxies):
+        """返回 config.json 快照中代理列表的冲突索引，同一只读列表只构建一次。"""
+        with self._proxy_index_lock:
+            cached_proxies, index = self._proxy_index
+            if cached_proxies is proxies:
+                return index
+        index = ProxyConflictIndex(proxies)
+        self.remember_proxy_index(proxies, index)
+        return index
+
+    def remember_proxy_index(self, proxies, index):
+        """登记只读代理列表对应的冲突索引。"""
+        with self._proxy_index_lock:
+            self._proxy_index = (proxies, index)
+
+    def advance_proxy_index(self, old_proxies, new_proxies, position: int, old_proxy, new_proxy):
+        """单个代理的修改提交后就地更新缓存的冲突索引，使其对应新的代理列表；缓存已属于其他列表时不做处理。"""
+        with self._proxy_index_lock:
+            cached_proxies, index = self._proxy_index
+            if cached_proxies is not old_proxies:
+                return
+            index.apply(position, old_proxy, new_proxy)
+            self._proxy_index = (new_proxies, index)
+
+    def get_auto_retry_config(self):
+        """返回规范化后的自动重试设置，仅在 config.json 变化后重新计算。"""
+        try:
+            snapshot, version = self.web.read_versioned()
+        except Exception as e:
+            logger.warning(f'读取自动重试配置失败，已回退为默认值: {str(e)}')
+            return freeze(InputValidator.normalize_auto_retry_config({}))
+
+        with self._auto_retry_lock:
+            cached_version, cached_config = self._auto_retry_cache
+            if cached_version == version and cached_config is not None:
+                return cached_config
+            payload = (snapshot or {}).get('autoRetry') if isinstance(snapshot, dict) else None
+            config = freeze(InputValidator.normalize_auto_retry_config(payload))
+            self._auto_retry_cache = (version, config)
+            return config
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_config_store(runtime_settings) -> ConfigStore:
+    """按配置文件路径返回共享的 ConfigStore，同一组文件在进程内只缓存一份。"""
+    key = (runtime_settings.web_config_path, runtime_settings.frpc_config_path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = ConfigStore(*key)
+            _stores[key] = store
+        return store
@@ -0,0 +1,134 @@
+"""FrpcManager 进程内注册表。"""
+import atexit
+import logging
+import re
+import threading
+
+from app.runtime_settings import DEFAULT_INSTANCE_ID, instance_runtime_settings, load_runtime_settings
+from app.utils.frpc_manager import FrpcManager
+from app.utils.process_tracker import ProcessTracker
+
+logger = logging.getLogger(__name__)
+
+# 后台线程名称与用途，线程名中的数字后缀（如 PID）会在查找前去掉
+THREAD_PURPOSES = {
+    'MainThread': '主线程',
+    'frpc-log-follower': '跟随读取 frpc.log，写入日志缓冲区与索引',
+    'frpc-pipe-capture': 'pipe 模式下读取 frpc 输出管道并统一写盘',
+    'frpc-auto-retry': '自动重试调度，由进程退出、错误日志与配置变更事件唤醒',
+    'frpc-proxy-status': '按自适应间隔轮询 frpc 管理接口 /api/status，缓存各代理运行状态',
+    'frps-traffic-collector': '定时读取 frps 面板的代理流量与连接数，写入指标存储',
+    'frpc-resource-sampler': '按固定间隔采样 frpc 进程的 CPU、内存、线程、文件描述符与连接数',
+    'frpc-exit-watch': '等待 frpc 进程退出并通知自动重试',
+    'frpc-log-compress': '后台 gzip 压缩已轮转的日志分段',
+    'frpc-version-refresh': '后台刷新 frpc / frps 版本缓存',
+    'frpc-download': '下载并解压 frpc',
+    'frpc-restart': '后台执行 frpc 重启任务',
+    'frpc-auto-start': '应用启动时自动拉起 frpc',
+    'status-publisher': '向订阅的 WebSocket 客户端推送服务状态',
+    'log-broadcaster': '向 WebSocket 客户端广播日志',
+    'network-monitor': '定期检测网络，恢复后拉起 frpc',
+}
+THREAD_SUFFIX_PATTERN = re.compile(r'-\d+$')
+
+
+def describe_thread_purpose(name: str) -> str:
+    """根据线程名返回用途说明，未登记的线程返回空字符串。"""
+    return THREAD_PURPOSES.get(name) or THREAD_PURPOSES.get(THREAD_SUFFIX_PATTERN.sub('', name), '')
+
+
+class FrpcManagerRegistry:
+    """按配置文件路径共享 FrpcManager，保证每个 frpc 只有一个日志读取线程、版本缓存与启停锁。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._managers = {}
+        self._shutdown = False
+
+    def get(self, enable_auto_retry_watchdog: bool = False, instance_id: str = DEFAULT_INSTANCE_ID) -> FrpcManager:
+        """返回实例当前配置路径对应的 FrpcManager，首次调用时创建。"""
+        runtime_settings = instance_runtime_settings(load_runtime_settings(), instance_id)
+        return self.get_for_settings(runtime_settings, instance_id, enable_auto_retry_watchdog)
+
+    def get_for_settings(self, runtime_settings, instance_id: str, enable_auto_retry_watchdog: bool = False) -> FrpcManager:
+        """按给定的运行时配置返回共享的 FrpcManager，供实例与代理分片共用。"""
+        config_path = runtime_settings.frpc_config_path
+        with self._lock:
+            manager = self._managers.get(config_path)
+            if manager is None:
+                manager = FrpcManager(runtime_settings=runtime_settings, instance_id=instance_id)
+                self._managers[config_path] = manager
+                logger.info(f'已创建 frpc 管理实例: {instance_id} ({config_path})')
+        if enable_auto_retry_watchdog:
+            manager.start_auto_retry_watchdog()
+        return manager
+
+    def managers(self) -> list[FrpcManager]:
+        """返回全部已创建的管理实例。"""
+        with self._lock:
+            return list(self._managers.values())
+
+    def remove(self, instance_id: str) -> bool:
+        """移除并停止指定实例的管理对象，返回是否存在。"""
+        with self._lock:
+            removed = [
+                (config_path, manager) for config_path, manager in self._managers.items()
+                if manager.instance_id == instance_id
+            ]
+            for config_path, _ in removed:
+                del self._managers[config_path]
+        for _, manager in removed:
+            manager.shutdown()
+        return bool(removed)
+
+    def collect_status(self, managers=None) -> dict:
+        """汇总多个实例的状态：需要回退扫描的实例共用一次进程表遍历，其余实例只做 O(1) 的 PID 校验。"""
+        managers = self.managers() if managers is None else managers
+        ProcessTracker.refresh_many([manager.process_tracker for manager in managers])
+        return {manager.instance_id: manager.get_status() for manager in managers}
+
+    def shutdown(self):
+        """停止全部管理实例的后台线程；frpc 进程独立运行，不随面板退出。"""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            managers = list(self._managers.values())
+        for manager in managers:
+            try:
+                manager.shutdown()
+            except Exception as e:
+                logger.warning(f'停止 frpc 管理实例失败: {manager.config_path}, 错误: {str(e)}')
+
+    def describe_threads(self) -> dict:
+        """列出进程内全部线程及其用途，并标出各管理实例持有的后台线程。"""
+        threads = [
+            {
+                'name': thread.name,
+                'purpose': describe_thread_purpose(thread.name),
+                'daemon': thread.daemon,
+                'alive': thread.is_alive(),
+            }
+            for thread in threading.enumerate()
+        ]
+        return {
+            'count': len(threads),
+            'threads': sorted(threads, key=lambda item: item['name']),
+            'managers': [
+                {
+                    'instance': manager.instance_id,
+                    'config_path': manager.config_path,
+                    'threads': manager.background_threads(),
+                }
+                for manager in self.managers()
+            ],
+        }
+
+
+frpc_registry = FrpcManagerRegistry()
+atexit.register(frpc_registry.shutdown)
+
+
+def get_frpc_manager(enable_auto_retry_watchdog: bool = False, instance_id: str = DEFAULT_INSTANCE_ID) -> FrpcManager:
+    """获取共享的 FrpcManager。"""
+    return frpc_registry.get(enable_auto_retry_watchdog=enable_auto_retry_watchdog, instance_id=instance_id)
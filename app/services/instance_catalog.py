@@ -0,0 +1,93 @@
+"""frpc 实例清单。"""
+import logging
+import os
+import re
+import threading
+import time
+
+from app.runtime_settings import DEFAULT_INSTANCE_ID
+from app.services.config_store import ConfigFile, thaw
+
+logger = logging.getLogger(__name__)
+
+INSTANCE_ID_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,31}$')
+DEFAULT_INSTANCE_NAME = '默认实例'
+
+
+class InstanceCatalog:
+    """instances.json 的读写入口：默认实例始终存在且不写入文件，其余实例按 id 登记。"""
+
+    def __init__(self, path: str):
+        self.file = ConfigFile(path)
+        self._lock = threading.Lock()
+
+    def _load_entries(self) -> list[dict]:
+        try:
+            payload = self.file.read()
+        except Exception as e:
+            logger.warning(f'读取 instances.json 失败，仅保留默认实例: {str(e)}')
+            return []
+        if not isinstance(payload, dict) or not isinstance(payload.get('instances'), list):
+            return []
+        return [
+            thaw(entry) for entry in payload['instances']
+            if isinstance(entry, dict) and INSTANCE_ID_PATTERN.match(str(entry.get('id', '')))
+            and entry['id'] != DEFAULT_INSTANCE_ID
+        ]
+
+    def instances(self) -> list[dict]:
+        """返回全部实例，默认实例排在首位。"""
+        return [{'id': DEFAULT_INSTANCE_ID, 'name': DEFAULT_INSTANCE_NAME}] + self._load_entries()
+
+    def ids(self) -> list[str]:
+        """返回全部实例 id。"""
+        return [entry['id'] for entry in self.instances()]
+
+    def get(self, instance_id: str):
+        """返回实例定义，不存在时返回 None。"""
+        for entry in self.instances():
+            if entry['id'] == instance_id:
+                return entry
+        return None
+
+    def add(self, instance_id: str, name: str = ''):
+        """登记新实例，返回 (是否成功, 说明)。"""
+        instance_id = (instance_id or '').strip()
+        if not INSTANCE_ID_PATTERN.match(instance_id):
+            return False, '实例 id 只能包含小写字母、数字、下划线与连字符，且不超过 32 个字符'
+        with self._lock:
+            entries = self._load_entries()
+            if instance_id == DEFAULT_INSTANCE_ID or any(entry['id'] == instance_id for entry in entries):
+                return False, f'实例 {instance_id} 已存在'
+            entries.append({
+                'id': instance_id,
+                'name': (name or '').strip() or instance_id,
+                'created_at': time.time(),
+            })
+            return self.file.write({'instances': entries})
+
+    def remove(self, instance_id: str):
+        """注销实例，实例目录与日志保留在磁盘上，返回 (是否成功, 说明)。"""
+        if instance_id == DEFAULT_INSTANCE_ID:
+            return False, '默认实例不能删除'
+        with self._lock:
+            entries = self._load_entries()
+            remaining = [entry for entry in entries if entry['id'] != instance_id]
+            if len(remaining) == len(entries):
+                return False, f'实例 {instance_id} 不存在'
+            return self.file.write({'instances': remaining})
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_instance_catalog(runtime_settings) -> InstanceCatalog:
+    """按工作目录返回共享的实例清单。"""
+    path = os.path.join(runtime_settings.frpc_work_dir, 'instances.json')
+    with _catalogs_lock:
+        catalog = _catalogs.get(path)
+        if catalog is None:
+            catalog = InstanceCatalog(path)
+            _catalogs[path] = catalog
+        return catalog
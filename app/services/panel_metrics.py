@@ -0,0 +1,35 @@
+"""面板与 frpc 进程的 Prometheus 指标。"""
+from app.utils.prometheus import MetricsRegistry
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    'frpc_web_http_request_duration_seconds',
+    '面板 HTTP 请求耗时（秒），按路由规则统计',
+    ('method', 'route', 'status'),
+)
+restart_total = registry.counter(
+    'frpc_web_restart_total',
+    '后台重启任务完成次数，mode 为 reload 或 restart',
+    ('mode', 'result'),
+)
+auto_retry_attempts_total = registry.counter(
+    'frpc_auto_retry_attempts_total',
+    '自动重试执行的重启次数',
+    ('instance', 'result'),
+)
+log_lines_total = registry.counter(
+    'frpc_log_lines_total',
+    '读取到的 frpc 日志行数，error_class 为空表示未命中错误规则',
+    ('instance', 'error_class'),
+)
+download_bytes_total = registry.counter(
+    'frpc_web_download_bytes_total',
+    '下载 frpc 发布包累计写入的字节数',
+)
+download_duration = registry.histogram(
+    'frpc_web_download_duration_seconds',
+    '下载并解压 frpc 的耗时（秒）',
+    ('result',),
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600),
+)
@@ -0,0 +1,216 @@
+"""单个代理的增删改查。"""
+import hashlib
+import logging
+
+from app.services.config_store import FRPC_UNCHANGED, ConfigChangedError, freeze
+from app.utils.config_diff import diff_configs, diff_proxy_change, summarize_diff
+from app.utils.input_validator import InputValidator
+from app.utils.proxy_sharding import canonical_json
+
+logger = logging.getLogger(__name__)
+
+# Web 管理专用配置字段，只写入 config.json，不写入 frpc.json
+WEB_ONLY_CONFIG_FIELDS = ('autoRetry', 'sharding')
+
+
+class ProxyEditError(Exception):
+    """代理修改被拒绝，status_code 为对应的 HTTP 状态码。"""
+
+    def __init__(self, message: str, status_code: int = 400, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.errors = errors or []
+
+
+def proxy_etag(proxy) -> str:
+    """以规范化 JSON 的摘要作为代理的 ETag，键顺序不影响结果。"""
+    return hashlib.sha256(canonical_json(proxy).encode('utf-8')).hexdigest()[:20]
+
+
+def frpc_proxy(proxy):
+    """返回代理在 frpc.json 中的内容，未启用或不是对象时返回 None。"""
+    if not isinstance(proxy, dict) or proxy.get('enabled', True) is False:
+        return None
+    return {key: value for key, value in proxy.items() if key != 'enabled'}
+
+
+def build_frpc_config(web_config):
+    """由 config.json 推导 frpc.json：剥离 Web 专用字段，只保留已启用的代理；没有启用的代理时返回 None。"""
+    proxies = [
+        item for item in (frpc_proxy(proxy) for proxy in web_config.get('proxies') or [])
+        if item is not None
+    ]
+    if not proxies:
+        return None
+    config = {key: value for key, value in web_config.items() if key not in WEB_ONLY_CONFIG_FIELDS}
+    config['proxies'] = proxies
+    return config
+
+
+def merge_patch(target, patch):
+    """按 RFC 7396 合并 JSON Merge Patch，值为 null 的字段被删除。"""
+    if not isinstance(patch, dict):
+        return patch
+    merged = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = merge_patch(merged.get(key), value)
+    return merged
+
+
+def _find_proxy(proxies, name):
+    for index, proxy in enumerate(proxies):
+        if isinstance(proxy, dict) and proxy.get('name') == name:
+            return index
+    return None
+
+
+def _check_preconditions(current_etag, if_match=None, if_none_match=None):
+    """校验 If-Match / If-None-Match（werkzeug ETags），代理不存在时 current_etag 为 None。"""
+    if if_match and (current_etag is None or not if_match.contains(current_etag)):
+        raise ProxyEditError('代理已被修改，请刷新后重试', 412)
+    if if_none_match and current_etag is not None and (
+        if_none_match.star_tag or if_none_match.contains(current_etag)
+    ):
+        raise ProxyEditError('代理已存在', 412)
+
+
+def get_proxy(config_store, name: str):
+    """返回 (代理, ETag)，不存在时返回 None。"""
+    config = config_store.get_web_config()
+    proxies = (config or {}).get('proxies') or []
+    index = _find_proxy(proxies, name)
+    if index is None:
+        return None
+    proxy = {**proxies[index], 'enabled': proxies[index].get('enabled', True)}
+    return proxy, proxy_etag(proxy)
+
+
+def list_proxies(config_store):
+    """返回 config.json 中的全部代理及各自的 ETag。"""
+    config = config_store.get_web_config()
+    items = []
+    for proxy in (config or {}).get('proxies') or []:
+        if isinstance(proxy, dict):
+            proxy = {**proxy, 'enabled': proxy.get('enabled', True)}
+            items.append({'proxy': proxy, 'etag': proxy_etag(proxy)})
+    return items
+
+
+def _edit_proxy(config_store, name: str, build, verify=None, if_match=None, if_none_match=None):
+    """修改 config.json 中的单个代理，并把推导出的 frpc.json 与其一起提交。
+
+    build 接收现有代理（不存在时为 None）并返回新代理，返回 None 表示删除。
+    只校验新代理本身，冲突通过按快照缓存的哈希索引检查，提交后就地更新索引；差异只比较被修改的代理。
+    两个文件先写入临时文件，frpc.json 通过 verify 后才依次替换，config.json 最后替换。
+    """
+    result = {}
+
+    def mutate(config):
+        if config is None:
+            raise ProxyEditError('config.json 不存在，请先保存配置', 409)
+        base_proxies = config.get('proxies') or ()
+        proxies = list(base_proxies)
+        index = _find_proxy(proxies, name)
+        current = old_proxy = None
+        if index is not None:
+            old_proxy = proxies[index]
+            current = {**old_proxy, 'enabled': old_proxy.get('enabled', True)}
+        _check_preconditions(None if current is None else proxy_etag(current), if_match, if_none_match)
+
+        proxy = build(current)
+        index_change = None
+        if proxy is None:
+            if index is None:
+                raise ProxyEditError(f'代理 {name} 不存在', 404)
+            # 删除会改变后续代理的位置，下一次编辑时重新构建索引
+            del proxies[index]
+        else:
+            proxy = {**proxy, 'enabled': proxy.get('enabled', True)}
+            number = len(proxies) + 1 if index is None else index + 1
+            errors = InputValidator.validate_proxies([proxy], [], start=number)
+            if not errors:
+                conflict_index = config_store.proxy_index(base_proxies)
+                errors = conflict_index.conflicts(proxy, skip_index=index)
+                status_code = 409
+            else:
+                status_code = 400
+            if errors:
+                raise ProxyEditError('；'.join(errors), status_code, errors)
+            if index is None:
+                index_change = (len(proxies), None, proxy)
+                proxies.append(proxy)
+            else:
+                index_change = (index, old_proxy, proxy)
+                proxies[index] = proxy
+
+        # 提前冻结，提交后 config.json 的快照即为同一对象，下一次编辑可直接命中索引缓存
+        new_config = freeze({**config, 'proxies': proxies})
+        new_frpc = build_frpc_config(new_config)
+        sharding = InputValidator.normalize_sharding_config(config.get('sharding'))
+        old_item, new_item = frpc_proxy(old_proxy), frpc_proxy(proxy)
+        proxy_count = len(new_frpc['proxies']) if new_frpc is not None else 0
+        if new_frpc is None or proxy_count - (new_item is not None) + (old_item is not None) == 0:
+            # frpc.json 随启用代理的有无被创建或删除，全局字段一并变化，按整份配置比较
+            config_diff = diff_configs(build_frpc_config(config), new_frpc, sharding=sharding)
+        else:
+            config_diff = diff_proxy_change(
+                old_item, new_item, proxy_count, len(new_frpc.get('visitors') or ()), sharding=sharding
+            )
+        result.update({
+            'proxy': proxy,
+            'etag': None if proxy is None else proxy_etag(proxy),
+            'created': current is None,
+            'diff': config_diff,
+            'base': base_proxies,
+            'config': new_config,
+            'index_change': index_change,
+        })
+        return new_config, new_frpc if config_diff['changed'] else FRPC_UNCHANGED
+
+    try:
+        success, message = config_store.update_configs(mutate, validate=verify)
+    except ConfigChangedError as e:
+        raise ProxyEditError(str(e), 409) from e
+    if not success:
+        raise ProxyEditError(message, 400)
+
+    base_proxies, new_config, index_change = result.pop('base'), result.pop('config'), result.pop('index_change')
+    if index_change is not None:
+        config_store.advance_proxy_index(base_proxies, new_config['proxies'], *index_change)
+    logger.info(f"代理 {name} 已{'删除' if result['proxy'] is None else '保存'}: {summarize_diff(result['diff'])}")
+    return result
+
+
+def put_proxy(config_store, name: str, proxy, verify=None, if_match=None, if_none_match=None):
+    """创建或整体替换代理，代理名称以 URL 为准。"""
+    if not isinstance(proxy, dict):
+        raise ProxyEditError('代理配置必须是 JSON 对象', 400)
+    if proxy.get('name', name) != name:
+        raise ProxyEditError('请求体中的 name 与 URL 不一致', 400)
+    return _edit_proxy(
+        config_store, name, lambda current: {**proxy, 'name': name},
+        verify=verify, if_match=if_match, if_none_match=if_none_match
+    )
+
+
+def patch_proxy(config_store, name: str, patch, verify=None, if_match=None):
+    """按 JSON Merge Patch 修改代理的部分字段，可通过 name 重命名。"""
+    if not isinstance(patch, dict):
+        raise ProxyEditError('代理配置必须是 JSON 对象', 400)
+
+    def build(current):
+        if current is None:
+            raise ProxyEditError(f'代理 {name} 不存在', 404)
+        return merge_patch(current, patch)
+
+    # 重命名在原位置替换，新名称与其他代理的冲突由 find_proxy_conflicts 检查
+    return _edit_proxy(config_store, name, build, verify=verify, if_match=if_match)
+
+
+def delete_proxy(config_store, name: str, verify=None, if_match=None):
+    """删除代理。"""
+    return _edit_proxy(config_store, name, lambda current: None, verify=verify, if_match=if_match)
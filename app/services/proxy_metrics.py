@@ -0,0 +1,133 @@
+"""代理指标采集。"""
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.utils.event_scheduler import EventScheduler
+from app.utils.metrics_store import MetricsStore
+
+logger = logging.getLogger(__name__)
+
+metrics_store = MetricsStore.from_env()
+
+# frps 面板记录流量的实例名：frps 汇总的是全部客户端的代理，不属于某个本地 frpc 实例
+FRPS_INSTANCE_ID = 'frps'
+FRPS_PROXY_TYPES = ('tcp', 'udp', 'http', 'https', 'stcp', 'sudp', 'xtcp', 'tcpmux')
+
+
+def record_proxy_snapshot(instance_id: str, previous: dict, snapshot: dict):
+    """把 /api/status 轮询结果写入 up 指标，状态变化另记一条事件。"""
+    if snapshot.get('state') != 'ok':
+        return
+    timestamp = snapshot.get('updated_at') or time.time()
+    previous_status = {item['name']: item['status'] for item in previous.get('items', [])}
+    samples = []
+    for item in snapshot['items']:
+        samples.append((item['name'], 'up', 1 if item['status'] == 'running' else 0))
+        before = previous_status.get(item['name'])
+        if before != item['status']:
+            metrics_store.record_event(instance_id, item['name'], before or '', item['status'], timestamp)
+    metrics_store.record_many(instance_id, samples, timestamp)
+
+
+def _read_field(item: dict, *names, default=0):
+    """兼容 frps 新旧版本接口的字段命名（camelCase 与 snake_case）。"""
+    for name in names:
+        if name in item:
+            return item[name]
+    return default
+
+
+class FrpsTrafficCollector:
+    """定时读取 frps 面板 /api/proxy/<type>，记录各代理的当日流量与当前连接数。"""
+
+    TIMEOUT = 5
+
+    def __init__(self, store: MetricsStore, base_url: str, auth=None, interval: float = 10.0):
+        self._store = store
+        self.base_url = base_url.rstrip('/')
+        self.interval = max(interval, 1.0)
+        self._session = requests.Session()
+        self._session.auth = auth
+        self._session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self._scheduler = EventScheduler(self._collect, name='frps-traffic-collector')
+        self._failing = False
+
+    @classmethod
+    def from_env(cls, store: MetricsStore):
+        """未配置 FRPS_DASHBOARD_URL 时返回 None。"""
+        base_url = (os.getenv('FRPS_DASHBOARD_URL') or '').strip()
+        if not base_url:
+            return None
+        user = os.getenv('FRPS_DASHBOARD_USER') or ''
+        auth = (user, os.getenv('FRPS_DASHBOARD_PASSWORD') or '') if user else None
+        try:
+            interval = float(os.getenv('METRICS_SAMPLE_SECONDS', 10))
+        except ValueError:
+            interval = 10.0
+        return cls(store, base_url, auth, interval)
+
+    def start(self):
+        """启动采集线程并立即采集一次。"""
+        self._scheduler.start()
+        self._scheduler.notify('startup')
+
+    def stop(self):
+        """停止采集线程。"""
+        self._scheduler.stop()
+        self._session.close()
+
+    def is_alive(self) -> bool:
+        """采集线程是否存活。"""
+        return self._scheduler.is_alive()
+
+    def collect_once(self) -> int:
+        """采集一次并返回写入的代理数。"""
+        timestamp = time.time()
+        samples = []
+        for proxy_type in FRPS_PROXY_TYPES:
+            response = self._session.get(f'{self.base_url}/api/proxy/{proxy_type}', timeout=self.TIMEOUT)
+            if response.status_code == 404:
+                continue
+            response.raise_for_status()
+            for item in response.json().get('proxies') or []:
+                name = item.get('name')
+                if not name:
+                    continue
+                samples.append((name, 'traffic_in', _read_field(item, 'todayTrafficIn', 'today_traffic_in')))
+                samples.append((name, 'traffic_out', _read_field(item, 'todayTrafficOut', 'today_traffic_out')))
+                samples.append((name, 'connections', _read_field(item, 'curConns', 'cur_conns')))
+        self._store.record_many(FRPS_INSTANCE_ID, samples, timestamp)
+        return len(samples) // 3
+
+    def _collect(self, reasons):
+        try:
+            self.collect_once()
+            if self._failing:
+                logger.info('frps 面板流量采集已恢复')
+            self._failing = False
+        except (requests.RequestException, ValueError) as e:
+            if not self._failing:
+                logger.warning(f'读取 frps 面板流量失败: {str(e)}')
+            self._failing = True
+        self._scheduler.schedule('collect', time.time() + self.interval)
+
+
+_collector = None
+_collector_lock = threading.Lock()
+
+
+def ensure_traffic_collector():
+    """按环境变量启动 frps 流量采集，只启动一次；未配置时返回 None。"""
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            _collector = FrpsTrafficCollector.from_env(metrics_store)
+            if _collector is not None:
+                _collector.start()
+        return _collector
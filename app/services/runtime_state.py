@@ -5,6 +5,8 @@ import threading
 import time
 from dataclasses import asdict, dataclass
 
+from app.runtime_settings import DEFAULT_INSTANCE_ID
+from app.services.panel_metrics import restart_total
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +36,7 @@ class RestartState:
     completed: bool = False
     success: bool | None = None
     stage: str = "idle"
+    mode: str = ""
     progress: int = 0
     message: str = ""
     error_message: str = ""
@@ -81,7 +84,7 @@ class DownloadManager:
                 is_downloading=True,
                 progress="开始下载任务..."
             )
-            self._thread = threading.Thread(target=target, daemon=True)
+            self._thread = threading.Thread(target=target, name='frpc-download', daemon=True)
             self._thread.start()
             return self._state.snapshot()
 
@@ -193,7 +196,7 @@ class RestartManager:
                     with self._lock:
                         self._thread = None
 
-            self._thread = threading.Thread(target=runner, daemon=True)
+            self._thread = threading.Thread(target=runner, name='frpc-restart', daemon=True)
             self._thread.start()
             return self._state.snapshot()
 
@@ -205,11 +208,14 @@ class RestartManager:
         *,
         success: bool | None = None,
         error_message: str = "",
+        mode: str | None = None,
     ) -> dict:
-        """更新重启任务状态。"""
+        """更新重启任务状态；mode 标明本次以热加载（reload）还是完整重启（restart）完成。"""
         with self._lock:
             now = time.time()
             self._state.stage = stage
+            if mode is not None:
+                self._state.mode = mode
             self._state.message = message
             self._state.updated_at = now
             if progress is not None:
@@ -229,12 +235,13 @@ class RestartManager:
                 self._state.completed_at = now
                 if progress is None:
                     self._state.progress = 100
+                restart_total.inc(mode=self._state.mode or 'restart', result='success' if success else 'failure')
 
             return self._state.snapshot()
 
-    def complete_success(self, message: str) -> dict:
+    def complete_success(self, message: str, mode: str | None = None) -> dict:
         """将重启任务标记为成功完成。"""
-        return self.update("completed", message, 100, success=True)
+        return self.update("completed", message, 100, success=True, mode=mode)
 
     def complete_error(self, message: str) -> dict:
         """将重启任务标记为失败完成。"""
@@ -251,6 +258,9 @@ class WebSocketHub:
     def __init__(self):
         self._lock = threading.Lock()
         self._clients = set()
+        self._subscriptions = {}
+        # 每个连接一把发送锁，后台线程与连接线程的写入不会交错
+        self._send_locks = {}
 
     def add(self, client):
         """添加客户端连接。"""
@@ -258,33 +268,149 @@ class WebSocketHub:
             self._clients.add(client)
 
     def discard(self, client):
-        """安全移除客户端连接。"""
+        """安全移除客户端连接及其全部订阅。"""
         with self._lock:
             self._clients.discard(client)
+            self._send_locks.pop(client, None)
+            for subscribers in self._subscriptions.values():
+                subscribers.discard(client)
 
-    def snapshot(self):
+    def subscribe(self, client, topic: str):
+        """订阅指定主题的广播。"""
+        with self._lock:
+            self._subscriptions.setdefault(topic, set()).add(client)
+
+    def unsubscribe(self, client, topic: str):
+        """取消订阅指定主题。"""
+        with self._lock:
+            self._subscriptions.get(topic, set()).discard(client)
+
+    def subscriber_count(self, topic: str) -> int:
+        """返回指定主题的订阅数。"""
+        with self._lock:
+            return len(self._subscriptions.get(topic, ()))
+
+    def snapshot(self, topic: str | None = None):
         """获取当前客户端快照，避免广播时长时间持锁。"""
         with self._lock:
-            return list(self._clients)
+            if topic is None:
+                return list(self._clients)
+            return list(self._subscriptions.get(topic, ()))
 
-    def broadcast(self, payload: dict):
-        """向所有客户端广播 JSON 消息。"""
+    def broadcast(self, payload: dict, topic: str | None = None):
+        """向所有客户端（或指定主题的订阅者）广播 JSON 消息。"""
+        self.send(self.snapshot(topic), payload)
+
+    def _send_lock(self, client):
+        """返回客户端的发送锁。"""
+        with self._lock:
+            return self._send_locks.setdefault(client, threading.Lock())
+
+    def send(self, clients, payload: dict):
+        """向指定客户端发送同一条 JSON 消息，只序列化一次；同一连接的发送串行执行。"""
         message = json.dumps(payload)
-        for client in self.snapshot():
+        for client in clients:
             try:
-                client.send(message)
+                with self._send_lock(client):
+                    client.send(message)
             except Exception as e:
                 logger.error(f"发送 WebSocket 消息失败: {str(e)}")
                 self.discard(client)
 
 
+class StatusPublisher:
+    """单一后台线程按固定节拍计算状态快照，并按订阅的实例扇出给全部订阅者。"""
+
+    TOPIC = "service_status"
+    INTERVAL = 2
+
+    def __init__(self, hub: WebSocketHub):
+        self._hub = hub
+        self._condition = threading.Condition()
+        self._thread = None
+        self._provider = None
+        self._latest = {}
+        self._client_instances = {}
+
+    def ensure_started(self, provider):
+        """登记状态生成函数并确保发布线程只启动一次；provider 接收实例 id 集合并返回 {实例 id: 消息}。"""
+        with self._condition:
+            self._provider = provider
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._publish_loop, name='status-publisher', daemon=True)
+            self._thread.start()
+
+    def subscribe(self, client, instance_id: str = DEFAULT_INSTANCE_ID):
+        """加入状态扇出，并立即推送该实例最近一次快照；重复订阅会切换到新的实例。"""
+        self._hub.subscribe(client, self.TOPIC)
+        with self._condition:
+            self._client_instances[client] = instance_id
+            latest, latest_at = self._latest.get(instance_id, (None, 0.0))
+            if (time.time() - latest_at) >= self.INTERVAL:
+                latest = None
+            self._condition.notify_all()
+        if latest is None:
+            latest = self._refresh({instance_id}).get(instance_id)
+        if latest is not None:
+            self._hub.send([client], latest)
+
+    def unsubscribe(self, client):
+        """退出状态扇出。"""
+        self._hub.unsubscribe(client, self.TOPIC)
+        with self._condition:
+            self._client_instances.pop(client, None)
+
+    def _refresh(self, instance_ids) -> dict:
+        """为指定实例计算一次状态快照并缓存。"""
+        provider = self._provider
+        if provider is None:
+            return {}
+        payloads = provider(set(instance_ids))
+        now = time.time()
+        with self._condition:
+            for instance_id, payload in payloads.items():
+                self._latest[instance_id] = (payload, now)
+        return payloads
+
+    def _group_subscribers(self) -> dict:
+        """按订阅的实例对当前订阅者分组，顺带清理已断开的客户端。"""
+        clients = self._hub.snapshot(self.TOPIC)
+        with self._condition:
+            self._client_instances = {
+                client: self._client_instances.get(client, DEFAULT_INSTANCE_ID) for client in clients
+            }
+            groups = {}
+            for client, instance_id in self._client_instances.items():
+                groups.setdefault(instance_id, []).append(client)
+            return groups
+
+    def _publish_loop(self):
+        """有订阅者时每个节拍只为被订阅的实例各计算一次状态；无订阅者时挂起等待。"""
+        while True:
+            try:
+                with self._condition:
+                    while self._hub.subscriber_count(self.TOPIC) == 0:
+                        self._condition.wait()
+                groups = self._group_subscribers()
+                payloads = self._refresh(groups)
+                for instance_id, clients in groups.items():
+                    payload = payloads.get(instance_id)
+                    if payload is not None:
+                        self._hub.send(clients, payload)
+            except Exception as e:
+                logger.error(f"状态广播时出错: {str(e)}")
+            time.sleep(self.INTERVAL)
+
+
 class RuntimeStateService:
-    """聚合下载管理与 WebSocket 广播状态。"""
+    """聚合下载管理、状态发布与 WebSocket 广播状态。"""
 
     def __init__(self):
         self.download_manager = DownloadManager()
         self.restart_manager = RestartManager()
         self.websocket_hub = WebSocketHub()
+        self.status_publisher = StatusPublisher(self.websocket_hub)
         self.log_queue = queue.Queue()
         self._broadcast_thread = None
         self._broadcast_lock = threading.Lock()
@@ -294,25 +420,28 @@ class RuntimeStateService:
         with self._broadcast_lock:
             if self._broadcast_thread and self._broadcast_thread.is_alive():
                 return
-            self._broadcast_thread = threading.Thread(target=self._broadcast_logs_loop, daemon=True)
+            self._broadcast_thread = threading.Thread(
+                target=self._broadcast_logs_loop, name='log-broadcaster', daemon=True
+            )
             self._broadcast_thread.start()
 
     def _broadcast_logs_loop(self):
         """后台循环广播日志消息。"""
         while True:
             try:
-                log_message = self.log_queue.get()
+                instance_id, log_message = self.log_queue.get()
                 self.websocket_hub.broadcast({
                     "type": "log",
-                    "content": log_message
+                    "content": log_message,
+                    "instance": instance_id
                 })
             except Exception as e:
                 logger.error(f"广播日志时出错: {str(e)}")
 
-    def enqueue_logs(self, logs):
+    def enqueue_logs(self, logs, instance_id: str = DEFAULT_INSTANCE_ID):
         """将日志送入广播队列。"""
         for log in logs:
-            self.log_queue.put(log)
+            self.log_queue.put((instance_id, log))
 
 
 runtime_state = RuntimeStateService()
@@ -0,0 +1,277 @@
+"""代理分片监管。"""
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.runtime_settings import shard_runtime_settings
+from app.services.config_store import thaw
+from app.services.frpc_registry import frpc_registry
+from app.utils.input_validator import InputValidator
+from app.utils.proxy_sharding import canonical_json, plan_shards
+
+logger = logging.getLogger(__name__)
+
+MAX_PARALLEL_SHARDS = 8
+SHARD_INSTANCE_MARKER = ':shard-'
+
+
+def is_shard_instance(instance_id: str) -> bool:
+    """实例 ID 是否属于某个实例的代理分片。"""
+    return SHARD_INSTANCE_MARKER in instance_id
+
+
+def is_sharding_enabled(manager) -> bool:
+    """实例的 config.json 是否启用了代理分片。"""
+    try:
+        web_config = manager.config_store.get_web_config()
+    except Exception:
+        return False
+    if not isinstance(web_config, dict):
+        return False
+    return InputValidator.normalize_sharding_config(web_config.get('sharding'))['enabled']
+
+
+class ShardSupervisor:
+    """把一个实例的代理拆分到多个 frpc 进程：并行校验与启动，只重启代理有变化的分片。"""
+
+    def __init__(self, base_manager, registry):
+        self.base_manager = base_manager
+        self._registry = registry
+        self._lock = threading.Lock()
+        # 通过 stop() 手动停止后，网络恢复时不再自动拉起分片
+        self._stopped = False
+        self.shards_dir = os.path.join(base_manager.frpc_work_dir, 'shards')
+
+    def _shard_instance_id(self, index: int) -> str:
+        return f'{self.base_manager.instance_id}{SHARD_INSTANCE_MARKER}{index}'
+
+    def _shard_manager(self, index: int):
+        """返回第 index 个分片的 FrpcManager，首次使用时创建。"""
+        runtime_settings = shard_runtime_settings(self.base_manager.runtime_settings, index)
+        return self._registry.get_for_settings(
+            runtime_settings,
+            self._shard_instance_id(index),
+            enable_auto_retry_watchdog=True
+        )
+
+    def existing_indexes(self) -> list[int]:
+        """返回磁盘上已有配置文件的分片序号。"""
+        try:
+            names = os.listdir(self.shards_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            int(name) for name in names
+            if name.isdigit() and os.path.exists(os.path.join(self.shards_dir, name, 'frpc.json'))
+        )
+
+    @staticmethod
+    def _run_parallel(func, items):
+        """并行执行分片任务并按输入顺序返回结果。"""
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(items), MAX_PARALLEL_SHARDS)) as executor:
+            return list(executor.map(func, items))
+
+    def apply(self, config: dict, verify=None, exclude_fields=(), indexes=None, start_stopped: bool = True) -> dict:
+        """按 config.json 重新规划分片：只改写并重启代理有变化的分片，多余的分片停止后删除。
+
+        verify 接收临时配置文件路径并返回 (是否通过, 说明)，未通过的分片保留原配置与进程。
+        indexes 非 None 时只处理这些分片且不删除多余分片；start_stopped 为 False 时未运行的分片只写入配置。
+        """
+        sharding = InputValidator.normalize_sharding_config(config.get('sharding'))
+        shard_count = sharding['shardCount']
+        plans = plan_shards(config, shard_count, sharding['groupKey'], exclude_fields=exclude_fields)
+        auto_retry = InputValidator.normalize_auto_retry_config(config.get('autoRetry'))
+        selected = [
+            (index, plan) for index, plan in enumerate(plans)
+            if indexes is None or index in indexes
+        ]
+
+        with self._lock:
+            self._stopped = False
+            # 分片模式取代单进程运行
+            if self.base_manager.is_running():
+                self.base_manager.stop()
+
+            results = self._run_parallel(
+                lambda item: self._apply_shard(item[0], item[1], auto_retry, verify, start_stopped),
+                selected
+            )
+            removed = []
+            if indexes is None:
+                removed = [index for index in self.existing_indexes() if index >= shard_count]
+            for index in removed:
+                self._remove_shard(index)
+
+        logger.info(
+            f'代理分片已应用: {self.base_manager.instance_id}, 分片数 {shard_count}, '
+            f"变更 {sum(1 for item in results if item['action'] in ('reloaded', 'restarted', 'started'))} 个"
+        )
+        return {
+            'success': all(item['success'] for item in results),
+            'shard_count': shard_count,
+            'shards': results,
+            'removed': removed,
+        }
+
+    def apply_changes(self, config: dict, affected_shards, verify=None, exclude_fields=()) -> dict:
+        """保存配置后只应用 diff 中受影响的分片：运行中的分片热加载或重启，未运行的分片只写入配置。"""
+        return self.apply(
+            config, verify=verify, exclude_fields=exclude_fields,
+            indexes=set(affected_shards), start_stopped=False
+        )
+
+    def _apply_shard(self, index: int, shard_config: dict, auto_retry: dict, verify,
+                     start_stopped: bool = True) -> dict:
+        """写入单个分片的配置并按需启动或重启。"""
+        manager = self._shard_manager(index)
+        store = manager.config_store
+        result = {
+            'index': index,
+            'instance': manager.instance_id,
+            'proxy_count': len(shard_config['proxies']),
+        }
+
+        current = store.get_frpc_config()
+        changed = current is None or canonical_json(thaw(current)) != canonical_json(shard_config)
+        if changed:
+            success, message = store.save_frpc_config(shard_config, validate=verify)
+            if not success:
+                logger.warning(f'分片配置校验失败: {manager.instance_id}, {message}')
+                return {**result, 'action': 'verify_failed', 'success': False, 'message': message}
+
+        web_config = store.get_web_config()
+        if not isinstance(web_config, dict) or thaw(web_config.get('autoRetry')) != auto_retry:
+            store.save_web_config({'autoRetry': auto_retry})
+            manager.notify_auto_retry_config_changed()
+
+        running = manager.is_running()
+        if not shard_config['proxies']:
+            # 没有代理的分片不占用进程
+            if running:
+                success, message = manager.stop()
+                return {**result, 'action': 'stopped', 'success': success, 'message': message}
+            return {**result, 'action': 'idle', 'success': True, 'message': '分片没有代理，无需运行'}
+        if running and changed:
+            success, message, mode = manager.reload_or_restart()
+            action = 'reloaded' if mode == 'reload' else 'restarted'
+            return {**result, 'action': action, 'success': success, 'message': message}
+        if not running and not start_stopped:
+            return {**result, 'action': 'saved', 'success': True, 'message': '分片未运行，配置将在下次启动时生效'}
+        if not running:
+            success, message = manager.start()
+            return {**result, 'action': 'started', 'success': success, 'message': message}
+        return {**result, 'action': 'unchanged', 'success': True, 'message': '代理未变化，保持运行'}
+
+    def _remove_shard(self, index: int):
+        """停止并删除多余的分片。"""
+        manager = self._shard_manager(index)
+        if manager.is_running():
+            manager.stop()
+        self._registry.remove(manager.instance_id)
+        shutil.rmtree(os.path.join(self.shards_dir, str(index)), ignore_errors=True)
+        logger.info(f'已移除多余的代理分片: {manager.instance_id}')
+
+    def start(self) -> list[dict]:
+        """并行启动磁盘上已有且带有代理的分片，用于面板启动或网络恢复。"""
+        def start_shard(index):
+            manager = self._shard_manager(index)
+            config = manager.config_store.get_frpc_config() or {}
+            if not config.get('proxies') or manager.is_running():
+                return {'index': index, 'instance': manager.instance_id, 'action': 'skipped', 'success': True}
+            success, message = manager.start()
+            return {'index': index, 'instance': manager.instance_id, 'action': 'started',
+                    'success': success, 'message': message}
+
+        with self._lock:
+            self._stopped = False
+            return self._run_parallel(start_shard, self.existing_indexes())
+
+    def recover(self) -> list[dict]:
+        """网络恢复后重新启动应当运行的分片，手动停止的分片保持停止。"""
+        if self._stopped:
+            return []
+        return self.start()
+
+    def stop(self) -> list[dict]:
+        """并行停止全部分片。"""
+        def stop_shard(index):
+            manager = self._shard_manager(index)
+            if not manager.is_running():
+                return {'index': index, 'instance': manager.instance_id, 'action': 'skipped', 'success': True}
+            success, message = manager.stop()
+            return {'index': index, 'instance': manager.instance_id, 'action': 'stopped',
+                    'success': success, 'message': message}
+
+        with self._lock:
+            self._stopped = True
+            return self._run_parallel(stop_shard, self.existing_indexes())
+
+    def disable(self) -> list[int]:
+        """关闭分片后停止全部分片进程，从注册表注销并删除分片配置。"""
+        with self._lock:
+            removed = self.existing_indexes()
+            for index in removed:
+                self._remove_shard(index)
+        if removed:
+            logger.info(f'代理分片已关闭: {self.base_manager.instance_id}, 移除 {len(removed)} 个分片')
+        return removed
+
+    def status(self) -> dict:
+        """汇总各分片状态与代理归属，全部分片共用一次进程表遍历。"""
+        managers = {index: self._shard_manager(index) for index in self.existing_indexes()}
+        statuses = self._registry.collect_status(list(managers.values()))
+        shards = []
+        proxies = {}
+        for index, manager in managers.items():
+            status = statuses.get(manager.instance_id) or {}
+            config = manager.config_store.get_frpc_config() or {}
+            names = [proxy.get('name') for proxy in config.get('proxies') or [] if isinstance(proxy, dict)]
+            shards.append({
+                'index': index,
+                'instance': manager.instance_id,
+                'status': status.get('status'),
+                'pid': status.get('pid'),
+                'error_message': status.get('error_message', ''),
+                'proxy_count': len(names),
+            })
+            runtime = {
+                item['name']: item for item in (status.get('proxies') or {}).get('items', [])
+            }
+            for name in names:
+                proxies[name] = {
+                    'shard': index,
+                    'status': status.get('status'),
+                    'proxy_status': runtime.get(name, {}).get('status', ''),
+                    'proxy_error': runtime.get(name, {}).get('error', ''),
+                }
+        return {
+            'enabled': is_sharding_enabled(self.base_manager),
+            'shard_count': len(shards),
+            'running_shards': sum(1 for shard in shards if shard['status'] == 'running'),
+            'proxy_count': len(proxies),
+            'shards': shards,
+            'proxies': proxies,
+        }
+
+    def running_shards(self) -> list[int]:
+        """返回正在运行的分片序号。"""
+        return [index for index in self.existing_indexes() if self._shard_manager(index).is_running()]
+
+
+_supervisors = {}
+_supervisors_lock = threading.Lock()
+
+
+def get_shard_supervisor(base_manager) -> ShardSupervisor:
+    """按实例返回共享的分片监管器。"""
+    with _supervisors_lock:
+        supervisor = _supervisors.get(base_manager.config_path)
+        if supervisor is None:
+            supervisor = ShardSupervisor(base_manager, frpc_registry)
+            _supervisors[base_manager.config_path] = supervisor
+        return supervisor
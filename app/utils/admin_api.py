@@ -0,0 +1,220 @@
+"""frpc 管理接口客户端与代理状态轮询。"""
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.utils.event_scheduler import EventScheduler
+
+logger = logging.getLogger(__name__)
+
+
+def endpoint_from_config(config):
+    """从 webServer 配置推导管理接口地址与认证信息，未配置端口时返回 None。"""
+    web_server = config.get('webServer') if isinstance(config, dict) else None
+    if not isinstance(web_server, dict) or not web_server.get('port'):
+        return None
+    addr = str(web_server.get('addr') or '127.0.0.1').strip()
+    if addr in ('', '0.0.0.0', '::'):
+        addr = '127.0.0.1'
+    if ':' in addr:
+        addr = f'[{addr}]'
+    user = web_server.get('user') or ''
+    auth = (user, web_server.get('password') or '') if user else None
+    return f"http://{addr}:{web_server['port']}", auth
+
+
+def normalize_proxy_status(payload) -> list[dict]:
+    """把 /api/status 按代理类型分组的响应展开为按名称排序的列表。"""
+    proxies = []
+    if not isinstance(payload, dict):
+        return proxies
+    for proxy_type, items in payload.items():
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            proxies.append({
+                'name': item.get('name', ''),
+                'type': item.get('type') or proxy_type,
+                'status': item.get('status', ''),
+                'error': item.get('err', ''),
+                'local_addr': item.get('local_addr', ''),
+                'remote_addr': item.get('remote_addr', ''),
+            })
+    proxies.sort(key=lambda item: item['name'])
+    return proxies
+
+
+class FrpcAdminClient:
+    """frpc 管理接口客户端：复用一个 keep-alive Session，地址或认证变化时才重建连接池。"""
+
+    TIMEOUT = 5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self._session_key = None
+
+    def _session_for(self, base_url: str, auth):
+        with self._lock:
+            key = (base_url, auth)
+            if self._session is None or self._session_key != key:
+                if self._session is not None:
+                    self._session.close()
+                session = requests.Session()
+                session.auth = auth
+                session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+                self._session = session
+                self._session_key = key
+            return self._session
+
+    def request(self, endpoint, path: str, **kwargs) -> requests.Response:
+        """向管理接口发送 GET 请求。"""
+        base_url, auth = endpoint
+        kwargs.setdefault('timeout', self.TIMEOUT)
+        return self._session_for(base_url, auth).get(f'{base_url}{path}', **kwargs)
+
+    def get_status(self, endpoint) -> list[dict]:
+        """读取 /api/status 并返回各代理状态。"""
+        response = self.request(endpoint, '/api/status')
+        response.raise_for_status()
+        return normalize_proxy_status(response.json())
+
+    def reload(self, endpoint) -> requests.Response:
+        """调用 /api/reload 热加载配置。"""
+        return self.request(endpoint, '/api/reload', params={'strictConfig': 'true'})
+
+    def close(self):
+        """关闭连接池。"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._session_key = None
+
+
+class ProxyStatusPoller:
+    """后台轮询 /api/status 并缓存各代理状态。
+
+    状态有变化或收到启动、热加载等事件时按最短间隔轮询，连续未变化或请求失败时间隔逐次翻倍直到上限；
+    frpc 未运行或未配置管理接口时不轮询，读取状态只返回缓存，不会产生额外请求。
+    """
+
+    POLL_TIMER = 'poll'
+    DEFAULT_MIN_INTERVAL = 2.0
+    DEFAULT_MAX_INTERVAL = 30.0
+
+    def __init__(self, client: FrpcAdminClient, endpoint_provider, is_running,
+                 min_interval: float = DEFAULT_MIN_INTERVAL, max_interval: float = DEFAULT_MAX_INTERVAL,
+                 on_update=None):
+        self._client = client
+        self._on_update = on_update
+        self._endpoint_provider = endpoint_provider
+        self._is_running = is_running
+        self.min_interval = max(0.5, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self._interval = self.min_interval
+        self._lock = threading.Lock()
+        self._snapshot = self._build_snapshot('idle', [], '')
+        self._scheduler = EventScheduler(self._handle_events, name='frpc-proxy-status')
+
+    @classmethod
+    def from_env(cls, client: FrpcAdminClient, endpoint_provider, is_running, on_update=None):
+        """根据环境变量构建轮询间隔。"""
+        def read_number(name: str, default: float) -> float:
+            try:
+                return float(os.getenv(name, default))
+            except (TypeError, ValueError):
+                return default
+
+        return cls(
+            client,
+            endpoint_provider,
+            is_running,
+            min_interval=read_number('FRPC_STATUS_POLL_MIN_SECONDS', cls.DEFAULT_MIN_INTERVAL),
+            max_interval=read_number('FRPC_STATUS_POLL_MAX_SECONDS', cls.DEFAULT_MAX_INTERVAL),
+            on_update=on_update,
+        )
+
+    @staticmethod
+    def _build_snapshot(state: str, proxies: list[dict], error: str, updated_at: float = 0.0,
+                        interval: float = 0.0) -> dict:
+        counts = {}
+        for proxy in proxies:
+            counts[proxy['status']] = counts.get(proxy['status'], 0) + 1
+        return {
+            'state': state,
+            'error': error,
+            'updated_at': updated_at,
+            'poll_interval': interval,
+            'counts': counts,
+            'items': proxies,
+        }
+
+    def start(self):
+        """启动轮询线程并立即检查一次。"""
+        self._scheduler.start()
+        self._scheduler.notify('startup')
+
+    def stop(self):
+        """停止轮询线程。"""
+        self._scheduler.stop()
+
+    def is_alive(self) -> bool:
+        """轮询线程是否存活。"""
+        return self._scheduler.is_alive()
+
+    def wake(self, reason: str):
+        """进程启停或配置变化后立即重新轮询，并把间隔恢复到最短。"""
+        self._scheduler.notify(reason)
+
+    def snapshot(self) -> dict:
+        """返回最近一次缓存的代理状态。"""
+        with self._lock:
+            return self._snapshot
+
+    def _handle_events(self, reasons):
+        if reasons != [self.POLL_TIMER]:
+            self._interval = self.min_interval
+
+        if not self._is_running():
+            self._scheduler.cancel(self.POLL_TIMER)
+            with self._lock:
+                self._snapshot = self._build_snapshot('stopped', [], '', time.time())
+            return
+        endpoint = self._endpoint_provider()
+        if endpoint is None:
+            self._scheduler.cancel(self.POLL_TIMER)
+            with self._lock:
+                self._snapshot = self._build_snapshot(
+                    'unavailable', [], '未配置 webServer 管理接口，无法读取代理状态', time.time()
+                )
+            return
+
+        with self._lock:
+            previous = self._snapshot
+        try:
+            proxies = self._client.get_status(endpoint)
+            if previous['state'] == 'ok' and proxies == previous['items'] and reasons == [self.POLL_TIMER]:
+                self._interval = min(self._interval * 2, self.max_interval)
+            else:
+                self._interval = self.min_interval
+            snapshot = self._build_snapshot('ok', proxies, '', time.time(), self._interval)
+        except (requests.RequestException, ValueError) as e:
+            if previous['state'] != 'error':
+                logger.warning(f'读取 frpc 代理状态失败: {str(e)}')
+            self._interval = min(max(self._interval * 2, self.min_interval), self.max_interval)
+            snapshot = self._build_snapshot(
+                'error', previous['items'], f'读取代理状态失败：{str(e)}', previous['updated_at'], self._interval
+            )
+        with self._lock:
+            self._snapshot = snapshot
+        if self._on_update is not None and snapshot['state'] == 'ok':
+            # 轮询结果交给调用方记录历史（如指标存储），previous 为上一次的快照
+            self._on_update(previous, snapshot)
+        self._scheduler.schedule(self.POLL_TIMER, time.time() + self._interval)
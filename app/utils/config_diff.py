@@ -0,0 +1,160 @@
+"""frpc 配置差异比较。"""
+from app.utils.proxy_sharding import shard_index, shard_key
+
+ACTION_NONE = 'none'
+ACTION_RELOAD = 'reload'
+ACTION_SHARD_RESTART = 'shard_restart'
+ACTION_RESTART = 'restart'
+
+# 按 name 逐条比较的列表字段；frpc 热加载只会重新应用这两类配置
+NAMED_SECTIONS = ('proxies', 'visitors')
+
+
+def _index_by_name(items):
+    """按 name 建立索引，重复的名称以最后一条为准并单独列出。"""
+    indexed = {}
+    duplicates = []
+    for item in items or ():
+        if not isinstance(item, dict):
+            continue
+        name = item.get('name')
+        if name in indexed:
+            duplicates.append(name)
+        indexed[name] = item
+    return indexed, duplicates
+
+
+def diff_named_list(old_items, new_items) -> dict:
+    """按 name 比较两个列表，返回新增、删除、修改的名称与未变化条目数，耗时与条目数成线性关系。"""
+    old_index, _ = _index_by_name(old_items)
+    new_index, duplicates = _index_by_name(new_items)
+    added = [name for name in new_index if name not in old_index]
+    removed = [name for name in old_index if name not in new_index]
+    modified = [
+        name for name, item in new_index.items()
+        if name in old_index and old_index[name] != item
+    ]
+    return {
+        'added': added,
+        'removed': removed,
+        'modified': modified,
+        'unchanged': len(new_index) - len(added) - len(modified),
+        'duplicates': duplicates,
+    }
+
+
+def _section_changed(section: dict) -> bool:
+    return bool(section['added'] or section['removed'] or section['modified'])
+
+
+def _affected_shards(old_index: dict, new_index: dict, proxies_diff: dict, sharding: dict) -> list[int]:
+    """返回代理变化涉及的分片序号：删除按旧分组、新增按新分组、修改两者都算（分组字段可能变化）。"""
+    shard_count = sharding['shardCount']
+    group_key = sharding.get('groupKey', '')
+    affected = set()
+    for name in proxies_diff['removed'] + proxies_diff['modified']:
+        affected.add(shard_index(shard_key(old_index[name], group_key), shard_count))
+    for name in proxies_diff['added'] + proxies_diff['modified']:
+        affected.add(shard_index(shard_key(new_index[name], group_key), shard_count))
+    return sorted(affected)
+
+
+def _choose_action(changed_globals, sections: dict, sharding) -> str:
+    if changed_globals:
+        return ACTION_RESTART
+    if not any(_section_changed(section) for section in sections.values()):
+        return ACTION_NONE
+    if sharding and sharding.get('enabled') and not _section_changed(sections['visitors']):
+        return ACTION_SHARD_RESTART
+    return ACTION_RELOAD
+
+
+def diff_configs(old_config, new_config, ignore_fields=(), sharding=None) -> dict:
+    """比较新旧配置并给出处理方式。
+
+    代理与访问者按 name 比较，其余字段作为全局配置整体比较；ignore_fields 中的字段不参与比较。
+    处理方式：没有变化为 none；只有代理或访问者变化时为 reload，启用分片时为 shard_restart 并列出受影响的分片；
+    全局配置变化时为 restart。
+    """
+    old_config = old_config if isinstance(old_config, dict) else {}
+    new_config = new_config if isinstance(new_config, dict) else {}
+    sections = {
+        name: diff_named_list(old_config.get(name), new_config.get(name))
+        for name in NAMED_SECTIONS
+    }
+    skipped = set(NAMED_SECTIONS) | set(ignore_fields)
+    changed_globals = sorted(
+        key for key in set(old_config) | set(new_config)
+        if key not in skipped and old_config.get(key) != new_config.get(key)
+    )
+
+    action = _choose_action(changed_globals, sections, sharding)
+    affected_shards = []
+    if action == ACTION_SHARD_RESTART:
+        affected_shards = _affected_shards(
+            _index_by_name(old_config.get('proxies'))[0],
+            _index_by_name(new_config.get('proxies'))[0],
+            sections['proxies'],
+            sharding
+        )
+
+    return {
+        'changed': action != ACTION_NONE,
+        'action': action,
+        'globals': changed_globals,
+        'affected_shards': affected_shards,
+        **sections,
+    }
+
+
+def diff_proxy_change(old_proxy, new_proxy, proxy_count: int, visitor_count: int = 0, sharding=None) -> dict:
+    """只比较单个代理的变化，结果与对整份配置调用 diff_configs 相同，耗时与代理总数无关。
+
+    old_proxy 与 new_proxy 为 frpc.json 中的代理，不存在（或未启用）时为 None；proxy_count 与 visitor_count
+    为变化后 frpc.json 中的代理数与访问者数。
+    仅适用于全局配置不变、且变化前后 frpc.json 都存在的情况。
+    """
+    old_index = {} if old_proxy is None else {old_proxy.get('name'): old_proxy}
+    new_index = {} if new_proxy is None else {new_proxy.get('name'): new_proxy}
+    added = [name for name in new_index if name not in old_index]
+    modified = [name for name, item in new_index.items() if name in old_index and old_index[name] != item]
+    proxies = {
+        'added': added,
+        'removed': [name for name in old_index if name not in new_index],
+        'modified': modified,
+        'unchanged': proxy_count - len(added) - len(modified),
+        'duplicates': [],
+    }
+    sections = {
+        'proxies': proxies,
+        'visitors': {'added': [], 'removed': [], 'modified': [], 'unchanged': visitor_count, 'duplicates': []},
+    }
+    action = _choose_action([], sections, sharding)
+    affected_shards = []
+    if action == ACTION_SHARD_RESTART:
+        affected_shards = _affected_shards(old_index, new_index, proxies, sharding)
+    return {
+        'changed': action != ACTION_NONE,
+        'action': action,
+        'globals': [],
+        'affected_shards': affected_shards,
+        **sections,
+    }
+
+
+def summarize_diff(diff: dict) -> str:
+    """生成一行差异摘要，用于日志记录。"""
+    proxies = diff['proxies']
+    parts = [
+        f"代理 新增 {len(proxies['added'])} / 删除 {len(proxies['removed'])} / 修改 {len(proxies['modified'])}"
+    ]
+    visitors = diff['visitors']
+    if _section_changed(visitors):
+        parts.append(
+            f"访问者 新增 {len(visitors['added'])} / 删除 {len(visitors['removed'])} / 修改 {len(visitors['modified'])}"
+        )
+    if diff['globals']:
+        parts.append(f"全局字段 {', '.join(diff['globals'])}")
+    if diff['affected_shards']:
+        parts.append(f"分片 {', '.join(str(index) for index in diff['affected_shards'])}")
+    return f"{'，'.join(parts)}，处理方式 {diff['action']}"
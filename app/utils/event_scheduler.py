@@ -0,0 +1,99 @@
+"""事件驱动的单线程调度器。"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class EventScheduler:
+    """事件与到期定时器共用一个处理线程：没有事件且没有定时器时无限期休眠，不做任何轮询。"""
+
+    def __init__(self, handler, name: str = 'event-scheduler'):
+        self._handler = handler
+        self._name = name
+        self._cond = threading.Condition()
+        self._timers = []
+        self._timer_seq = {}
+        self._counter = itertools.count()
+        self._pending = []
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        """启动处理线程。"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 1):
+        """停止处理线程。"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+    def is_alive(self) -> bool:
+        """处理线程是否存活。"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def notify(self, reason: str):
+        """投递一个事件，处理线程尚未处理的同名事件会被合并。"""
+        with self._cond:
+            if reason not in self._pending:
+                self._pending.append(reason)
+            self._cond.notify()
+
+    def schedule(self, key: str, when: float):
+        """在 when（Unix 时间戳）到期时以 key 作为事件唤醒处理线程，同一 key 只保留最新一次。"""
+        with self._cond:
+            seq = next(self._counter)
+            self._timer_seq[key] = seq
+            heapq.heappush(self._timers, (when, seq, key))
+            self._cond.notify()
+
+    def cancel(self, key: str):
+        """取消尚未到期的定时器。"""
+        with self._cond:
+            # 堆中的旧条目延迟到出堆时丢弃
+            self._timer_seq.pop(key, None)
+
+    def _pop_due_locked(self, now: float) -> list[str]:
+        """弹出已到期的定时器，顺带丢弃已取消或被覆盖的条目。"""
+        due = []
+        while self._timers:
+            when, seq, key = self._timers[0]
+            if self._timer_seq.get(key) != seq:
+                heapq.heappop(self._timers)
+                continue
+            if when > now:
+                break
+            heapq.heappop(self._timers)
+            del self._timer_seq[key]
+            due.append(key)
+        return due
+
+    def _run(self):
+        """处理线程主循环：等待到最近的定时器或下一个事件。"""
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    due = self._pop_due_locked(time.time())
+                    if due or self._pending:
+                        break
+                    timeout = max(self._timers[0][0] - time.time(), 0) if self._timers else None
+                    self._cond.wait(timeout)
+                reasons = self._pending + [key for key in due if key not in self._pending]
+                self._pending = []
+            try:
+                self._handler(reasons)
+            except Exception as e:
+                logger.error(f'{self._name} 处理事件失败: {str(e)}')
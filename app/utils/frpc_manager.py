@@ -4,49 +4,50 @@ import signal
 import psutil
 import logging
 import requests
-import json
 from pathlib import Path
 import threading
 import time
-import queue
 import re
-from app.runtime_settings import load_runtime_settings, resolve_runtime_path
-from app.utils.input_validator import InputValidator
+from app.runtime_settings import DEFAULT_INSTANCE_ID, load_runtime_settings, resolve_runtime_path
+from app.services.config_store import get_config_store
+from app.services.panel_metrics import auto_retry_attempts_total, log_lines_total
+from app.services.proxy_metrics import record_proxy_snapshot
+from app.utils.admin_api import FrpcAdminClient, ProxyStatusPoller, endpoint_from_config
+from app.utils.log_buffer import LogRingBuffer
+from app.utils.log_classifier import CONNECTION_FAILURE, STARTUP_FAILURE, default_classifier
+from app.utils.log_capture import LogWriter, PipeCapture
+from app.utils.log_follower import LogFollower
+from app.utils.log_index import LogIndex
+from app.utils.log_segments import LogSegmentStore
+from app.utils.event_scheduler import EventScheduler
+from app.utils.process_tracker import ExitWatcher, ProcessTracker
+from app.utils.resource_sampler import ResourceSampler
+from app.utils.proxy_sharding import canonical_json
+from app.utils.verify_cache import VerifyResultCache
+from app.utils.version_cache import VersionCacheFile, sha256_file, stat_fingerprint
 
 logger = logging.getLogger(__name__)
 
 class FrpcManager:
     VERSION_CACHE_TTL = 60
     VERSION_PATTERN = re.compile(r'v?\d+\.\d+\.\d+(?:[-+._][0-9A-Za-z]+)*')
-    AUTO_RETRY_POLL_INTERVAL = 5
-    CONNECTION_ERROR_PATTERNS = (
-        r'connection refused',
-        r'connection reset',
-        r'connection timeout',
-        r'failed to connect to server',
-        r'failed to login to server',
-        r'no route to host',
-        r'i/o timeout',
-        r'network is unreachable',
-    )
-    STARTUP_ERROR_PATTERNS = (
-        r'服务启动后立即退出',
-        r'启动失败',
-        r'failed to start proxy',
-        r'bind: cannot assign requested address',
-        r'permission denied',
-        r'address already in use',
-        r'no such file or directory',
-        r'未找到 frpc 可执行文件',
-        r'未找到 frpc 配置文件',
-    )
-
-    def __init__(self, enable_auto_retry_watchdog: bool = False):
-        runtime_settings = load_runtime_settings()
+    ANSI_ESCAPE_PATTERN = re.compile(r'\x1B\[[0-9;]*[A-Za-z]')
+    AUTO_RETRY_TIMER = 'auto_retry_due'
+    # 自动重试只参考最近若干行日志中的失败分类
+    RECENT_FAILURE_LINES = 20
+    # frpc 热加载只会重新应用代理与访问者，其余字段变化必须完整重启
+    RELOADABLE_FIELDS = ('proxies', 'visitors')
+
+    def __init__(self, enable_auto_retry_watchdog: bool = False, runtime_settings=None,
+                 instance_id: str = DEFAULT_INSTANCE_ID):
+        runtime_settings = runtime_settings or load_runtime_settings()
+        self.runtime_settings = runtime_settings
+        self.instance_id = instance_id
         self.frpc_work_dir = runtime_settings.frpc_work_dir
         self.frpc_path = runtime_settings.frpc_binary_path
         self.config_path = runtime_settings.frpc_config_path
         self.web_config_path = runtime_settings.web_config_path
+        self.config_store = get_config_store(runtime_settings)
         # 将 frpc 日志输出目录与应用日志目录保持一致，并兼容容器路径映射
         configured_log_dir = os.getenv('FRPC_LOG_DIR')
         if configured_log_dir:
@@ -58,48 +59,121 @@ class FrpcManager:
             )
         else:
             self.log_dir = runtime_settings.logs_dir
-        self.log_path = os.path.join(self.log_dir, 'frpc.log')
+        self.log_path = os.path.join(self.log_dir, runtime_settings.frpc_log_name)
         self.process = None
         self.attached_pid = None
+        self._active_capture_mode = None
+        self.process_tracker = ProcessTracker(
+            self.config_path,
+            os.path.join(self.frpc_work_dir, 'frpc.pid'),
+            # 扫描接管的进程同样需要等待退出，以便唤醒自动重试并清除缓存的 PID
+            on_adopt=lambda pid: self.exit_watcher.watch(pid)
+        )
+        os.makedirs(self.frpc_work_dir, exist_ok=True)
         self._ensure_log_dir()
-        self.log_queue = queue.Queue()
-        self.log_thread = None
-        self.stop_log_thread = False
+        self.log_buffer = LogRingBuffer(self._get_log_buffer_capacity())
+        self.log_segments = LogSegmentStore.from_env(self.log_path)
+        self.log_classifier = default_classifier
+        self.log_index = LogIndex(classify=self.log_classifier.classify, clean=self._clean_log_line)
+        # 面板启动前已写入的内容未进入索引，活动日志在下一次截断或轮转前不参与跳过判断
+        self.log_index.reset(complete=not self._has_existing_log())
+        self.log_segments.index_provider = self.log_index.take_active_snapshot
+        self.log_follower = LogFollower(
+            self.log_path,
+            on_line=self._ingest_log_line,
+            on_seed=self._seed_log_buffer,
+            on_reset=self._on_log_reset,
+            on_error=self._on_log_follower_error,
+            rotate_check=self._rotate_followed_log,
+            use_inotify=os.getenv('FRPC_LOG_FOLLOW_MODE', 'auto').lower() != 'poll'
+        )
+        self.log_capture_mode = self._get_log_capture_mode()
+        # pipe 模式下面板是唯一写入方，由写入器负责重命名轮转
+        self.log_writer = LogWriter(
+            self.log_path,
+            rotate_check=self._rotate_written_log if self.log_capture_mode == 'pipe' else None
+        )
+        self.pipe_capture = PipeCapture(
+            os.path.join(self.frpc_work_dir, 'frpc.stdout.fifo'),
+            self.log_path,
+            on_lines=self._on_captured_lines,
+            # 取得管道后再读取日志尾部，包含守护进程在面板停止期间写入的内容
+            on_attach=lambda: self._seed_log_buffer(None)
+        )
         self.error_state = False
         self.error_message = ""
+        # 读取日志时记录的各失败类型最近一次出现的行号，供自动重试判断原因
+        self._ingested_lines = 0
+        self._recent_failures = {}
         self._operation_lock = threading.RLock()
+        # 当前 frpc 进程启动（或最近一次热加载）时代理以外配置的指纹，用于判断能否热加载
+        self._running_global_fingerprint = None
         self._auto_retry_lock = threading.Lock()
-        self._auto_retry_thread = None
-        self._stop_auto_retry_thread = False
+        # 自动重试由进程退出、错误日志与配置变更等事件驱动，仅在 nextRetryAt 到期时定时唤醒
+        self._auto_retry_scheduler = EventScheduler(self._handle_auto_retry_events, name='frpc-auto-retry')
+        self.exit_watcher = ExitWatcher(self._on_process_exit)
         self._auto_retry_runtime = self._build_default_auto_retry_runtime()
         self._version_cache_lock = threading.Lock()
+        # 正在后台刷新的版本键，保证同一时刻每类版本只有一个探测任务
+        self._version_refreshing = set()
         self._version_cache = {
-            'frpc': {
-                'value': '待检测',
-                'hint': '等待版本检测',
-                'checked_at': 0.0,
-                'fingerprint': None,
-            },
-            'frps': {
-                'value': '待检测',
-                'hint': '等待版本检测',
-                'checked_at': 0.0,
-                'fingerprint': None,
-            }
+            'frpc': self._build_default_version_entry(),
+            'frps': self._build_default_version_entry(),
         }
-        self._start_log_thread()  # 在初始化时就启动日志线程
+        self.version_cache_file = VersionCacheFile(os.path.join(self.frpc_work_dir, 'frpc.version.json'))
+        self._load_persisted_versions()
+        self.verify_cache = VerifyResultCache(os.path.join(self.frpc_work_dir, 'frpc.verify.json'))
+        # 管理接口共用一个 keep-alive 连接池，代理状态由后台轮询缓存，读取状态时不发请求
+        self.admin_client = FrpcAdminClient()
+        self.proxy_status_poller = ProxyStatusPoller.from_env(
+            self.admin_client,
+            self._current_admin_endpoint,
+            self.is_running,
+            on_update=lambda previous, snapshot: record_proxy_snapshot(self.instance_id, previous, snapshot)
+        )
+        self.resource_sampler = ResourceSampler.from_env(lambda: self.process_tracker.find(allow_scan=False))
         self._recover_process()  # 尝试恢复进程信息
+        self._start_log_thread()  # 按附着进程的输出方式启动日志读取
+        self.proxy_status_poller.start()
+        self.resource_sampler.start()
         if enable_auto_retry_watchdog:
-            self._start_auto_retry_watchdog()
+            self.start_auto_retry_watchdog()
+
+    @staticmethod
+    def _get_log_buffer_capacity() -> int:
+        """读取日志缓冲区容量配置。"""
+        try:
+            return max(int(os.getenv('FRPC_LOG_BUFFER_LINES', LogRingBuffer.DEFAULT_CAPACITY)), 1)
+        except ValueError:
+            return LogRingBuffer.DEFAULT_CAPACITY
+
+    @staticmethod
+    def _get_log_capture_mode() -> str:
+        """读取 frpc 输出捕获方式：file 直接写日志文件，pipe 经管道由面板统一写入。"""
+        mode = (os.getenv('FRPC_LOG_CAPTURE') or 'file').strip().lower()
+        if mode == 'pipe' and not PipeCapture.is_supported():
+            logger.warning('当前平台不支持命名管道，frpc 输出捕获回退为 file 模式')
+            return 'file'
+        return 'pipe' if mode == 'pipe' else 'file'
 
     def _append_log(self, message: str):
         """安全地追加一行日志，避免错误处理再次抛出异常。"""
         try:
-            with open(self.log_path, 'a', encoding='utf-8') as log_file:
-                log_file.write(message)
+            if not self.log_follower.is_alive():
+                # 管道模式下没有文件跟随线程，面板写入的日志直接进入缓冲区；
+                # 先登记再写盘，保证写入触发轮转时这些行已计入被归档分段的索引
+                for line in message.splitlines():
+                    self._ingest_log_line(line)
+            self.log_writer.write(message)
         except Exception as e:
             logger.warning(f"写入 frpc 日志失败: {str(e)}")
 
+    def _on_captured_lines(self, lines):
+        """管道模式下处理 frpc 输出：解析一次、写盘一次。"""
+        for line in lines:
+            self._ingest_log_line(line)
+        self.log_writer.write_lines(lines)
+
     @classmethod
     def _normalize_version(cls, value: str) -> str:
         """统一格式化版本号展示。"""
@@ -120,14 +194,49 @@ class FrpcManager:
             return cls._normalize_version(match.group(0))
         return ''
 
+    @staticmethod
+    def _build_default_version_entry():
+        return {
+            'value': '待检测',
+            'hint': '等待版本检测',
+            'checked_at': 0.0,
+            'fingerprint': None,
+            'stable': False,
+        }
+
+    def _load_persisted_versions(self):
+        """从磁盘缓存恢复版本信息：frpc 仅在可执行文件指纹未变时采用，frps 仅在探测地址未变时采用。"""
+        persisted = self.version_cache_file.load()
+        restored = {}
+        frpc_entry = persisted.get('frpc')
+        if isinstance(frpc_entry, dict) and frpc_entry.get('fingerprint') == stat_fingerprint(self.frpc_path):
+            restored['frpc'] = frpc_entry
+        frps_entry = persisted.get('frps')
+        version_url = (os.getenv('FRPS_VERSION_URL') or '').strip()
+        if isinstance(frps_entry, dict) and version_url and frps_entry.get('fingerprint') == version_url:
+            restored['frps'] = frps_entry
+        with self._version_cache_lock:
+            for key, entry in restored.items():
+                cache = self._build_default_version_entry()
+                cache.update(entry)
+                self._version_cache[key] = cache
+        if restored:
+            logger.info(f"已从磁盘缓存恢复版本信息: {', '.join(sorted(restored))}")
+
+    def _persist_versions(self):
+        """把当前版本缓存写入磁盘。"""
+        with self._version_cache_lock:
+            entries = {key: dict(cache) for key, cache in self._version_cache.items()}
+        self.version_cache_file.save(entries)
+
     def _get_cached_version(self, key: str, fingerprint: str | None, force_refresh: bool = False):
-        """读取版本缓存，避免频繁执行命令或探测远端。"""
+        """读取版本缓存，避免频繁执行命令或探测远端；stable 条目在指纹不变时长期有效。"""
         with self._version_cache_lock:
             cache = self._version_cache[key]
             if (
                 not force_refresh
                 and cache['fingerprint'] == fingerprint
-                and (time.time() - cache['checked_at']) < self.VERSION_CACHE_TTL
+                and (cache['stable'] or (time.time() - cache['checked_at']) < self.VERSION_CACHE_TTL)
             ):
                 return {
                     'value': cache['value'],
@@ -135,22 +244,82 @@ class FrpcManager:
                 }
         return None
 
-    def _set_cached_version(self, key: str, fingerprint: str | None, value: str, hint: str):
-        """更新版本缓存。"""
+    def _peek_cached_version(self, key: str):
+        """无论是否过期都返回当前缓存值。"""
         with self._version_cache_lock:
-            self._version_cache[key] = {
-                'value': value,
-                'hint': hint,
-                'checked_at': time.time(),
-                'fingerprint': fingerprint,
+            cache = self._version_cache[key]
+            return {
+                'value': cache['value'],
+                'hint': cache['hint']
             }
+
+    def _refresh_version_in_background(self, key: str, probe, *args):
+        """在后台线程中刷新版本缓存，同类版本已有刷新任务时直接复用（single-flight）。"""
+        with self._version_cache_lock:
+            if key in self._version_refreshing:
+                return
+            self._version_refreshing.add(key)
+
+        def runner():
+            try:
+                probe(*args)
+            except Exception as e:
+                logger.warning(f'后台刷新 {key} 版本失败: {str(e)}')
+            finally:
+                with self._version_cache_lock:
+                    self._version_refreshing.discard(key)
+
+        threading.Thread(target=runner, name='frpc-version-refresh', daemon=True).start()
+
+    def _set_cached_version(self, key: str, fingerprint: str | None, value: str, hint: str,
+                            stable: bool = False, **extra):
+        """更新版本缓存，结果有变化时同步到磁盘。"""
+        entry = {
+            'value': value,
+            'hint': hint,
+            'checked_at': time.time(),
+            'fingerprint': fingerprint,
+            'stable': stable,
+            **extra,
+        }
+        with self._version_cache_lock:
+            previous = dict(self._version_cache[key])
+            self._version_cache[key] = entry
+        previous.pop('checked_at', None)
+        if previous != {name: item for name, item in entry.items() if name != 'checked_at'}:
+            self._persist_versions()
         return {
             'value': value,
             'hint': hint
         }
 
+    def invalidate_binary_cache(self):
+        """可执行文件被替换后丢弃 frpc 版本、摘要与 verify 结果缓存，并在后台重新检测。"""
+        with self._version_cache_lock:
+            self._version_cache['frpc'] = self._build_default_version_entry()
+        self._persist_versions()
+        self.verify_cache.clear()
+        logger.info('frpc 可执行文件已更新，版本缓存已失效')
+        self.get_local_version_info()
+
+    def get_binary_fingerprint(self):
+        """返回当前可执行文件的指纹、SHA-256 与大小；缓存未命中时同步计算摘要，文件不存在时返回 None。"""
+        fingerprint = stat_fingerprint(self.frpc_path)
+        if fingerprint is None:
+            return None
+        with self._version_cache_lock:
+            cache = self._version_cache['frpc']
+            if cache['fingerprint'] == fingerprint and cache.get('sha256'):
+                return {'fingerprint': fingerprint, 'sha256': cache['sha256'], 'size': cache['size']}
+        try:
+            sha256 = sha256_file(self.frpc_path)
+        except OSError as e:
+            logger.warning(f'计算 frpc 摘要失败: {str(e)}')
+            return None
+        return {'fingerprint': fingerprint, 'sha256': sha256, 'size': int(fingerprint.rsplit(':', 1)[1])}
+
     def get_local_version_info(self, force_refresh: bool = False):
-        """获取本地 frpc 版本。"""
+        """获取本地 frpc 版本：缓存过期时先返回旧值并在后台刷新，force_refresh 时同步探测。"""
         if not os.path.exists(self.frpc_path):
             return self._set_cached_version(
                 'frpc',
@@ -159,15 +328,27 @@ class FrpcManager:
                 '未找到本地 frpc 可执行文件'
             )
 
-        try:
-            fingerprint = f"{self.frpc_path}:{os.path.getmtime(self.frpc_path)}"
-        except OSError:
-            fingerprint = self.frpc_path
+        fingerprint = stat_fingerprint(self.frpc_path) or self.frpc_path
 
         cached = self._get_cached_version('frpc', fingerprint, force_refresh=force_refresh)
         if cached:
             return cached
+        if force_refresh:
+            return self._probe_local_version(fingerprint)
 
+        self._refresh_version_in_background('frpc', self._probe_local_version, fingerprint)
+        return self._peek_cached_version('frpc')
+
+    def _probe_local_version(self, fingerprint: str):
+        """计算可执行文件摘要、执行本地 frpc 版本命令并写入缓存。"""
+        binary = {}
+        try:
+            binary = {
+                'sha256': sha256_file(self.frpc_path),
+                'size': os.path.getsize(self.frpc_path),
+            }
+        except OSError as e:
+            logger.warning(f'计算 frpc 摘要失败: {str(e)}')
         commands = (
             [self.frpc_path, 'version'],
             [self.frpc_path, '--version'],
@@ -193,14 +374,18 @@ class FrpcManager:
                         'frpc',
                         fingerprint,
                         version,
-                        '来自本地 frpc 可执行文件'
+                        '来自本地 frpc 可执行文件',
+                        stable=True,
+                        **binary
                     )
                 if result.returncode == 0 and output:
                     return self._set_cached_version(
                         'frpc',
                         fingerprint,
                         output.splitlines()[0].strip(),
-                        '来自本地 frpc 可执行文件原始输出'
+                        '来自本地 frpc 可执行文件原始输出',
+                        stable=True,
+                        **binary
                     )
             except Exception as e:
                 last_error = str(e)
@@ -209,7 +394,7 @@ class FrpcManager:
             hint = f'执行版本命令失败：{last_error}'
         else:
             hint = '本地 frpc 未输出可识别的版本号'
-        return self._set_cached_version('frpc', fingerprint, '未知', hint)
+        return self._set_cached_version('frpc', fingerprint, '未知', hint, **binary)
 
     @classmethod
     def _extract_version_from_json(cls, payload):
@@ -235,7 +420,7 @@ class FrpcManager:
         return ''
 
     def get_server_version_info(self, force_refresh: bool = False):
-        """通过可选的版本地址探测远端 frps 版本。"""
+        """通过可选的版本地址探测远端 frps 版本：缓存过期时先返回旧值并在后台刷新。"""
         version_url = (os.getenv('FRPS_VERSION_URL') or '').strip()
         if not version_url:
             return self._set_cached_version(
@@ -248,7 +433,14 @@ class FrpcManager:
         cached = self._get_cached_version('frps', version_url, force_refresh=force_refresh)
         if cached:
             return cached
+        if force_refresh:
+            return self._probe_server_version(version_url)
+
+        self._refresh_version_in_background('frps', self._probe_server_version, version_url)
+        return self._peek_cached_version('frps')
 
+    def _probe_server_version(self, version_url: str):
+        """请求 FRPS_VERSION_URL 并写入缓存。"""
         username = (os.getenv('FRPS_VERSION_USERNAME') or '').strip()
         password = os.getenv('FRPS_VERSION_PASSWORD') or ''
         auth = (username, password) if username else None
@@ -296,7 +488,7 @@ class FrpcManager:
             )
 
     def get_version_summary(self):
-        """汇总本地 frpc 与远端 frps 版本信息。"""
+        """汇总本地 frpc 与远端 frps 版本信息，始终直接返回缓存，不等待命令或网络请求。"""
         local_version = self.get_local_version_info()
         server_version = self.get_server_version_info()
         return {
@@ -321,43 +513,33 @@ class FrpcManager:
         }
 
     def _load_auto_retry_config(self):
-        """从 Web 配置文件读取自动重试设置。"""
-        try:
-            if not os.path.exists(self.web_config_path):
-                return InputValidator.normalize_auto_retry_config({})
-
-            with open(self.web_config_path, 'r', encoding='utf-8') as f:
-                payload = json.load(f)
-
-            return InputValidator.normalize_auto_retry_config(payload.get('autoRetry'))
-        except Exception as e:
-            logger.warning(f'读取自动重试配置失败，已回退为默认值: {str(e)}')
-            return InputValidator.normalize_auto_retry_config({})
-
-    @classmethod
-    def _match_error_patterns(cls, message: str, patterns) -> bool:
-        """匹配错误文本与模式列表。"""
-        candidate = (message or '').strip()
-        if not candidate:
-            return False
-        return any(re.search(pattern, candidate, re.IGNORECASE) for pattern in patterns)
+        """从共享配置缓存读取自动重试设置，config.json 未变化时不访问磁盘。"""
+        return self.config_store.get_auto_retry_config()
 
     def _classify_failure_reason(self, status: dict):
-        """根据状态与最近日志识别失败原因。"""
+        """根据状态与读取日志时记录的失败分类识别失败原因。"""
         error_message = (status.get('error_message') or self.error_message or '').strip()
-        recent_logs = '\n'.join(self.get_logs(20))
-        inspection_text = '\n'.join(filter(None, [error_message, recent_logs]))
-
-        if self._match_error_patterns(inspection_text, self.CONNECTION_ERROR_PATTERNS):
-            return 'connection_failure', error_message or '检测到连接失败'
-
-        if self._match_error_patterns(inspection_text, self.STARTUP_ERROR_PATTERNS):
-            return 'startup_failure', error_message or '检测到启动失败'
+        categories = set()
+        message_classification = self.log_classifier.classify(error_message)
+        if message_classification is not None:
+            categories.add(message_classification.category)
+        # 与旧实现检查最近 20 行一致：窗口内同时出现两类失败时，连接失败优先
+        ingested_lines = self._ingested_lines
+        for category, line_number in list(self._recent_failures.items()):
+            if ingested_lines - line_number < self.RECENT_FAILURE_LINES:
+                categories.add(category)
+
+        if CONNECTION_FAILURE in categories:
+            return CONNECTION_FAILURE, error_message or '检测到连接失败'
+
+        if STARTUP_FAILURE in categories:
+            return STARTUP_FAILURE, error_message or '检测到启动失败'
 
         return None, error_message
 
     def _reset_auto_retry_runtime(self, keep_last_result: bool = False):
         """重置自动重试运行时状态。"""
+        self._auto_retry_scheduler.cancel(self.AUTO_RETRY_TIMER)
         with self._auto_retry_lock:
             last_result = self._auto_retry_runtime.get('lastResult', '') if keep_last_result else ''
             self._auto_retry_runtime = self._build_default_auto_retry_runtime()
@@ -404,6 +586,7 @@ class FrpcManager:
 
     def _mark_auto_retry_attempt_result(self, success: bool, message: str, policy: dict):
         """记录自动重试尝试结果。"""
+        auto_retry_attempts_total.inc(instance=self.instance_id, result='success' if success else 'failure')
         with self._auto_retry_lock:
             self._auto_retry_runtime['retryCount'] += 1
             self._auto_retry_runtime['lastAttemptAt'] = time.time()
@@ -457,63 +640,89 @@ class FrpcManager:
         )
         return snapshot
 
-    def _start_auto_retry_watchdog(self):
-        """启动自动重试监控线程。"""
-        if self._auto_retry_thread is None or not self._auto_retry_thread.is_alive():
-            self._stop_auto_retry_thread = False
-            self._auto_retry_thread = threading.Thread(target=self._auto_retry_watchdog_loop, daemon=True)
-            self._auto_retry_thread.start()
-            logger.info("自动重试监控线程已启动")
-
-    def _auto_retry_watchdog_loop(self):
-        """后台监控 frpc 错误状态并在需要时执行自动重试。"""
-        while not self._stop_auto_retry_thread:
-            try:
-                policy = self._load_auto_retry_config()
-                if not policy['enabled']:
-                    self._reset_auto_retry_runtime()
-                    continue
-
-                status = self.get_status(include_auto_retry=False)
-                failure_reason, error_message = self._classify_failure_reason(status)
-                should_handle_failure = (
-                    status.get('status') != 'running'
-                    and bool(error_message)
-                    and (
-                        (failure_reason == 'startup_failure' and policy['triggerOnStartFailure'])
-                        or (failure_reason == 'connection_failure' and policy['triggerOnConnectionFailure'])
-                    )
-                )
+    def start_auto_retry_watchdog(self):
+        """启动自动重试调度线程，并按当前状态评估一次。"""
+        if not self._auto_retry_scheduler.is_alive():
+            self._auto_retry_scheduler.start()
+            self._auto_retry_scheduler.notify('startup')
+            logger.info("自动重试调度线程已启动")
+
+    def _notify_auto_retry(self, reason: str):
+        """向自动重试调度线程投递事件；未启用监控时忽略。"""
+        if self._auto_retry_scheduler.is_alive():
+            self._auto_retry_scheduler.notify(reason)
+
+    def notify_auto_retry_config_changed(self):
+        """Web 配置保存后重新评估自动重试策略。"""
+        self._notify_auto_retry('config_changed')
+
+    def _on_process_exit(self, pid: int):
+        """frpc 进程退出时唤醒自动重试调度。"""
+        logger.info(f"检测到 frpc 进程退出，PID: {pid}")
+        # 守护进程排空管道后随 frpc 退出
+        self.pipe_capture.reap_keeper(timeout=2)
+        # 立即清除缓存的 PID，只读缓存的调用方（如 /metrics）不会继续报告已退出的进程
+        self.process_tracker.forget(pid)
+        self.process_tracker.request_scan()
+        self._notify_auto_retry('process_exit')
+        self.proxy_status_poller.wake('process_exit')
+        self.resource_sampler.wake('process_exit')
+
+    def _schedule_auto_retry_timer(self):
+        """按运行时状态中的 nextRetryAt 设置唯一的到期定时器。"""
+        with self._auto_retry_lock:
+            runtime = dict(self._auto_retry_runtime)
+        if runtime['waiting'] and not runtime['exhausted'] and runtime['nextRetryAt'] > 0:
+            self._auto_retry_scheduler.schedule(self.AUTO_RETRY_TIMER, runtime['nextRetryAt'])
 
-                if not should_handle_failure:
-                    snapshot = self.get_auto_retry_snapshot()
-                    if status.get('status') == 'running' and not status.get('error_message'):
-                        self._reset_auto_retry_runtime()
-                    elif not status.get('error_message') and snapshot['waiting']:
-                        self._reset_auto_retry_runtime()
-                    continue
+    def _handle_auto_retry_events(self, reasons):
+        """处理一批自动重试事件：识别失败原因，登记等待，或在到期时执行重启。"""
+        policy = self._load_auto_retry_config()
+        if not policy['enabled']:
+            self._reset_auto_retry_runtime()
+            return
+
+        running = self._find_process() is not None
+        status_error = self.error_message if self.error_state else ''
+        failure_reason, error_message = self._classify_failure_reason({'error_message': status_error})
+        should_handle_failure = (
+            not running
+            and bool(error_message)
+            and (
+                (failure_reason == 'startup_failure' and policy['triggerOnStartFailure'])
+                or (failure_reason == 'connection_failure' and policy['triggerOnConnectionFailure'])
+            )
+        )
 
-                snapshot = self.get_auto_retry_snapshot()
-                if snapshot['exhausted']:
-                    continue
+        with self._auto_retry_lock:
+            runtime = dict(self._auto_retry_runtime)
 
-                if not snapshot['waiting']:
-                    self._mark_auto_retry_waiting(failure_reason, error_message, policy)
-                    continue
+        if not should_handle_failure:
+            if running and not status_error:
+                self._reset_auto_retry_runtime()
+            elif not status_error and runtime['waiting']:
+                self._reset_auto_retry_runtime()
+            return
 
-                if snapshot['nextRetryAt'] > time.time():
-                    continue
+        if runtime['exhausted']:
+            return
 
-                logger.warning(
-                    f"检测到 frpc { '连接' if failure_reason == 'connection_failure' else '启动' }失败，"
-                    f"开始执行第 {snapshot['retryCount'] + 1} 次自动重启"
-                )
-                success, message = self.restart(manual=False)
-                self._mark_auto_retry_attempt_result(success, message, policy)
-            except Exception as e:
-                logger.error(f"自动重试监控执行失败: {str(e)}")
-            finally:
-                time.sleep(self.AUTO_RETRY_POLL_INTERVAL)
+        if not runtime['waiting']:
+            self._mark_auto_retry_waiting(failure_reason, error_message, policy)
+            self._schedule_auto_retry_timer()
+            return
+
+        if runtime['nextRetryAt'] > time.time():
+            self._schedule_auto_retry_timer()
+            return
+
+        logger.warning(
+            f"检测到 frpc { '连接' if failure_reason == 'connection_failure' else '启动' }失败，"
+            f"开始执行第 {runtime['retryCount'] + 1} 次自动重启"
+        )
+        success, message = self.restart(manual=False)
+        self._mark_auto_retry_attempt_result(success, message, policy)
+        self._schedule_auto_retry_timer()
 
     def _ensure_log_dir(self):
         """确保日志目录存在"""
@@ -521,94 +730,183 @@ class FrpcManager:
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
 
-    def _start_log_thread(self):
-        """启动日志读取线程"""
-        if self.log_thread is None or not self.log_thread.is_alive():
-            self.stop_log_thread = False
-            self.log_thread = threading.Thread(target=self._read_logs, daemon=True)
-            self.log_thread.start()
+    def _start_log_thread(self, capture_mode: str | None = None):
+        """启动日志读取线程：file 模式跟随日志文件，pipe 模式读取输出管道"""
+        capture_mode = capture_mode or self._active_capture_mode or self.log_capture_mode
+        self._active_capture_mode = capture_mode
+        if capture_mode == 'pipe':
+            if self.log_follower.is_alive():
+                self.log_follower.stop()
+            if not self.pipe_capture.is_alive():
+                self.pipe_capture.start()
+                logger.info("frpc 输出管道读取线程已启动")
+            return
+
+        if not self.log_follower.is_alive():
+            self.log_follower.start()
             logger.info("日志读取线程已启动")
 
     def _stop_log_thread(self):
         """停止日志读取线程"""
-        self.stop_log_thread = True
-        if self.log_thread and self.log_thread.is_alive():
-            self.log_thread.join(timeout=1)
+        if self.log_follower.is_alive():
+            self.log_follower.stop()
             logger.info("日志读取线程已停止")
+        if self.pipe_capture.is_alive():
+            self.pipe_capture.stop()
+            logger.info("frpc 输出管道读取线程已停止")
+
+    def background_threads(self) -> list[dict]:
+        """返回本实例持有的后台线程及其状态。"""
+        threads = [
+            {'name': 'frpc-log-follower', 'alive': self.log_follower.is_alive(), **self.log_follower.stats()},
+            {'name': 'frpc-pipe-capture', 'alive': self.pipe_capture.is_alive()},
+            {'name': 'frpc-auto-retry', 'alive': self._auto_retry_scheduler.is_alive()},
+            {'name': 'frpc-proxy-status', 'alive': self.proxy_status_poller.is_alive()},
+            {'name': 'frpc-resource-sampler', 'alive': self.resource_sampler.is_alive()},
+        ]
+        threads.extend(
+            {'name': f'frpc-exit-watch-{pid}', 'alive': True, 'pid': pid}
+            for pid in self.exit_watcher.watching()
+        )
+        return threads
+
+    def shutdown(self):
+        """停止本实例的后台线程；frpc 进程独立于面板运行，不会被停止。"""
+        self._auto_retry_scheduler.stop()
+        self.proxy_status_poller.stop()
+        self.resource_sampler.stop()
+        self.admin_client.close()
+        self._stop_log_thread()
+        self.log_writer.close()
+
+    def _detect_capture_mode(self, pid: int):
+        """根据已运行进程的 stdout 指向判断其输出方式，无法判断时返回 None。"""
+        try:
+            target = os.readlink(f'/proc/{pid}/fd/1')
+        except OSError:
+            return None
+        if os.path.abspath(target) == os.path.abspath(self.pipe_capture.fifo_path):
+            return 'pipe'
+        if os.path.abspath(target) == os.path.abspath(self.log_path):
+            return 'file'
+        return None
+
+    def _on_log_follower_error(self, exc: Exception):
+        """日志跟随线程异常退出时记录错误状态。"""
+        self.error_state = True
+        self.error_message = "日志读取失败，请检查日志目录"
+        self._notify_auto_retry('log_error')
+
+    def _rotate_followed_log(self, size: int) -> bool:
+        """file 模式下由跟随线程在读到末尾后复制截断轮转，frpc 的追加句柄无需重开。"""
+        if not self.log_segments.should_rotate(size):
+            return False
+        return self.log_segments.rotate(copy_truncate=True) is not None
+
+    def _rotate_written_log(self, size: int) -> bool:
+        """pipe 模式下由写入器重命名轮转。"""
+        if self.log_follower.is_alive():
+            # 附着的是 file 模式进程时 frpc 仍直接写文件，交由跟随线程轮转
+            return False
+        if not self.log_segments.should_rotate(size):
+            return False
+        return self.log_segments.rotate(copy_truncate=False) is not None
+
+    def _seed_log_buffer(self, end_offset: int | None):
+        """启动读取线程时用现有日志尾部填充缓冲区，不足时跨分段向前补齐。"""
+        for line in self.log_segments.tail(self.log_buffer.capacity, end_offset=end_offset):
+            cleaned = self._clean_log_line(line)
+            if cleaned:
+                self.log_buffer.append(cleaned)
 
-    def _read_logs(self):
-        """实时读取日志文件"""
+    @classmethod
+    def _clean_log_line(cls, line: str) -> str:
+        """去除首尾空白与 ANSI 颜色码。"""
+        return cls.ANSI_ESCAPE_PATTERN.sub('', line.strip())
+
+    def _ingest_log_line(self, line: str):
+        """处理一行新日志：写入缓冲区、登记索引并检查错误状态。"""
+        line = line.strip()
+        if not line:  # 只处理非空行
+            return
+        cleaned = self._clean_log_line(line)
+        # 每行只分类一次，结果同时用于索引、错误状态与自动重试
+        classification = self.log_classifier.classify(cleaned)
+        self.log_buffer.append(cleaned)
+        self.log_index.add_line(cleaned, classification)
+        self._ingested_lines += 1
+        log_lines_total.inc(
+            instance=self.instance_id,
+            error_class=classification.error_class if classification is not None else ''
+        )
+        if classification is not None:
+            self._recent_failures[classification.category] = self._ingested_lines
+            self._check_error_state(cleaned, classification)
+            self._notify_auto_retry('log_error')
+        logger.debug(f"读取到日志: {line}")
+
+    def _has_existing_log(self) -> bool:
+        """活动日志是否已有内容。"""
         try:
-            # 确保日志文件存在
-            if not os.path.exists(self.log_path):
-                with open(self.log_path, 'w', encoding='utf-8') as f:
-                    pass
-
-            with open(self.log_path, 'r', encoding='utf-8') as f:
-                # 移动到文件末尾
-                f.seek(0, 2)
-                while not self.stop_log_thread:
-                    line = f.readline()
-                    if line:
-                        line = line.strip()
-                        if line:  # 只处理非空行
-                            self.log_queue.put(line)
-                            # 检查错误状态
-                            self._check_error_state(line)
-                            logger.debug(f"读取到日志: {line}")
-                    else:
-                        time.sleep(0.1)  # 避免过度消耗 CPU
-        except Exception as e:
-            logger.error(f"读取日志失败: {str(e)}")
+            return os.path.getsize(self.log_path) > 0
+        except OSError:
+            return False
+
+    def _on_log_reset(self):
+        """活动日志被截断后清空缓冲区与活动索引。"""
+        self.log_buffer.clear()
+        self.log_index.reset()
+        self._recent_failures = {}
+
+    def _reset_log_file(self, header: str = '', archive: bool = False):
+        """截断日志文件并同步清空缓冲区；archive 为 True 时先把旧内容归档为分段。"""
+        before = (lambda: self.log_segments.rotate(copy_truncate=True)) if archive else None
+        if self.log_follower.is_alive():
+            self.log_follower.truncate(header, before=before)
+            return
+        self.log_writer.truncate(header, before=before)
+        self._on_log_reset()
+        for line in header.splitlines():
+            self._ingest_log_line(line)
+
+    def get_log_follower_stats(self):
+        """返回日志跟随线程的模式与唤醒次数。"""
+        return self.log_follower.stats()
+
+    def _check_error_state(self, log_line, classification):
+        """根据日志分类结果更新错误状态"""
+        if classification.marks_error:
             self.error_state = True
-            self.error_message = "日志读取失败，请检查日志目录"
-
-    def _check_error_state(self, log_line):
-        """检查日志中的错误状态"""
-        # 检查常见的错误模式
-        error_patterns = [
-            r'bind: cannot assign requested address',
-            r'connection refused',
-            r'connection reset',
-            r'connection timeout',
-            r'no route to host',
-            r'no such file or directory',
-            r'permission denied',
-            r'address already in use',
-            r'failed to start proxy',
-            r'failed to connect to server',
-            r'failed to login to server'
-        ]
-        
-        for pattern in error_patterns:
-            if re.search(pattern, log_line, re.IGNORECASE):
-                self.error_state = True
-                self.error_message = log_line.strip()
-                logger.error(f"检测到错误状态: {log_line.strip()}")
-                return
+            self.error_message = log_line
+            logger.error(f"检测到错误状态: {log_line}")
 
     def _recover_process(self):
         """尝试恢复进程信息（不创建新进程，仅附着到已存在的 frpc 进程）"""
         try:
             self.attached_pid = None
-            # 遍历所有进程，查找 frpc 进程
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    # 检查进程名称和命令行
-                    if proc.info['name'] == 'frpc' and self.config_path in proc.info['cmdline']:
-                        # 找到匹配的进程，仅记录 PID，不创建新进程
-                        self.attached_pid = proc.info['pid']
-                        logger.info(f"检测到已运行 frpc 进程，PID: {self.attached_pid}")
-                        # 添加恢复标记到日志
-                        with open(self.log_path, 'a', encoding='utf-8') as log_file:
-                            log_file.write(f"\n=== 附着到已运行 frpc 进程于 {time.strftime('%Y-%m-%d %H:%M:%S')}，PID: {self.attached_pid} ===\n")
-                        break
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
+            # 优先使用 pidfile 中记录的 PID，失效时才扫描进程表
+            proc = self.process_tracker.find(force_scan=True)
+            if proc is not None:
+                self.attached_pid = proc.pid
+                self.exit_watcher.watch(proc.pid)
+                # 面板重启前的启动参数无从得知，按当前配置文件推定
+                self._running_global_fingerprint = self._current_global_fingerprint()
+                self._active_capture_mode = self._detect_capture_mode(proc.pid) or self.log_capture_mode
+                if self._active_capture_mode == 'pipe':
+                    self.pipe_capture.ensure_keeper(proc.pid)
+                logger.info(f"检测到已运行 frpc 进程，PID: {self.attached_pid}")
+                # 添加恢复标记到日志
+                self.log_writer.write(f"\n=== 附着到已运行 frpc 进程于 {time.strftime('%Y-%m-%d %H:%M:%S')}，PID: {self.attached_pid} ===\n")
         except Exception as e:
             logger.error(f"恢复进程信息失败: {str(e)}")
             self.process = None
 
+    def _find_process(self, force_scan: bool = False):
+        """返回当前跟踪的 frpc 进程，必要时回收已退出的子进程。"""
+        if self.process is not None and self.process.poll() is not None:
+            self.process = None
+        return self.process_tracker.find(force_scan=force_scan)
+
     def start(self, manual: bool = True):
         """启动 frpc 服务"""
         with self._operation_lock:
@@ -620,8 +918,8 @@ class FrpcManager:
                 self.error_state = False
                 self.error_message = ""
 
-                # 检查是否已经在运行
-                if self.is_running():
+                # 检查是否已经在运行（启动前强制扫描，避免重复拉起）
+                if self._find_process(force_scan=True) is not None:
                     logger.warning("frpc 服务已经在运行")
                     return False, "frpc 服务已经在运行"
 
@@ -641,22 +939,42 @@ class FrpcManager:
                 if not os.access(self.frpc_path, os.X_OK):
                     os.chmod(self.frpc_path, 0o755)
 
-                # 启动前清空日志文件
-                with open(self.log_path, 'w', encoding='utf-8') as log_file:
-                    log_file.write(f"\n=== frpc 服务启动于 {time.strftime('%Y-%m-%d %H:%M:%S')} ===\n")
+                # 启动前将上一轮日志归档为分段，面板日志从本次启动开始
+                self._reset_log_file(
+                    f"\n=== frpc 服务启动于 {time.strftime('%Y-%m-%d %H:%M:%S')} ===\n",
+                    archive=True
+                )
 
-                # 确保日志线程在运行
-                self._start_log_thread()
+                # 确保日志线程按本次启动的输出方式运行
+                self._start_log_thread(self.log_capture_mode)
 
                 # 启动 frpc 进程
-                with open(self.log_path, 'a', encoding='utf-8') as log_file:
-                    self.process = subprocess.Popen(
-                        [self.frpc_path, '-c', self.config_path],
-                        stdout=log_file,
-                        stderr=log_file,
-                        cwd=self.frpc_work_dir,
-                        start_new_session=True  # 使用新的会话组
-                    )
+                started_fingerprint = self._current_global_fingerprint()
+                if self.log_capture_mode == 'pipe':
+                    stdout_fd = self.pipe_capture.open_child_stdout()
+                    try:
+                        self.process = subprocess.Popen(
+                            [self.frpc_path, '-c', self.config_path],
+                            stdout=stdout_fd,
+                            stderr=subprocess.STDOUT,
+                            cwd=self.frpc_work_dir,
+                            start_new_session=True  # 使用新的会话组
+                        )
+                    finally:
+                        os.close(stdout_fd)
+                else:
+                    with open(self.log_path, 'a', encoding='utf-8') as log_file:
+                        self.process = subprocess.Popen(
+                            [self.frpc_path, '-c', self.config_path],
+                            stdout=log_file,
+                            stderr=log_file,
+                            cwd=self.frpc_work_dir,
+                            start_new_session=True  # 使用新的会话组
+                        )
+                self.process_tracker.track(self.process.pid)
+                self.exit_watcher.watch(self.process.pid, self.process)
+                if self.log_capture_mode == 'pipe':
+                    self.pipe_capture.ensure_keeper(self.process.pid)
 
                 # 等待一段时间检查进程是否存活
                 time.sleep(2)
@@ -664,16 +982,15 @@ class FrpcManager:
                     self.error_state = True
                     self.error_message = "服务启动后立即退出，请检查日志"
                     logger.error("服务启动后立即退出")
-                    with open(self.log_path, 'a', encoding='utf-8') as log_file:
-                        log_file.write(f"\n{time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]} [错误] {self.error_message}\n")
+                    self._append_log(f"\n{time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]} [错误] {self.error_message}\n")
                     return False, "服务启动失败，请检查日志"
 
                 if self.error_state:
                     return False, "服务启动失败，请检查日志"
 
+                self._running_global_fingerprint = started_fingerprint
                 logger.info(f"frpc 服务已启动，PID: {self.process.pid}")
-                with open(self.log_path, 'a', encoding='utf-8') as log_file:
-                    log_file.write(f"\n{time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]} [成功] frpc 服务已启动，PID: {self.process.pid}\n")
+                self._append_log(f"\n{time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]} [成功] frpc 服务已启动，PID: {self.process.pid}\n")
                 return True, f"frpc 服务已启动，PID: {self.process.pid}"
 
             except Exception as e:
@@ -682,6 +999,11 @@ class FrpcManager:
                 self.error_message = "启动失败，请检查日志"
                 self._append_log(f"\n[错误] 启动失败，请查看应用日志获取详情\n")
                 return False, "启动失败，请检查日志或稍后重试"
+            finally:
+                self.process_tracker.request_scan()
+                self._notify_auto_retry('start')
+                self.proxy_status_poller.wake('start')
+                self.resource_sampler.wake('start')
 
     def stop(self, manual: bool = True):
         """停止 frpc 服务"""
@@ -693,25 +1015,29 @@ class FrpcManager:
                         only_if_active=True
                     )
 
-                # 查找所有匹配的 frpc 进程
+                # 优先终止已跟踪的 frpc 进程，未跟踪时才扫描进程表
+                tracked = self._find_process()
+                targets = [tracked] if tracked is not None else self.process_tracker.scan()
                 found = False
-                for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+                for proc in targets:
                     try:
-                        if proc.info['name'] == 'frpc' and self.config_path in proc.info['cmdline']:
-                            found = True
-                            proc.terminate()
-                            try:
-                                proc.wait(timeout=5)
-                            except psutil.TimeoutExpired:
-                                proc.kill()
+                        found = True
+                        proc.terminate()
+                        try:
+                            proc.wait(timeout=5)
+                        except psutil.TimeoutExpired:
+                            proc.kill()
                     except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                         continue
                 if found:
+                    self.process_tracker.clear()
+                    if self.process is not None:
+                        self.process.poll()
+                        self.process = None
                     self.error_state = False
                     self.error_message = ""
                     logger.info("frpc 服务已停止")
-                    with open(self.log_path, 'a', encoding='utf-8') as log_file:
-                        log_file.write(f"\n{time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]} [成功] frpc 服务已停止\n")
+                    self._append_log(f"\n{time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]} [成功] frpc 服务已停止\n")
                     return True, "frpc 服务已停止"
                 else:
                     logger.warning("frpc 服务未运行")
@@ -720,6 +1046,79 @@ class FrpcManager:
                 logger.exception(f"停止 frpc 服务失败: {str(e)}")
                 self._append_log(f"\n{time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]} [错误] 停止失败，请查看应用日志获取详情\n")
                 return False, "停止失败，请稍后重试"
+            finally:
+                self.process_tracker.request_scan()
+                self._notify_auto_retry('stop')
+                self.proxy_status_poller.wake('stop')
+                self.resource_sampler.wake('stop')
+
+    @classmethod
+    def _global_config_fingerprint(cls, config) -> str:
+        """返回代理与访问者以外配置的规范化文本。"""
+        return canonical_json({
+            key: value for key, value in (config or {}).items()
+            if key not in cls.RELOADABLE_FIELDS
+        })
+
+    def _current_global_fingerprint(self):
+        """读取 frpc.json 并返回其全局配置指纹，读取失败时返回 None。"""
+        try:
+            config = self.config_store.get_frpc_config()
+        except Exception:
+            return None
+        return self._global_config_fingerprint(config) if config is not None else None
+
+    def _current_admin_endpoint(self):
+        """读取 frpc.json 并返回管理接口地址与认证信息，未配置或读取失败时返回 None。"""
+        try:
+            return endpoint_from_config(self.config_store.get_frpc_config())
+        except Exception:
+            return None
+
+    def reload(self):
+        """通过 frpc 管理接口 /api/reload 热加载配置，已建立的隧道不中断。
+
+        只有代理与访问者变化时才能热加载；无法热加载时返回失败原因，由调用方决定是否完整重启。
+        """
+        with self._operation_lock:
+            if self._find_process() is None:
+                return False, 'frpc 服务未运行'
+            try:
+                config = self.config_store.get_frpc_config()
+            except Exception as e:
+                return False, f'读取 frpc.json 失败：{str(e)}'
+            if config is None:
+                return False, '未找到 frpc 配置文件'
+            endpoint = endpoint_from_config(config)
+            if endpoint is None:
+                return False, '未配置 webServer 管理接口，无法热加载'
+            fingerprint = self._global_config_fingerprint(config)
+            if self._running_global_fingerprint is not None and fingerprint != self._running_global_fingerprint:
+                return False, '代理以外的配置已变化，需要完整重启'
+
+            try:
+                response = self.admin_client.reload(endpoint)
+            except requests.RequestException as e:
+                return False, f'访问 frpc 管理接口失败：{str(e)}'
+            if response.status_code != 200:
+                detail = response.text.strip() or f'HTTP {response.status_code}'
+                return False, f'frpc 热加载失败：{detail}'
+
+            self._running_global_fingerprint = fingerprint
+            self.proxy_status_poller.wake('reload')
+            logger.info("frpc 配置已通过管理接口热加载")
+            self._append_log(f"\n{time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]} [成功] frpc 配置已热加载，现有连接未中断\n")
+            return True, 'frpc 配置已热加载，现有连接未中断'
+
+    def reload_or_restart(self):
+        """优先热加载，无法热加载时回退为完整重启，返回 (是否成功, 说明, 'reload' 或 'restart')。"""
+        with self._operation_lock:
+            success, message = self.reload()
+            if success:
+                return True, message, 'reload'
+            logger.info(f"无法热加载，回退为完整重启: {message}")
+            success, message = self.restart()
+            return success, message, 'restart'
 
     def restart(self, manual: bool = True):
         """重启 frpc 服务"""
@@ -730,44 +1129,25 @@ class FrpcManager:
                     only_if_active=True
                 )
             self.stop(manual=False)
-            # 重启时也清空日志
-            with open(self.log_path, 'w', encoding='utf-8') as log_file:
-                log_file.write(f"\n=== frpc 服务重启于 {time.strftime('%Y-%m-%d %H:%M:%S')} ===\n")
+            # 启动时会归档上一轮日志并写入新的起始标记
             return self.start(manual=False)
 
     def is_running(self):
-        """直接用 psutil 检查系统中是否有目标 frpc 进程"""
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if proc.info['name'] == 'frpc' and self.config_path in proc.info['cmdline']:
-                    return True
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                continue
-        return False
+        """通过 PID 跟踪检查目标 frpc 进程是否存活"""
+        return self._find_process() is not None
 
     def get_status(self, include_auto_retry: bool = True):
         """获取 frpc 服务状态"""
         version_summary = self.get_version_summary()
         auto_retry_snapshot = self.get_auto_retry_snapshot() if include_auto_retry else None
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    if proc.info['name'] == 'frpc' and self.config_path in proc.info['cmdline']:
-                        payload = {
-                            'status': 'running',
-                            'pid': proc.info['pid'],
-                            'error_message': self.error_message if self.error_state else '',
-                            **version_summary,
-                        }
-                        if auto_retry_snapshot is not None:
-                            payload['auto_retry'] = auto_retry_snapshot
-                        return payload
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
+            proc = self._find_process()
             payload = {
-                'status': 'stopped',
-                'pid': None,
+                'status': 'running' if proc is not None else 'stopped',
+                'pid': proc.pid if proc is not None else None,
                 'error_message': self.error_message if self.error_state else '',
+                'proxies': self.proxy_status_poller.snapshot(),
+                'resources': self.resource_sampler.latest() if proc is not None else None,
                 **version_summary,
             }
             if auto_retry_snapshot is not None:
@@ -786,30 +1166,49 @@ class FrpcManager:
             return payload
 
     def get_logs(self, lines=100):
-        """只读取frpc.log文件内容，返回最新日志（去除ANSI颜色码）"""
+        """返回最新日志（已去除ANSI颜色码），超出缓冲区容量时从文件尾部反向读取"""
         try:
-            if not os.path.exists(self.log_path):
-                return []
-            with open(self.log_path, 'r', encoding='utf-8') as f:
-                file_logs = f.readlines()[-lines:]
-                ansi_escape = re.compile(r'\x1B\[[0-9;]*[A-Za-z]')
-                logs = [ansi_escape.sub('', line.strip()) for line in file_logs if line.strip()]
-            return logs
+            if lines <= self.log_buffer.capacity:
+                return self.log_buffer.tail(lines)
+            cleaned = (self._clean_log_line(line) for line in self.log_segments.tail(lines))
+            # 与旧实现一致：去除颜色码后为空的行不返回
+            return [line for line in cleaned if line]
         except Exception as e:
             logger.error(f"读取日志失败: {str(e)}")
             return []
 
+    def search_logs(self, query: str = '', level: str | None = None, proxy: str | None = None,
+                    error_class: str | None = None, since: float | None = None, until: float | None = None,
+                    cursor: str | None = None, limit: int = 50):
+        """跨活动日志与历史分段检索日志，结果从新到旧分页返回。"""
+        return self.log_index.search(
+            self.log_segments,
+            query=query,
+            level=level,
+            proxy=proxy,
+            error_class=error_class,
+            since=since,
+            until=until,
+            cursor=cursor,
+            limit=limit
+        )
+
+    def get_log_segments(self):
+        """返回日志分段列表（从新到旧）。"""
+        return self.log_segments.segments()
+
+    def get_resource_history(self, limit: int | None = None):
+        """返回 frpc 进程资源采样历史。"""
+        return self.resource_sampler.history(limit)
+
+    def get_log_buffer_stats(self):
+        """返回日志缓冲区的容量与内存占用。"""
+        return self.log_buffer.stats()
+
     def clear_logs(self):
-        """清空日志文件"""
+        """清空日志文件与缓冲区"""
         try:
-            with open(self.log_path, 'w', encoding='utf-8') as f:
-                f.write('')
-            # 清空日志队列
-            while not self.log_queue.empty():
-                try:
-                    self.log_queue.get_nowait()
-                except queue.Empty:
-                    break
+            self._reset_log_file()
             return True
         except Exception as e:
             logger.error(f"清空日志失败: {str(e)}")
@@ -1,9 +1,21 @@
 """输入验证工具。"""
 import ipaddress
 import re
+from functools import lru_cache
 from typing import Any, Dict, List
 from flask import request
 
+PROXY_TYPES = ('tcp', 'udp', 'http', 'https')
+BASE_PROXY_FIELDS = ('name', 'type', 'localIP', 'localPort')
+# 按代理类型预先确定必需字段，未知类型只检查公共字段
+REQUIRED_PROXY_FIELDS = {
+    proxy_type: BASE_PROXY_FIELDS + (('remotePort',) if proxy_type in ('tcp', 'udp') else ())
+    for proxy_type in PROXY_TYPES
+}
+# tcp 与 udp 的 remotePort 各自独占服务端端口；http 与 https 的域名各自独立路由
+REMOTE_PORT_TYPES = frozenset(('tcp', 'udp'))
+VHOST_TYPES = frozenset(('http', 'https'))
+
 
 class InputValidator:
     """输入验证器"""
@@ -18,6 +30,12 @@ class InputValidator:
         'maxRetries': 3,
         'retryIntervalMinutes': 10,
     }
+    SHARDING_DEFAULTS = {
+        'enabled': False,
+        'shardCount': 4,
+        'groupKey': '',
+    }
+    MAX_SHARD_COUNT = 32
     
     @staticmethod
     def validate_json_request(required_fields: List[str], optional_fields: List[str] = None) -> Dict[str, Any]:
@@ -148,6 +166,23 @@ class InputValidator:
                 normalized[key] = config[key]
         return normalized
     
+    @staticmethod
+    def normalize_sharding_config(config: Any) -> Dict[str, Any]:
+        """规范化代理分片配置，分片数限制在 1 到 MAX_SHARD_COUNT 之间。"""
+        normalized = dict(InputValidator.SHARDING_DEFAULTS)
+        if not isinstance(config, dict):
+            return normalized
+
+        normalized['enabled'] = bool(config.get('enabled', normalized['enabled']))
+        try:
+            shard_count = int(config.get('shardCount', normalized['shardCount']))
+        except (TypeError, ValueError):
+            shard_count = normalized['shardCount']
+        normalized['shardCount'] = max(1, min(InputValidator.MAX_SHARD_COUNT, shard_count))
+        group_key = config.get('groupKey')
+        normalized['groupKey'] = group_key.strip() if isinstance(group_key, str) else ''
+        return normalized
+
     @staticmethod
     def validate_frpc_config(config: Dict[str, Any]) -> List[str]:
         """
@@ -204,45 +239,7 @@ class InputValidator:
         
         # 验证代理配置
         if 'proxies' in config and isinstance(config['proxies'], list):
-            for i, proxy in enumerate(config['proxies']):
-                if not isinstance(proxy, dict):
-                    errors.append(f"代理配置 {i+1} 必须是对象")
-                    continue
-                
-                # 验证必需字段
-                required_proxy_fields = ['name', 'type', 'localIP', 'localPort']
-                if proxy.get('type') in ['tcp', 'udp']:
-                    required_proxy_fields.append('remotePort')
-                for field in required_proxy_fields:
-                    if field not in proxy:
-                        errors.append(f"代理配置 {i+1} 缺少字段: {field}")
-                
-                # 验证代理类型
-                if 'type' in proxy and proxy['type'] not in ['tcp', 'udp', 'http', 'https']:
-                    errors.append(f"代理配置 {i+1} 类型无效: {proxy['type']}")
-                
-                # 验证端口
-                for port_field in ['localPort', 'remotePort']:
-                    if port_field in proxy and not InputValidator.validate_port(proxy[port_field]):
-                        errors.append(f"代理配置 {i+1} {port_field} 无效")
-                
-                # 验证本地地址
-                if 'localIP' in proxy and not InputValidator.validate_host_or_ip(proxy['localIP']):
-                    errors.append(f"代理配置 {i+1} 本地地址无效")
-
-                # 验证自定义域名
-                custom_domains = proxy.get('customDomains', [])
-                if custom_domains:
-                    if not isinstance(custom_domains, list):
-                        errors.append(f"代理配置 {i+1} customDomains 必须是数组")
-                    else:
-                        for domain in custom_domains:
-                            if not InputValidator.validate_hostname(domain):
-                                errors.append(f"代理配置 {i+1} 自定义域名无效: {domain}")
-
-                # 验证路由
-                if proxy.get('route') is not None and not isinstance(proxy.get('route'), str):
-                    errors.append(f"代理配置 {i+1} route 必须是字符串")
+            InputValidator.validate_proxies(config['proxies'], errors)
 
         # 验证自动重试配置（仅用于 Web 管理配置）
         if 'autoRetry' in config and config['autoRetry'] is not None:
@@ -278,6 +275,73 @@ class InputValidator:
         
         return errors
     
+    @staticmethod
+    def validate_proxies(proxies: List[Any], errors: List[str], start: int = 1) -> List[str]:
+        """
+        校验代理列表，错误追加到 errors 并返回
+
+        单次遍历完成字段校验，名称、remotePort 与自定义域名的冲突通过哈希索引检测，
+        耗时与代理数量成线性关系；重复出现的本地地址只解析一次。
+        未启用（enabled 为 false）的代理不参与端口与域名冲突检测。start 为错误信息中第一个代理的序号。
+        """
+        names = {}
+        claimed = {}
+        missing = _MISSING
+        for number, proxy in enumerate(proxies, start):
+            if not isinstance(proxy, dict):
+                errors.append(f"代理配置 {number} 必须是对象")
+                continue
+            get = proxy.get
+
+            proxy_type = get('type', missing)
+            # type 可能是列表等不可哈希的值，先确认是字符串再查表
+            required_fields = REQUIRED_PROXY_FIELDS.get(proxy_type) if isinstance(proxy_type, str) else None
+            for field in required_fields or BASE_PROXY_FIELDS:
+                if field not in proxy:
+                    errors.append(f"代理配置 {number} 缺少字段: {field}")
+            if required_fields is None and proxy_type is not missing:
+                errors.append(f"代理配置 {number} 类型无效: {proxy_type}")
+
+            for field, check, message in PROXY_FIELD_CHECKS:
+                value = get(field, missing)
+                if value is not missing and not check(value):
+                    errors.append(f"代理配置 {number} {message}")
+
+            custom_domains = get('customDomains')
+            if custom_domains and not isinstance(custom_domains, list):
+                errors.append(f"代理配置 {number} customDomains 必须是数组")
+                custom_domains = None
+            elif custom_domains:
+                for domain in custom_domains:
+                    if not InputValidator.validate_hostname(domain):
+                        errors.append(f"代理配置 {number} 自定义域名无效: {domain}")
+
+            route = get('route')
+            if route is not None and not isinstance(route, str):
+                errors.append(f"代理配置 {number} route 必须是字符串")
+
+            name = get('name')
+            if isinstance(name, str) and name:
+                first = names.setdefault(name, number)
+                if first != number:
+                    errors.append(f"代理配置 {number} 名称重复: {name}（与代理配置 {first} 相同）")
+
+            for key, description in proxy_conflict_keys(proxy):
+                first = claimed.setdefault(key, number)
+                if first != number:
+                    errors.append(f"代理配置 {number} {description} 与代理配置 {first} 冲突")
+        return errors
+
+    @staticmethod
+    def find_proxy_conflicts(proxies: List[Any], candidate: Dict[str, Any], skip_index: int | None = None) -> List[str]:
+        """
+        检查单个代理与列表中其他代理的名称、remotePort 与自定义域名冲突
+
+        skip_index 为候选代理在列表中原有的位置（修改时跳过自身）。需要对同一列表反复检查时，
+        直接复用 ProxyConflictIndex。
+        """
+        return ProxyConflictIndex(proxies).conflicts(candidate, skip_index)
+
     @staticmethod
     def sanitize_string(value: str, max_length: int = 255) -> str:
         """
@@ -301,3 +365,124 @@ class InputValidator:
             value = value[:max_length]
         
         return value
+
+
+_MISSING = object()
+
+
+@lru_cache(maxsize=4096)
+def _cached_host_or_ip(value: str) -> bool:
+    return InputValidator.validate_host_or_ip(value)
+
+
+def _is_host_or_ip(value: Any) -> bool:
+    """带缓存的地址校验：大量代理通常共用少数几个本地地址。"""
+    return _cached_host_or_ip(value) if isinstance(value, str) else InputValidator.validate_host_or_ip(value)
+
+
+def _is_port(value: Any) -> bool:
+    """整数端口走快速路径，其余类型交给 validate_port 转换。"""
+    if type(value) is int:
+        return 1 <= value <= 65535
+    return InputValidator.validate_port(value)
+
+
+def proxy_conflict_keys(proxy: Dict[str, Any]) -> List[tuple]:
+    """
+    返回代理在服务端独占的资源及其描述：tcp / udp 的 remotePort，http / https 的自定义域名与路径
+
+    未启用的代理不占用任何资源；冲突键只由字符串与整数组成，字段为列表、对象等值时也可以哈希。
+    """
+    if proxy.get('enabled', True) is False:
+        return []
+    proxy_type = proxy.get('type')
+    if not isinstance(proxy_type, str):
+        return []
+    if proxy_type in REMOTE_PORT_TYPES:
+        remote_port = proxy.get('remotePort')
+        if remote_port is None or not _is_port(remote_port):
+            return []
+        port = int(remote_port)
+        return [((proxy_type, port), f"remotePort {port} ({proxy_type})")]
+    custom_domains = proxy.get('customDomains')
+    if proxy_type not in VHOST_TYPES or not custom_domains or not isinstance(custom_domains, list):
+        return []
+    locations = proxy.get('locations')
+    if not isinstance(locations, list) or not locations:
+        locations = ('',)
+    else:
+        locations = [location if isinstance(location, str) else str(location) for location in locations]
+    keys = []
+    for domain in custom_domains:
+        if not isinstance(domain, str):
+            continue
+        domain_name = domain.strip().strip('.').lower()
+        keys.extend(((proxy_type, domain_name, location), f"自定义域名 {domain}") for location in locations)
+    return keys
+
+
+# 代理字段的校验函数与错误信息，字段存在时才校验
+PROXY_FIELD_CHECKS = (
+    ('localPort', _is_port, 'localPort 无效'),
+    ('remotePort', _is_port, 'remotePort 无效'),
+    ('localIP', _is_host_or_ip, '本地地址无效'),
+)
+
+
+class ProxyConflictIndex:
+    """
+    代理名称与冲突键到列表位置的哈希索引，单个代理的冲突检查只需常数次查表
+
+    单个代理修改提交后由 apply 就地更新，始终对应最近一次提交的代理列表；读取方只做单次查表，可在多个请求间共享。
+    """
+
+    def __init__(self, proxies: List[Any] = ()):
+        self._names = {}
+        self._claimed = {}
+        for index, proxy in enumerate(proxies):
+            self._add(index, proxy)
+
+    def _entries(self, proxy: Any) -> List[tuple]:
+        """返回代理在名称表与冲突键表中的 (表, 键) 列表。"""
+        if not isinstance(proxy, dict):
+            return []
+        entries = [(self._claimed, key) for key, _ in proxy_conflict_keys(proxy)]
+        name = proxy.get('name')
+        if isinstance(name, str) and name:
+            entries.append((self._names, name))
+        return entries
+
+    def _add(self, index: int, proxy: Any):
+        for table, key in self._entries(proxy):
+            table[key] = table.get(key, ()) + (index,)
+
+    def _remove(self, index: int, proxy: Any):
+        for table, key in self._entries(proxy):
+            remaining = tuple(item for item in table.get(key, ()) if item != index)
+            if remaining:
+                table[key] = remaining
+            else:
+                table.pop(key, None)
+
+    def apply(self, index: int, old_proxy: Any, new_proxy: Any):
+        """就地把位置 index 的代理替换为 new_proxy，old_proxy 为 None 表示在末尾追加；耗时与代理总数无关。"""
+        if old_proxy is not None:
+            self._remove(index, old_proxy)
+        self._add(index, new_proxy)
+
+    def conflicts(self, candidate: Dict[str, Any], skip_index: int | None = None) -> List[str]:
+        """返回候选代理与其他代理的冲突，按代理位置排序；skip_index 为候选代理原有的位置。"""
+        found = []
+        name = candidate.get('name')
+        if isinstance(name, str) and name:
+            found.extend(
+                (index, f"代理名称 {name} 已被代理配置 {index + 1} 使用")
+                for index in self._names.get(name, ()) if index != skip_index
+            )
+        for key, description in proxy_conflict_keys(candidate):
+            found.extend(
+                (index, f"{description} 已被代理配置 {index + 1} 使用")
+                for index in self._claimed.get(key, ()) if index != skip_index
+            )
+        found.sort(key=lambda item: item[0])
+        return [message for _, message in found]
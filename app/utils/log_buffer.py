@@ -0,0 +1,77 @@
+"""frpc 日志环形缓冲区。"""
+import sys
+import threading
+from collections import deque
+from itertools import islice
+
+
+class LogRingBuffer:
+    """固定容量的最近日志缓冲区，每行附带单调递增的序号。"""
+
+    DEFAULT_CAPACITY = 1000
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = max(int(capacity), 1)
+        self._lock = threading.Lock()
+        self._entries = deque()
+        self._next_seq = 1
+        self._approx_bytes = 0
+        self._dropped = 0
+
+    def append(self, line: str) -> int:
+        """追加一行日志，超出容量时淘汰最旧的一行，返回该行序号。"""
+        with self._lock:
+            if len(self._entries) >= self.capacity:
+                _, evicted = self._entries.popleft()
+                self._approx_bytes -= sys.getsizeof(evicted)
+                self._dropped += 1
+            seq = self._next_seq
+            self._next_seq += 1
+            self._entries.append((seq, line))
+            self._approx_bytes += sys.getsizeof(line)
+            return seq
+
+    def extend(self, lines):
+        """批量追加日志。"""
+        for line in lines:
+            self.append(line)
+
+    def tail(self, lines: int) -> list[str]:
+        """返回最近的若干行日志。"""
+        with self._lock:
+            if lines <= 0:
+                return []
+            recent = list(islice(reversed(self._entries), lines))
+        recent.reverse()
+        return [line for _, line in recent]
+
+    def since(self, seq: int, limit: int | None = None) -> tuple[list[tuple[int, str]], int]:
+        """返回序号大于 seq 的日志，以及当前最新序号。"""
+        with self._lock:
+            entries = [entry for entry in self._entries if entry[0] > seq]
+            last_seq = self._next_seq - 1
+        if limit is not None and len(entries) > limit:
+            entries = entries[-limit:]
+        return entries, last_seq
+
+    def clear(self):
+        """清空缓冲区，序号继续递增以便订阅方识别重置。"""
+        with self._lock:
+            self._entries.clear()
+            self._approx_bytes = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict:
+        """返回缓冲区容量与内存占用统计。"""
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'size': len(self._entries),
+                'approx_bytes': self._approx_bytes,
+                'first_seq': self._entries[0][0] if self._entries else None,
+                'last_seq': self._next_seq - 1,
+                'dropped': self._dropped,
+            }
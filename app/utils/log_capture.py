@@ -0,0 +1,276 @@
+"""frpc 输出捕获与日志写入工具。"""
+import fcntl
+import logging
+import os
+import select
+import signal
+import stat
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+class LogWriter:
+    """单一的缓冲日志写入器，保持一个追加句柄，避免每行重复 open/append。"""
+
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, path: str, rotate_check=None):
+        self.path = path
+        self.rotate_check = rotate_check
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _ensure_open(self):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8', buffering=self.BUFFER_SIZE)
+        return self._file
+
+    def write(self, text: str):
+        """写入一段文本并刷新到磁盘。"""
+        if not text:
+            return
+        with self._lock:
+            log_file = self._ensure_open()
+            log_file.write(text)
+            log_file.flush()
+            self._rotate_if_needed_locked()
+
+    def write_lines(self, lines):
+        """批量写入多行，整批只刷新一次。"""
+        if not lines:
+            return
+        with self._lock:
+            log_file = self._ensure_open()
+            for line in lines:
+                log_file.write(line)
+                log_file.write('\n')
+            log_file.flush()
+            self._rotate_if_needed_locked()
+
+    def _rotate_if_needed_locked(self):
+        """写入后检查轮转条件；轮转后关闭旧句柄，下次写入自动打开新文件。"""
+        if self.rotate_check is not None and self.rotate_check(self._file.tell()):
+            self._close_locked()
+
+    def truncate(self, header: str = '', before=None):
+        """截断日志文件并写入起始内容；before 可在截断前归档旧内容。"""
+        with self._lock:
+            self._close_locked()
+            if before is not None:
+                before()
+            with open(self.path, 'w', encoding='utf-8') as log_file:
+                log_file.write(header)
+
+    def reopen(self):
+        """关闭当前句柄，下次写入时重新打开（用于文件被替换之后）。"""
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def close(self):
+        """关闭写入句柄。"""
+        with self._lock:
+            self._close_locked()
+
+
+class PipeCapture:
+    """通过命名管道捕获 frpc 输出，面板重启后可重新附着继续读取。
+
+    管道写满后 frpc 的日志写入会阻塞，因此每个 frpc 进程配有一个守护进程（pipe_keeper.py）：
+    面板读取线程持有锁文件上的排他锁，面板不在时守护进程取得锁并把输出原样追加到日志文件；
+    面板重新附着时通知守护进程让出锁。
+    """
+
+    READ_CHUNK_SIZE = 64 * 1024
+    LOCK_RETRY_INTERVAL = 0.05
+    KEEPER_SIGNAL_INTERVAL = 1.0
+    KEEPER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pipe_keeper.py')
+
+    def __init__(self, fifo_path: str, log_path: str, on_lines, on_attach=None):
+        self.fifo_path = fifo_path
+        self.log_path = log_path
+        self.lock_path = f'{fifo_path}.lock'
+        self.keeper_pidfile = f'{fifo_path}.keeper.pid'
+        self._on_lines = on_lines
+        self._on_attach = on_attach
+        self._keeper = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._attached = threading.Event()
+        self._wake_r = None
+        self._wake_w = None
+        self._partial = b''
+
+    @staticmethod
+    def is_supported() -> bool:
+        """当前平台是否支持命名管道。"""
+        return hasattr(os, 'mkfifo')
+
+    def ensure_fifo(self):
+        """确保命名管道存在，路径被普通文件占用时重建。"""
+        if os.path.exists(self.fifo_path):
+            if stat.S_ISFIFO(os.stat(self.fifo_path).st_mode):
+                return
+            os.remove(self.fifo_path)
+        os.makedirs(os.path.dirname(self.fifo_path), exist_ok=True)
+        os.mkfifo(self.fifo_path, 0o600)
+
+    def open_child_stdout(self) -> int:
+        """为 frpc 打开读写模式的管道描述符：子进程自身持有读端，面板退出时不会触发 SIGPIPE。"""
+        self.ensure_fifo()
+        return os.open(self.fifo_path, os.O_RDWR)
+
+    def is_alive(self) -> bool:
+        """读取线程是否存活。"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def keeper_pid(self):
+        """返回存活的守护进程 PID，不存在时返回 None。"""
+        try:
+            with open(self.keeper_pidfile, 'r', encoding='utf-8') as f:
+                pid = int(f.read().strip())
+            if self.fifo_path in psutil.Process(pid).cmdline():
+                return pid
+        except (OSError, ValueError, psutil.Error):
+            pass
+        return None
+
+    def ensure_keeper(self, frpc_pid: int):
+        """为 frpc 进程启动管道守护进程，已有存活的守护进程时直接返回。"""
+        self.reap_keeper()
+        if self.keeper_pid() is not None:
+            return
+        try:
+            self._keeper = subprocess.Popen(
+                [sys.executable, self.KEEPER_SCRIPT, self.fifo_path, self.lock_path, self.log_path, str(frpc_pid)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+            with open(self.keeper_pidfile, 'w', encoding='utf-8') as f:
+                f.write(str(self._keeper.pid))
+        except Exception as e:
+            logger.warning(f'启动 frpc 输出管道守护进程失败，面板停止期间输出可能阻塞: {str(e)}')
+
+    def reap_keeper(self, timeout: float = 0):
+        """回收已退出的守护进程，避免残留僵尸进程。"""
+        if self._keeper is None:
+            return
+        try:
+            self._keeper.wait(timeout=timeout)
+            self._keeper = None
+        except subprocess.TimeoutExpired:
+            pass
+
+    def _signal_keeper(self):
+        pid = self.keeper_pid()
+        if pid is None:
+            return
+        try:
+            os.kill(pid, signal.SIGUSR1)
+        except OSError:
+            pass
+
+    def _acquire_lock(self, lock_fd: int) -> bool:
+        """取得管道读取锁；被守护进程持有时通知其让出，直到取得锁或线程被停止。"""
+        signalled_at = 0.0
+        while not self._stop_event.is_set():
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                pass
+            now = time.monotonic()
+            if now - signalled_at >= self.KEEPER_SIGNAL_INTERVAL:
+                self._signal_keeper()
+                signalled_at = now
+            self._stop_event.wait(self.LOCK_RETRY_INTERVAL)
+        return False
+
+    def start(self, attach_timeout: float = 2.0):
+        """启动读取线程，最多等待 attach_timeout 秒取得管道（守护进程需要先让出）。"""
+        if self.is_alive():
+            return
+        self.ensure_fifo()
+        self._stop_event.clear()
+        self._attached.clear()
+        self._thread = threading.Thread(target=self._run, name='frpc-pipe-capture', daemon=True)
+        self._thread.start()
+        if not self._attached.wait(attach_timeout):
+            logger.warning('等待 frpc 输出管道守护进程让出超时，读取线程将在后台继续等待')
+
+    def stop(self, timeout: float = 1):
+        """停止读取线程。"""
+        self._stop_event.set()
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b'x')
+            except OSError:
+                pass
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+
+    def _emit(self, data: bytes):
+        """按完整行切分后批量回调。"""
+        data = self._partial + data
+        raw_lines = data.split(b'\n')
+        self._partial = raw_lines.pop()
+        lines = [raw_line.decode('utf-8', errors='replace').rstrip('\r') for raw_line in raw_lines]
+        if lines:
+            self._on_lines(lines)
+
+    def _run(self):
+        """读取线程主循环：仅在管道有数据时唤醒。"""
+        read_fd = None
+        keepalive_fd = None
+        lock_fd = None
+        try:
+            self._wake_r, self._wake_w = os.pipe()
+            read_fd = os.open(self.fifo_path, os.O_RDONLY | os.O_NONBLOCK)
+            # 面板自身持有一个写端，frpc 退出后读端也不会持续收到 EOF
+            keepalive_fd = os.open(self.fifo_path, os.O_WRONLY | os.O_NONBLOCK)
+            # 锁随描述符关闭或面板进程退出自动释放
+            lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            if not self._acquire_lock(lock_fd):
+                return
+            self._partial = b''
+            if self._on_attach is not None:
+                self._on_attach()
+            self._attached.set()
+            while not self._stop_event.is_set():
+                readable, _, _ = select.select([read_fd, self._wake_r], [], [])
+                if self._stop_event.is_set():
+                    break
+                if read_fd in readable:
+                    try:
+                        data = os.read(read_fd, self.READ_CHUNK_SIZE)
+                    except BlockingIOError:
+                        continue
+                    if data:
+                        self._emit(data)
+        except Exception as e:
+            logger.error(f'读取 frpc 输出管道失败: {str(e)}')
+        finally:
+            for fd in (read_fd, keepalive_fd, lock_fd, self._wake_r, self._wake_w):
+                if fd is None:
+                    continue
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+            self._wake_r = None
+            self._wake_w = None
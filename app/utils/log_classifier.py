@@ -0,0 +1,70 @@
+"""frpc 日志错误分类器。"""
+import re
+from typing import NamedTuple
+
+CONNECTION_FAILURE = 'connection_failure'
+STARTUP_FAILURE = 'startup_failure'
+
+# (错误类别, 所属失败类型, 匹配短语, 是否标记服务错误状态)，按优先级排列；短语按字面量、忽略大小写匹配
+ERROR_RULES = (
+    ('connection_refused', CONNECTION_FAILURE, 'connection refused', True),
+    ('connection_reset', CONNECTION_FAILURE, 'connection reset', True),
+    ('connection_timeout', CONNECTION_FAILURE, 'connection timeout', True),
+    ('connect_failed', CONNECTION_FAILURE, 'failed to connect to server', True),
+    ('login_failed', CONNECTION_FAILURE, 'failed to login to server', True),
+    ('no_route', CONNECTION_FAILURE, 'no route to host', True),
+    ('io_timeout', CONNECTION_FAILURE, 'i/o timeout', False),
+    ('network_unreachable', CONNECTION_FAILURE, 'network is unreachable', False),
+    ('exited_immediately', STARTUP_FAILURE, '服务启动后立即退出', False),
+    ('start_failed', STARTUP_FAILURE, '启动失败', False),
+    ('proxy_start_failed', STARTUP_FAILURE, 'failed to start proxy', True),
+    ('bind_address_unavailable', STARTUP_FAILURE, 'bind: cannot assign requested address', True),
+    ('permission_denied', STARTUP_FAILURE, 'permission denied', True),
+    ('address_in_use', STARTUP_FAILURE, 'address already in use', True),
+    ('file_not_found', STARTUP_FAILURE, 'no such file or directory', True),
+    ('binary_missing', STARTUP_FAILURE, '未找到 frpc 可执行文件', False),
+    ('config_missing', STARTUP_FAILURE, '未找到 frpc 配置文件', False),
+)
+
+
+class Classification(NamedTuple):
+    """单行日志的分类结果。"""
+
+    error_class: str
+    category: str
+    marks_error: bool
+
+
+class LogClassifier:
+    """把全部错误短语编译为一个多分支正则，每行日志只需一次扫描。
+
+    先统一转为小写再做区分大小写的匹配，且不使用捕获分组，命中后按短语反查分类：
+    IGNORECASE 或命名分组都会让 re 放弃字面量分支的快速匹配，反而比逐条搜索更慢。
+    """
+
+    def __init__(self, rules=ERROR_RULES):
+        self._rules = {}
+        self._priority = {}
+        for priority, (error_class, category, phrase, marks_error) in enumerate(rules):
+            phrase = phrase.lower()
+            self._rules[phrase] = Classification(error_class, category, marks_error)
+            self._priority[phrase] = priority
+        self._pattern = re.compile('|'.join(re.escape(phrase) for phrase in self._rules))
+
+    def classify(self, text: str):
+        """返回文本命中的最高优先级分类，未命中时返回 None。"""
+        if not text:
+            return None
+        text = text.lower()
+        match = self._pattern.search(text)
+        if match is None:
+            return None
+        best = match.group(0)
+        # 正常日志只走上面的一次扫描；命中后才继续查找同一行中优先级更高的短语
+        for extra in self._pattern.finditer(text, match.end()):
+            if self._priority[extra.group(0)] < self._priority[best]:
+                best = extra.group(0)
+        return self._rules[best]
+
+
+default_classifier = LogClassifier()
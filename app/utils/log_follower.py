@@ -0,0 +1,307 @@
+"""日志文件跟随读取工具。"""
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import threading
+
+logger = logging.getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_NONBLOCK = 0o0004000
+IN_CLOEXEC = 0o2000000
+
+FILE_WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_DELETE_SELF | IN_MOVE_SELF
+DIR_WATCH_MASK = IN_CREATE | IN_MOVED_TO
+
+
+class _Inotify:
+    """基于 ctypes 的最小 inotify 封装。"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 失败')
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """添加监听，返回 watch 描述符。"""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch 失败: {path}')
+        return wd
+
+    def remove_watch(self, wd: int):
+        """移除监听，忽略已失效的描述符。"""
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def drain(self):
+        """读空事件队列；只关心“有变化”，不解析具体事件。"""
+        # 先用零超时 select 确认可读，避免 eventlet 绿化后的 os.read 在 EAGAIN 时挂起
+        while select.select([self.fd], [], [], 0)[0]:
+            try:
+                if not os.read(self.fd, 64 * 1024):
+                    return
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return
+                raise
+
+    def close(self):
+        """关闭 inotify 描述符。"""
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class LogFollower:
+    """跟随读取日志文件：Linux 下由 inotify 唤醒，其他环境回退为轮询。"""
+
+    POLL_INTERVAL = 0.1
+    READ_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, path: str, on_line, on_seed=None, on_reset=None, on_error=None, rotate_check=None,
+                 use_inotify: bool = True):
+        self.path = path
+        self._rotate_check = rotate_check
+        self._on_line = on_line
+        self._on_seed = on_seed
+        self._on_reset = on_reset
+        self._on_error = on_error
+        self._use_inotify = use_inotify
+        self.lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._wake_r = None
+        self._wake_w = None
+        self._file = None
+        self._inode = None
+        self._partial = b''
+        self._rewind = False
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'mode': 'stopped',
+            'wakeups': 0,
+            'lines': 0,
+            'bytes': 0,
+            'truncations': 0,
+            'reopens': 0,
+            'rotations': 0,
+        }
+
+    def start(self):
+        """启动跟随线程。"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='frpc-log-follower', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1):
+        """停止跟随线程。"""
+        self._stop_event.set()
+        self._wake()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+
+    def is_alive(self) -> bool:
+        """跟随线程是否存活。"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def truncate(self, header: str = '', before=None):
+        """在读取锁内截断日志文件，并通知跟随线程从头读取；before 可在截断前归档旧内容。"""
+        with self.lock:
+            if before is not None:
+                before()
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(header)
+            if self._on_reset is not None:
+                self._on_reset()
+            self._rewind = True
+        self._wake()
+
+    def stats(self) -> dict:
+        """返回唤醒次数等运行统计，便于确认空闲时的 CPU 开销。"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, key: str, value: int = 1):
+        with self._stats_lock:
+            self._stats[key] += value
+
+    def _set_mode(self, mode: str):
+        with self._stats_lock:
+            self._stats['mode'] = mode
+
+    def _wake(self):
+        """通过自管道唤醒阻塞中的 select。"""
+        if self._wake_w is None:
+            return
+        try:
+            os.write(self._wake_w, b'x')
+        except OSError:
+            pass
+
+    def _open(self, seek_end: bool):
+        """打开日志文件并记录 inode。"""
+        if not os.path.exists(self.path):
+            with open(self.path, 'a', encoding='utf-8'):
+                pass
+        self._file = open(self.path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        self._inode = (stat.st_dev, stat.st_ino)
+        self._partial = b''
+        if seek_end:
+            self._file.seek(stat.st_size)
+        return stat.st_size
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _emit(self, data: bytes):
+        """按完整行切分并回调，半行暂存等待后续写入。"""
+        if not data:
+            return
+        self._count('bytes', len(data))
+        data = self._partial + data
+        lines = data.split(b'\n')
+        self._partial = lines.pop()
+        for raw_line in lines:
+            self._count('lines')
+            self._on_line(raw_line.decode('utf-8', errors='replace'))
+
+    def _read_available(self):
+        """读取当前文件中的全部新内容。"""
+        while True:
+            data = self._file.read(self.READ_CHUNK_SIZE)
+            if not data:
+                return
+            self._emit(data)
+
+    def _path_replaced(self) -> bool:
+        """判断路径是否已指向新的文件（被轮转或替换）。"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_dev, stat.st_ino) != self._inode
+
+    def _sync(self) -> bool:
+        """处理一次唤醒：截断、轮转与新增内容，返回文件是否被重新打开。"""
+        with self.lock:
+            if self._rewind:
+                self._rewind = False
+                self._partial = b''
+                self._file.seek(0)
+                self._count('truncations')
+            elif os.fstat(self._file.fileno()).st_size < self._file.tell():
+                # 外部截断：从头读取
+                self._partial = b''
+                self._file.seek(0)
+                self._count('truncations')
+
+            self._read_available()
+
+            if self._rotate_check is not None and self._rotate_check(self._file.tell()):
+                # 已读到末尾后原地轮转，新内容从文件头开始
+                self._partial = b''
+                self._file.seek(0)
+                self._count('rotations')
+                self._read_available()
+
+            if self._path_replaced():
+                self._close_file()
+                self._open(seek_end=False)
+                self._count('reopens')
+                self._read_available()
+                return True
+        return False
+
+    def _run(self):
+        """跟随线程主循环。"""
+        try:
+            with self.lock:
+                end_offset = self._open(seek_end=True)
+                if self._on_seed is not None:
+                    self._on_seed(end_offset)
+            inotify = self._create_inotify()
+            if inotify is not None:
+                self._run_inotify(inotify)
+            else:
+                self._run_polling()
+        except Exception as e:
+            logger.error(f'跟随读取日志失败: {str(e)}')
+            if self._on_error is not None:
+                self._on_error(e)
+        finally:
+            self._close_file()
+            self._set_mode('stopped')
+
+    def _create_inotify(self):
+        """尝试创建 inotify 实例，不可用时返回 None。"""
+        if not self._use_inotify or not hasattr(os, 'pipe') or os.name != 'posix':
+            return None
+        try:
+            return _Inotify()
+        except Exception as e:
+            logger.info(f'inotify 不可用，日志读取回退为轮询: {str(e)}')
+            return None
+
+    def _run_inotify(self, inotify: _Inotify):
+        """inotify 模式：仅在文件变化或收到唤醒信号时读取。"""
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._set_mode('inotify')
+        try:
+            file_wd = inotify.add_watch(self.path, FILE_WATCH_MASK)
+            inotify.add_watch(os.path.dirname(os.path.abspath(self.path)), DIR_WATCH_MASK)
+            # 监听建立前可能已有写入
+            self._sync()
+            while not self._stop_event.is_set():
+                readable, _, _ = select.select([inotify.fd, self._wake_r], [], [])
+                self._count('wakeups')
+                if inotify.fd in readable:
+                    inotify.drain()
+                if self._wake_r in readable:
+                    try:
+                        os.read(self._wake_r, 4096)
+                    except OSError:
+                        pass
+                if self._stop_event.is_set():
+                    break
+                if self._sync():
+                    inotify.remove_watch(file_wd)
+                    file_wd = inotify.add_watch(self.path, FILE_WATCH_MASK)
+                    # 重新监听期间可能有新写入
+                    self._sync()
+        finally:
+            inotify.close()
+            for fd in (self._wake_r, self._wake_w):
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+            self._wake_r = None
+            self._wake_w = None
+
+    def _run_polling(self):
+        """轮询模式：保留原有的 100ms 读取节拍作为兜底。"""
+        self._set_mode('polling')
+        while not self._stop_event.is_set():
+            self._count('wakeups')
+            self._sync()
+            self._stop_event.wait(self.POLL_INTERVAL)
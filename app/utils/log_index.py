@@ -0,0 +1,375 @@
+"""frpc 日志索引与检索。"""
+import re
+import threading
+import time
+import uuid
+from collections import deque
+
+LEVEL_NAMES = {
+    'T': 'trace',
+    'D': 'debug',
+    'I': 'info',
+    'W': 'warn',
+    'E': 'error',
+}
+LEVEL_ALIASES = {
+    **{letter.lower(): letter for letter in LEVEL_NAMES},
+    **{name: letter for letter, name in LEVEL_NAMES.items()},
+    'warning': 'W',
+}
+# 兼容 frpc 新旧两种时间格式：2024-01-01 12:00:00.000 与 2024/01/01 12:00:00
+LINE_PATTERN = re.compile(
+    r'^(?P<ts>\d{4}[-/]\d{2}[-/]\d{2} \d{2}:\d{2}:\d{2})(?:\.\d+)?\s+'
+    r'(?:\[(?P<level>[TDIWE])\]\s+\[[^\]]*\]\s+(?:\[[0-9a-f]{6,}\]\s+)?(?:\[(?P<proxy>[^\]]+)\]\s+)?)?'
+)
+PANEL_LEVEL_PATTERN = re.compile(r'\[(错误|成功)\]')
+BUCKET_SECONDS = 3600
+
+
+class LogCursorError(ValueError):
+    """分页游标无效或对应的日志分段已轮转、截断。"""
+
+
+class _TimestampParser:
+    """带秒级缓存的时间解析器，同一秒内的日志只解析一次。"""
+
+    def __init__(self):
+        self._last_text = None
+        self._last_value = None
+
+    def parse(self, text: str):
+        if text == self._last_text:
+            return self._last_value
+        try:
+            value = time.mktime(time.strptime(text.replace('/', '-'), '%Y-%m-%d %H:%M:%S'))
+        except ValueError:
+            value = None
+        self._last_text = text
+        self._last_value = value
+        return value
+
+
+def parse_log_line(line: str, timestamp_parser: _TimestampParser | None = None) -> dict:
+    """解析一行 frpc 日志的时间、级别与代理名称。"""
+    parsed = {'ts': None, 'level': None, 'proxy': None}
+    match = LINE_PATTERN.match(line)
+    if match:
+        parser = timestamp_parser or _TimestampParser()
+        parsed['ts'] = parser.parse(match.group('ts'))
+        parsed['level'] = match.group('level')
+        parsed['proxy'] = match.group('proxy')
+    if parsed['level'] is None:
+        panel_match = PANEL_LEVEL_PATTERN.search(line)
+        if panel_match:
+            parsed['level'] = 'E' if panel_match.group(1) == '错误' else 'I'
+    return parsed
+
+
+class SegmentIndex:
+    """单个日志分段的轻量索引：时间桶、级别、代理名与错误类别。"""
+
+    def __init__(self, complete: bool = True):
+        self.complete = complete
+        self.lines = 0
+        self.min_ts = None
+        self.max_ts = None
+        self.levels = set()
+        self.proxies = set()
+        self.error_classes = set()
+        self.buckets = {}
+
+    def add(self, parsed: dict, classification):
+        """登记一行日志；错误类别与所属失败类型都可作为过滤条件。"""
+        self.lines += 1
+        ts = parsed['ts']
+        if ts is not None:
+            self.min_ts = ts if self.min_ts is None else min(self.min_ts, ts)
+            self.max_ts = ts if self.max_ts is None else max(self.max_ts, ts)
+            bucket = int(ts // BUCKET_SECONDS) * BUCKET_SECONDS
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        if parsed['level']:
+            self.levels.add(parsed['level'])
+        if parsed['proxy']:
+            self.proxies.add(parsed['proxy'])
+        if classification is not None:
+            self.error_classes.add(classification.error_class)
+            self.error_classes.add(classification.category)
+
+    def can_match(self, filters: dict) -> bool:
+        """判断该分段是否可能包含符合条件的日志，不可能时整段跳过。"""
+        if not self.complete:
+            return True
+        if filters.get('level') and filters['level'] not in self.levels:
+            return False
+        if filters.get('proxy') and filters['proxy'] not in self.proxies:
+            return False
+        if filters.get('error_class') and filters['error_class'] not in self.error_classes:
+            return False
+        since = filters.get('since')
+        until = filters.get('until')
+        if since is not None or until is not None:
+            if not self.buckets:
+                return False
+            if since is not None and self.max_ts < since:
+                return False
+            if until is not None and self.min_ts > until:
+                return False
+            low = -float('inf') if since is None else int(since // BUCKET_SECONDS) * BUCKET_SECONDS
+            high = float('inf') if until is None else until
+            if not any(low <= bucket <= high for bucket in self.buckets):
+                return False
+        return True
+
+    def copy(self):
+        """复制索引，检索时使用副本而不是仍在写入的活动索引。"""
+        index = SegmentIndex(complete=self.complete)
+        index.lines = self.lines
+        index.min_ts = self.min_ts
+        index.max_ts = self.max_ts
+        index.levels = set(self.levels)
+        index.proxies = set(self.proxies)
+        index.error_classes = set(self.error_classes)
+        index.buckets = dict(self.buckets)
+        return index
+
+    def to_dict(self) -> dict:
+        """序列化为可写入 manifest 的结构。"""
+        return {
+            'lines': self.lines,
+            'min_ts': self.min_ts,
+            'max_ts': self.max_ts,
+            'levels': sorted(self.levels),
+            'proxies': sorted(self.proxies),
+            'error_classes': sorted(self.error_classes),
+            'buckets': {str(bucket): count for bucket, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict | None):
+        """从 manifest 结构恢复；缺失时返回 None。"""
+        if not payload:
+            return None
+        index = cls()
+        index.lines = int(payload.get('lines', 0))
+        index.min_ts = payload.get('min_ts')
+        index.max_ts = payload.get('max_ts')
+        index.levels = set(payload.get('levels', []))
+        index.proxies = set(payload.get('proxies', []))
+        index.error_classes = set(payload.get('error_classes', []))
+        index.buckets = {int(bucket): count for bucket, count in payload.get('buckets', {}).items()}
+        return index
+
+
+class LogIndex:
+    """随日志写入增量维护活动分段索引，并负责跨分段检索。"""
+
+    MAX_PAGE_SIZE = 500
+
+    def __init__(self, classify=None, clean=None):
+        self._classify = classify
+        self._clean = clean
+        self._lock = threading.Lock()
+        self._timestamp_parser = _TimestampParser()
+        self._active = SegmentIndex()
+        # 活动日志的标识，轮转或截断后更换，旧游标随之失效
+        self._active_id = uuid.uuid4().hex[:12]
+
+    def _prepare(self, raw_line: str) -> str:
+        """与写入缓冲区时一致地清理磁盘上的原始行。"""
+        line = raw_line.strip()
+        if line and self._clean is not None:
+            line = self._clean(line)
+        return line
+
+    def add_line(self, line: str, classification=None):
+        """登记活动分段中的一行新日志，分类结果由调用方在读取时一并给出。"""
+        with self._lock:
+            self._active.add(parse_log_line(line, self._timestamp_parser), classification)
+
+    def reset(self, complete: bool = True):
+        """活动日志被截断后重置索引；complete 为 False 表示索引未覆盖已有内容。"""
+        with self._lock:
+            self._active = SegmentIndex(complete=complete)
+            self._active_id = uuid.uuid4().hex[:12]
+
+    def take_active_snapshot(self) -> dict | None:
+        """活动日志轮转时取出其索引并开始新的活动索引；索引不完整时返回 None。"""
+        with self._lock:
+            snapshot = self._active.to_dict() if self._active.complete else None
+            self._active = SegmentIndex()
+            self._active_id = uuid.uuid4().hex[:12]
+        return snapshot
+
+    def active_index(self) -> tuple[str, SegmentIndex]:
+        """返回活动日志标识与其索引的副本。"""
+        with self._lock:
+            return self._active_id, self._active.copy()
+
+    def build_index(self, lines) -> SegmentIndex:
+        """为缺少索引的历史分段扫描建立索引。"""
+        index = SegmentIndex()
+        parser = _TimestampParser()
+        for raw_line in lines:
+            line = self._prepare(raw_line)
+            if not line:
+                continue
+            parsed = parse_log_line(line, parser)
+            index.add(parsed, self._classify(line) if self._classify is not None else None)
+        return index
+
+    @staticmethod
+    def normalize_level(level: str | None):
+        """将级别参数规范化为 frpc 日志中的单字母标记。"""
+        if not level:
+            return None
+        return LEVEL_ALIASES.get(level.strip().lower())
+
+    @staticmethod
+    def _line_matches(parsed: dict, classification, filters: dict) -> bool:
+        if filters.get('level') and parsed['level'] != filters['level']:
+            return False
+        if filters.get('proxy') and parsed['proxy'] != filters['proxy']:
+            return False
+        if filters.get('error_class') and (
+            classification is None or filters['error_class'] not in (classification.error_class, classification.category)
+        ):
+            return False
+        ts = parsed['ts']
+        if filters.get('since') is not None and (ts is None or ts < filters['since']):
+            return False
+        if filters.get('until') is not None and (ts is None or ts > filters['until']):
+            return False
+        return True
+
+    def _scan_source(self, lines, filters: dict, before_line: int | None, limit: int):
+        """正向扫描单个分段，只保留游标之前最新的 limit + 1 条匹配。"""
+        parser = _TimestampParser()
+        matches = deque(maxlen=limit + 1)
+        for line_no, raw_line in enumerate(lines, start=1):
+            if before_line is not None and line_no >= before_line:
+                break
+            line = self._prepare(raw_line)
+            if not line:
+                continue
+            query = filters.get('query')
+            if query and query not in line.lower():
+                continue
+            parsed = parse_log_line(line, parser)
+            classification = self._classify(line) if self._classify is not None else None
+            if self._line_matches(parsed, classification, filters):
+                matches.append({
+                    'line_no': line_no,
+                    'ts': parsed['ts'],
+                    'level': LEVEL_NAMES.get(parsed['level'], parsed['level']),
+                    'proxy': parsed['proxy'],
+                    'error_class': classification.error_class if classification else None,
+                    'category': classification.category if classification else None,
+                    'text': line,
+                })
+        return list(matches)
+
+    @staticmethod
+    def _resolve_cursor(cursor: str | None, sources: list[dict]) -> tuple[int, int | None]:
+        """解析 “分段名:分段标识:行号” 格式的游标，返回起始分段位置与行号上限；行号为空表示从分段末尾开始。"""
+        if not cursor:
+            return 0, None
+        parts = cursor.rsplit(':', 2)
+        if len(parts) != 3 or not parts[0] or not parts[1] or (parts[2] and not parts[2].isdigit()):
+            raise LogCursorError('分页游标格式无效')
+        cursor_source, cursor_id, cursor_line = parts
+        for position, source in enumerate(sources):
+            name = source['display_name']
+            # 分段在两次翻页之间可能已被压缩改名
+            if cursor_source not in (name, name.removesuffix('.gz')):
+                continue
+            if source['id'] != cursor_id:
+                raise LogCursorError(f'日志 {cursor_source} 已轮转或被清空，请重新检索')
+            return position, int(cursor_line) if cursor_line else None
+        raise LogCursorError(f'游标对应的日志分段 {cursor_source} 已不存在，请重新检索')
+
+    def search(self, segment_store, query: str = '', level: str | None = None, proxy: str | None = None,
+               error_class: str | None = None, since: float | None = None, until: float | None = None,
+               cursor: str | None = None, limit: int = 50) -> dict:
+        """按从新到旧的顺序分页检索日志，索引表明不可能命中的分段直接跳过。"""
+        limit = max(1, min(int(limit), self.MAX_PAGE_SIZE))
+        filters = {
+            'query': (query or '').strip().lower(),
+            'level': self.normalize_level(level),
+            'proxy': proxy or None,
+            'error_class': error_class or None,
+            'since': since,
+            'until': until,
+        }
+        if level and not filters['level']:
+            return {'matches': [], 'next_cursor': None, 'scanned': [], 'skipped': []}
+
+        active_id, active_index = self.active_index()
+        sources = [{'name': None, 'id': active_id, 'index': active_index}]
+        for segment in segment_store.segments():
+            index = SegmentIndex.from_dict(segment.get('index'))
+            if index is None:
+                # 升级前产生的历史分段没有索引，首次检索时补建并写回 manifest
+                try:
+                    with segment_store.open_segment(segment) as f:
+                        index = self.build_index(f)
+                except OSError:
+                    continue
+                segment_store.update_segment_index(segment['name'], index.to_dict())
+            sources.append({
+                'name': segment['name'],
+                'id': f"{segment.get('rotated_at', 0):.6f}",
+                'index': index,
+                'segment': segment,
+            })
+
+        active_name = segment_store.active_name
+        for source in sources:
+            source['display_name'] = source['name'] or active_name
+        start, before_line = self._resolve_cursor(cursor, sources)
+
+        results = []
+        scanned = []
+        skipped = []
+        next_cursor = None
+        for position in range(start, len(sources)):
+            source = sources[position]
+            name = source['display_name']
+            if position > start:
+                before_line = None
+            if not source['index'].can_match(filters):
+                skipped.append(name)
+                continue
+
+            scanned.append(name)
+            remaining = limit - len(results)
+            try:
+                if source['name'] is None:
+                    with open(segment_store.log_path, 'r', encoding='utf-8', errors='replace') as f:
+                        matches = self._scan_source(f, filters, before_line, remaining)
+                else:
+                    with segment_store.open_segment(source['segment']) as f:
+                        matches = self._scan_source(f, filters, before_line, remaining)
+            except OSError:
+                continue
+
+            if len(matches) > remaining:
+                matches = matches[1:]
+                next_cursor = f"{name}:{source['id']}:{matches[0]['line_no']}"
+            for match in reversed(matches):
+                match['segment'] = name
+                results.append(match)
+            if next_cursor:
+                break
+            if len(results) >= limit:
+                # 本分段已取尽，下一页从更旧的分段开始
+                if position + 1 < len(sources):
+                    older = sources[position + 1]
+                    next_cursor = f"{older['display_name']}:{older['id']}:"
+                break
+
+        return {
+            'matches': results,
+            'next_cursor': next_cursor,
+            'scanned': scanned,
+            'skipped': skipped,
+        }
@@ -0,0 +1,266 @@
+"""frpc 日志分段轮转与压缩。"""
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import deque
+
+from app.utils.log_tail import tail_lines
+
+logger = logging.getLogger(__name__)
+
+
+class LogSegmentStore:
+    """按大小与时间轮转 frpc.log，旧分段后台 gzip 压缩，并用 manifest 记录分段顺序。"""
+
+    DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+    DEFAULT_BACKUP_COUNT = 5
+    DEFAULT_ROTATE_INTERVAL_HOURS = 24
+
+    def __init__(self, log_path: str, max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT,
+                 rotate_interval: float = DEFAULT_ROTATE_INTERVAL_HOURS * 3600):
+        self.log_path = log_path
+        self.log_dir = os.path.dirname(log_path)
+        self.manifest_path = f'{log_path}.manifest.json'
+        self.max_bytes = max_bytes
+        self.backup_count = max(backup_count, 0)
+        self.rotate_interval = rotate_interval
+        # 轮转时提供活动日志索引的回调，索引随分段一起写入 manifest
+        self.index_provider = None
+        self._lock = threading.RLock()
+        self._compress_lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    @classmethod
+    def from_env(cls, log_path: str):
+        """根据环境变量构建轮转策略。"""
+        def read_number(name: str, default, cast):
+            try:
+                return cast(os.getenv(name, default))
+            except (TypeError, ValueError):
+                return default
+
+        return cls(
+            log_path,
+            max_bytes=read_number('FRPC_LOG_MAX_BYTES', cls.DEFAULT_MAX_BYTES, int),
+            backup_count=read_number('FRPC_LOG_BACKUP_COUNT', cls.DEFAULT_BACKUP_COUNT, int),
+            rotate_interval=read_number(
+                'FRPC_LOG_ROTATE_INTERVAL_HOURS', cls.DEFAULT_ROTATE_INTERVAL_HOURS, float
+            ) * 3600,
+        )
+
+    def _load_manifest(self) -> dict:
+        """读取 manifest，并剔除磁盘上已不存在的分段。"""
+        manifest = {'active_started_at': 0.0, 'segments': []}
+        try:
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+                manifest['active_started_at'] = float(payload.get('active_started_at') or 0.0)
+                manifest['segments'] = [
+                    segment for segment in payload.get('segments', [])
+                    if os.path.exists(os.path.join(self.log_dir, segment.get('name', '')))
+                ]
+        except Exception as e:
+            logger.warning(f'读取 frpc 日志 manifest 失败，将重新生成: {str(e)}')
+
+        if not manifest['active_started_at']:
+            try:
+                manifest['active_started_at'] = os.path.getmtime(self.log_path)
+            except OSError:
+                manifest['active_started_at'] = time.time()
+        return manifest
+
+    def _save_manifest(self):
+        """原子写入 manifest。"""
+        temp_path = f'{self.manifest_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    @property
+    def active_name(self) -> str:
+        """活动日志文件名。"""
+        return os.path.basename(self.log_path)
+
+    def segments(self) -> list[dict]:
+        """返回分段列表（从新到旧）。"""
+        with self._lock:
+            return [dict(segment) for segment in reversed(self._manifest['segments'])]
+
+    def segment_path(self, segment: dict) -> str:
+        """返回分段文件的绝对路径。"""
+        return os.path.join(self.log_dir, segment['name'])
+
+    def should_rotate(self, current_size: int) -> bool:
+        """判断当前活动日志是否达到轮转条件。"""
+        if self.max_bytes > 0 and current_size >= self.max_bytes:
+            return True
+        if self.rotate_interval > 0 and current_size > 0:
+            with self._lock:
+                started_at = self._manifest['active_started_at']
+            return (time.time() - started_at) >= self.rotate_interval
+        return False
+
+    def _next_segment_name(self, rotated_at: float) -> str:
+        base_name = f"{os.path.basename(self.log_path)}.{time.strftime('%Y%m%d-%H%M%S', time.localtime(rotated_at))}"
+        candidate = base_name
+        index = 1
+        while os.path.exists(os.path.join(self.log_dir, candidate)) or os.path.exists(
+            os.path.join(self.log_dir, f'{candidate}.gz')
+        ):
+            candidate = f'{base_name}.{index}'
+            index += 1
+        return candidate
+
+    def rotate(self, copy_truncate: bool = False) -> dict | None:
+        """将活动日志转为新分段。
+
+        copy_truncate 用于 frpc 直接持有日志句柄的 file 模式：复制后原地截断，
+        否则直接重命名，由唯一写入方重新打开新文件。
+        """
+        with self._lock:
+            try:
+                size = os.path.getsize(self.log_path)
+            except OSError:
+                return None
+            if size == 0:
+                if self.index_provider is not None:
+                    self.index_provider()
+                self._manifest['active_started_at'] = time.time()
+                self._save_manifest()
+                return None
+
+            rotated_at = time.time()
+            name = self._next_segment_name(rotated_at)
+            segment_path = os.path.join(self.log_dir, name)
+            if copy_truncate:
+                with open(self.log_path, 'rb') as source, open(segment_path, 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                os.truncate(self.log_path, 0)
+            else:
+                os.rename(self.log_path, segment_path)
+
+            segment = {
+                'name': name,
+                'started_at': self._manifest['active_started_at'],
+                'rotated_at': rotated_at,
+                'bytes': size,
+                'compressed': False,
+            }
+            if self.index_provider is not None:
+                index = self.index_provider()
+                if index is not None:
+                    segment['index'] = index
+            self._manifest['segments'].append(segment)
+            self._manifest['active_started_at'] = rotated_at
+            self._prune_locked()
+            self._save_manifest()
+
+        threading.Thread(target=self._compress_pending, name='frpc-log-compress', daemon=True).start()
+        return dict(segment)
+
+    def update_segment_index(self, name: str, index: dict):
+        """为历史分段补写索引。"""
+        with self._lock:
+            for segment in self._manifest['segments']:
+                if segment['name'] == name:
+                    segment['index'] = index
+                    self._save_manifest()
+                    return
+
+    def _prune_locked(self):
+        """删除超出保留数量的最旧分段。"""
+        while len(self._manifest['segments']) > self.backup_count:
+            segment = self._manifest['segments'].pop(0)
+            try:
+                os.remove(self.segment_path(segment))
+            except OSError:
+                pass
+
+    def _compress_pending(self):
+        """后台压缩除最新分段以外的未压缩分段，最新分段保留明文以便快速跨段读取尾部。"""
+        if not self._compress_lock.acquire(blocking=False):
+            return
+        try:
+            while True:
+                with self._lock:
+                    pending = [
+                        dict(segment) for segment in self._manifest['segments'][:-1]
+                        if segment['compressed'] is False
+                    ]
+                if not pending:
+                    return
+                for segment in pending:
+                    self._compress_segment(segment)
+        finally:
+            self._compress_lock.release()
+
+    def _compress_segment(self, segment: dict):
+        """gzip 压缩单个分段并更新 manifest。"""
+        source_path = self.segment_path(segment)
+        compressed_name = f"{segment['name']}.gz"
+        compressed_path = os.path.join(self.log_dir, compressed_name)
+        temp_path = f'{compressed_path}.tmp'
+        try:
+            with open(source_path, 'rb') as source, gzip.open(temp_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.replace(temp_path, compressed_path)
+        except Exception as e:
+            logger.warning(f"压缩 frpc 日志分段失败: {segment['name']}, 错误: {str(e)}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            with self._lock:
+                # 标记为已处理，避免反复重试同一个损坏分段
+                for item in self._manifest['segments']:
+                    if item['name'] == segment['name']:
+                        item['compressed'] = None
+            return
+
+        with self._lock:
+            for item in self._manifest['segments']:
+                if item['name'] == segment['name']:
+                    item['name'] = compressed_name
+                    item['compressed'] = True
+                    break
+            else:
+                # 压缩期间分段已被清理
+                os.remove(compressed_path)
+                return
+            self._save_manifest()
+        try:
+            os.remove(source_path)
+        except OSError:
+            pass
+
+    def open_segment(self, segment: dict):
+        """以文本方式打开分段，自动处理压缩格式。"""
+        path = self.segment_path(segment)
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+        return open(path, 'r', encoding='utf-8', errors='replace')
+
+    def tail(self, lines: int, end_offset: int | None = None) -> list[str]:
+        """读取跨分段的最新若干行：先读活动日志，不足时按 manifest 顺序向前补齐。"""
+        result = tail_lines(self.log_path, lines, end_offset=end_offset)
+        for segment in self.segments():
+            if len(result) >= lines:
+                break
+            remaining = lines - len(result)
+            try:
+                if segment.get('compressed'):
+                    with self.open_segment(segment) as f:
+                        older = [line.rstrip('\r\n') for line in deque(
+                            (line for line in f if line.strip()), maxlen=remaining
+                        )]
+                else:
+                    older = tail_lines(self.segment_path(segment), remaining)
+            except OSError:
+                continue
+            result = older + result
+        return result[-lines:] if lines > 0 else []
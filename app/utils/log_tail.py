@@ -0,0 +1,49 @@
+"""日志尾部读取工具。"""
+import os
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+def tail_lines(path: str, lines: int, end_offset: int | None = None, block_size: int = DEFAULT_BLOCK_SIZE,
+               encoding: str = 'utf-8') -> list[str]:
+    """从文件末尾按块反向读取，返回最后若干个非空行，开销只与请求行数相关。
+
+    每个块只切分一次，完整的行从新到旧逐行解码，已读取的数据不会重复拼接或解码；
+    跨块的行尾片段暂存在列表中，凑齐整行后才拼接。
+    """
+    if lines <= 0 or not os.path.exists(path):
+        return []
+
+    result = []
+    # 当前最早一行已读到的片段，按从后往前的读取顺序存放
+    pending = []
+
+    def collect(raw: bytes) -> bool:
+        if not raw.strip():
+            return False
+        line = raw.decode(encoding, errors='replace').rstrip('\r')
+        if line.strip():
+            result.append(line)
+        return len(result) >= lines
+
+    with open(path, 'rb') as f:
+        position = os.fstat(f.fileno()).st_size if end_offset is None else end_offset
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            pieces = f.read(read_size).split(b'\n')
+            pending.append(pieces[-1])
+            if len(pieces) == 1:
+                continue
+            # pieces[-1] 与此前的片段组成一整行，pieces[1:-1] 是完整的行，pieces[0] 可能被截断
+            if collect(b''.join(reversed(pending))):
+                break
+            if any(collect(piece) for piece in reversed(pieces[1:-1])):
+                break
+            pending = [pieces[0]]
+        else:
+            if pending:
+                collect(b''.join(reversed(pending)))
+    result.reverse()
+    return result[-lines:]
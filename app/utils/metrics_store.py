@@ -0,0 +1,191 @@
+"""按实例、代理与指标分组的定长时间序列存储。"""
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+
+# (分辨率秒数, 槽位数)：默认保留 2 分钟秒级、2 小时分钟级与 2 天小时级数据
+DEFAULT_RESOLUTIONS = ((1, 120), (60, 120), (3600, 48))
+
+
+class MetricRing:
+    """单一分辨率的环形缓冲：每个槽位记录时间桶编号与桶内采样的和、次数与最大值，内存在创建时即固定。"""
+
+    __slots__ = ('resolution', 'capacity', '_buckets', '_sums', '_counts', '_maxes')
+
+    # 每个槽位：8 字节桶编号 + 8 字节和 + 4 字节次数 + 8 字节最大值
+    SLOT_BYTES = array('q').itemsize + array('d').itemsize * 2 + array('I').itemsize
+
+    def __init__(self, resolution: int, capacity: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self._buckets = array('q', [-1]) * capacity
+        self._sums = array('d', [0.0]) * capacity
+        self._counts = array('I', [0]) * capacity
+        self._maxes = array('d', [0.0]) * capacity
+
+    def add(self, timestamp: float, value: float):
+        """写入一个采样点，同一时间桶内累计和、次数与最大值；槽位被新的时间桶占用时清零重计。"""
+        bucket = int(timestamp // self.resolution)
+        slot = bucket % self.capacity
+        current = self._buckets[slot]
+        if current > bucket:
+            return
+        if current < bucket:
+            self._buckets[slot] = bucket
+            self._sums[slot] = value
+            self._counts[slot] = 1
+            self._maxes[slot] = value
+            return
+        self._sums[slot] += value
+        self._counts[slot] += 1
+        if value > self._maxes[slot]:
+            self._maxes[slot] = value
+
+    def covers(self, start: float, now: float) -> bool:
+        """环形缓冲的保留窗口是否覆盖 start。"""
+        return start >= now - self.resolution * self.capacity
+
+    def range(self, start: float, end: float) -> list[list]:
+        """返回 [start, end] 内有数据的时间桶 [时间, 平均值, 最大值]，耗时与窗口内的槽位数成正比。"""
+        first = int(start // self.resolution)
+        last = int(end // self.resolution)
+        first = max(first, last - self.capacity + 1)
+        points = []
+        for bucket in range(first, last + 1):
+            slot = bucket % self.capacity
+            if self._buckets[slot] == bucket:
+                points.append([
+                    bucket * self.resolution,
+                    self._sums[slot] / self._counts[slot],
+                    self._maxes[slot],
+                ])
+        return points
+
+
+class MetricsStore:
+    """进程内指标存储：每条序列一组多分辨率环形缓冲，序列数有上限，超出时淘汰最久未写入的序列。
+
+    内存上限约为 max_series × bytes_per_series，与代理数量和运行时长无关。
+    """
+
+    MAX_EVENTS = 1000
+
+    def __init__(self, resolutions=DEFAULT_RESOLUTIONS, max_series: int = 10000):
+        self.resolutions = tuple(sorted((int(res), int(cap)) for res, cap in resolutions))
+        self.max_series = max(int(max_series), 1)
+        self._lock = threading.Lock()
+        self._series = OrderedDict()
+        self._events = deque(maxlen=self.MAX_EVENTS)
+        self.evicted = 0
+
+    @classmethod
+    def from_env(cls):
+        """根据环境变量构建指标存储。"""
+        try:
+            max_series = int(os.getenv('METRICS_MAX_SERIES', 10000))
+        except ValueError:
+            max_series = 10000
+        return cls(max_series=max_series)
+
+    @property
+    def bytes_per_series(self) -> int:
+        return sum(MetricRing.SLOT_BYTES * capacity for _, capacity in self.resolutions)
+
+    def _rings_locked(self, key: tuple) -> list[MetricRing]:
+        rings = self._series.get(key)
+        if rings is None:
+            if len(self._series) >= self.max_series:
+                self._series.popitem(last=False)
+                self.evicted += 1
+            rings = [MetricRing(resolution, capacity) for resolution, capacity in self.resolutions]
+            self._series[key] = rings
+        else:
+            self._series.move_to_end(key)
+        return rings
+
+    def record(self, instance_id: str, proxy: str, metric: str, value: float, timestamp: float | None = None):
+        """写入单个采样点。"""
+        self.record_many(instance_id, [(proxy, metric, value)], timestamp)
+
+    def record_many(self, instance_id: str, samples, timestamp: float | None = None):
+        """在一次加锁内写入同一时刻的多个 (代理, 指标, 值) 采样点。"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for proxy, metric, value in samples:
+                for ring in self._rings_locked((instance_id, proxy, metric)):
+                    ring.add(timestamp, float(value))
+
+    def record_event(self, instance_id: str, proxy: str, previous: str, current: str,
+                     timestamp: float | None = None):
+        """记录代理状态变化。"""
+        with self._lock:
+            self._events.append({
+                'time': time.time() if timestamp is None else timestamp,
+                'instance': instance_id,
+                'proxy': proxy,
+                'from': previous,
+                'to': current,
+            })
+
+    def events(self, instance_id: str, proxy: str | None = None, start: float = 0.0) -> list[dict]:
+        """返回状态变化记录（从旧到新）。"""
+        with self._lock:
+            return [
+                event for event in self._events
+                if event['instance'] == instance_id and event['time'] >= start
+                and (proxy is None or event['proxy'] == proxy)
+            ]
+
+    def query(self, instance_id: str, proxy: str, metric: str, start: float | None = None,
+              end: float | None = None, resolution: int | None = None) -> dict:
+        """返回一条序列在 [start, end] 内的数据点。
+
+        未指定 start 时返回最细分辨率的整个保留窗口；未指定分辨率时取保留窗口能覆盖 start 的最细分辨率。
+        """
+        now = time.time()
+        end = now if end is None else end
+        if start is None:
+            resolution_seconds, capacity = self.resolutions[0]
+            start = end - resolution_seconds * (capacity - 1)
+        with self._lock:
+            rings = self._series.get((instance_id, proxy, metric))
+            if rings is None:
+                return {'resolution': resolution, 'points': []}
+            if resolution is not None:
+                ring = next((item for item in rings if item.resolution == resolution), None)
+                if ring is None:
+                    raise ValueError(f'不支持的分辨率: {resolution}')
+            else:
+                ring = next((item for item in rings if item.covers(start, now)), rings[-1])
+            return {'resolution': ring.resolution, 'points': ring.range(start, end)}
+
+    def series(self, instance_id: str | None = None) -> list[dict]:
+        """列出已有的序列。"""
+        with self._lock:
+            keys = list(self._series)
+        return [
+            {'instance': key[0], 'proxy': key[1], 'metric': key[2]}
+            for key in keys if instance_id is None or key[0] == instance_id
+        ]
+
+    def forget(self, instance_id: str, proxy: str | None = None):
+        """删除实例（或其中一个代理）的全部序列。"""
+        with self._lock:
+            for key in [key for key in self._series if key[0] == instance_id and (proxy is None or key[1] == proxy)]:
+                del self._series[key]
+
+    def stats(self) -> dict:
+        """返回序列数量与内存占用。"""
+        with self._lock:
+            count = len(self._series)
+        return {
+            'series': count,
+            'max_series': self.max_series,
+            'evicted': self.evicted,
+            'bytes_per_series': self.bytes_per_series,
+            'bytes': count * self.bytes_per_series,
+            'max_bytes': self.max_series * self.bytes_per_series,
+            'resolutions': [{'seconds': res, 'slots': cap} for res, cap in self.resolutions],
+        }
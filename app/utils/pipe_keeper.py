@@ -0,0 +1,145 @@
+"""frpc 输出管道守护进程。
+
+面板的管道读取线程在锁文件上持有排他锁；面板退出（包括被强制结束）后锁由内核释放，守护进程随即取得锁，
+把管道中的输出原样追加到日志文件，避免管道写满后 frpc 的日志写入阻塞。面板重新附着时发送 SIGUSR1，
+守护进程释放锁并重新等待。frpc 退出后守护进程排空管道随之退出。
+
+本文件只依赖标准库，由面板以独立脚本方式启动：
+    python pipe_keeper.py <fifo> <lock> <log> <frpc_pid>
+"""
+import fcntl
+import os
+import select
+import signal
+import sys
+import threading
+import time
+
+READ_CHUNK_SIZE = 64 * 1024
+# 面板持有锁时重试取锁的间隔；面板退出不会产生通知，只能轮询
+LOCK_POLL_INTERVAL = 0.2
+# 让出锁后等待面板取得锁的时间，避免守护进程立即重新抢到锁
+YIELD_GRACE = 1.0
+
+
+def wait_process_exit(pid: int):
+    """阻塞到进程退出：优先使用 pidfd，不支持时每秒检查一次。"""
+    if hasattr(os, 'pidfd_open'):
+        try:
+            fd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return
+        except OSError:
+            fd = None
+        if fd is not None:
+            try:
+                select.select([fd], [], [])
+            finally:
+                os.close(fd)
+            return
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return
+        except PermissionError:
+            pass
+        time.sleep(1)
+
+
+def clear_wakeups(wake_r: int):
+    try:
+        while os.read(wake_r, 4096):
+            pass
+    except BlockingIOError:
+        pass
+
+
+def read_available(fifo_fd: int, log_file):
+    """读出管道中现有的全部数据，读到 EOF 或管道为空时返回。"""
+    while True:
+        try:
+            data = os.read(fifo_fd, READ_CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        if not data:
+            return
+        log_file.write(data)
+
+
+def acquire_lock(lock_fd: int, wake_r: int, exiting: threading.Event) -> bool:
+    """取得排他锁后返回 True；frpc 已退出而锁仍由面板持有时返回 False，剩余输出由面板读取。"""
+    while True:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            pass
+        if exiting.is_set():
+            return False
+        select.select([wake_r], [], [], LOCK_POLL_INTERVAL)
+        clear_wakeups(wake_r)
+
+
+def drain(fifo_fd: int, wake_r: int, log_path: str):
+    """持有锁期间把管道输出追加到日志文件，收到让出请求或 frpc 退出时返回。"""
+    with open(log_path, 'ab', buffering=0) as log_file:
+        while True:
+            readable, _, _ = select.select([fifo_fd, wake_r], [], [])
+            if wake_r in readable:
+                clear_wakeups(wake_r)
+                return
+            try:
+                data = os.read(fifo_fd, READ_CHUNK_SIZE)
+            except BlockingIOError:
+                continue
+            if data:
+                log_file.write(data)
+
+
+def main(argv) -> int:
+    fifo_path, lock_path, log_path, frpc_pid = argv[1], argv[2], argv[3], int(argv[4])
+
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.signal(signal.SIGUSR1, lambda signum, frame: None)
+    signal.set_wakeup_fd(wake_w)
+
+    fifo_fd = os.open(fifo_path, os.O_RDONLY | os.O_NONBLOCK)
+    # 自身持有一个写端，frpc 退出后读端不会持续返回 EOF
+    keepalive_fd = os.open(fifo_path, os.O_WRONLY | os.O_NONBLOCK)
+    lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    exiting = threading.Event()
+
+    def watch_frpc():
+        # 只通知主线程，是否退出由主线程在取锁与排空之后决定，避免持锁后尚未排空就退出
+        wait_process_exit(frpc_pid)
+        exiting.set()
+        os.write(wake_w, b'x')
+
+    threading.Thread(target=watch_frpc, daemon=True).start()
+
+    while acquire_lock(lock_fd, wake_r, exiting):
+        clear_wakeups(wake_r)
+        if not exiting.is_set():
+            drain(fifo_fd, wake_r, log_path)
+        if exiting.is_set():
+            # 关闭自身的写端后读到 EOF 再退出；面板仍持有写端时读空管道即可，frpc 已退出不会再有新输出
+            os.close(keepalive_fd)
+            keepalive_fd = None
+            with open(log_path, 'ab', buffering=0) as log_file:
+                read_available(fifo_fd, log_file)
+            break
+        fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        time.sleep(YIELD_GRACE)
+
+    for fd in (fifo_fd, keepalive_fd, lock_fd):
+        if fd is not None:
+            os.close(fd)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
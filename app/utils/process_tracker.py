@@ -0,0 +1,294 @@
+"""frpc 进程跟踪工具。"""
+import json
+import logging
+import os
+import select
+import threading
+import time
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessTracker:
+    """记录 frpc 的 PID 与启动时间，优先 O(1) 校验存活，仅在必要时全量扫描进程表。"""
+
+    PROCESS_NAME = 'frpc'
+    CREATE_TIME_TOLERANCE = 0.01
+    DEFAULT_SCAN_COOLDOWN = 10.0
+
+    def __init__(self, config_path: str, pidfile_path: str, scan_cooldown: float | None = None, on_adopt=None):
+        self.config_path = config_path
+        self.pidfile_path = pidfile_path
+        # 扫描接管到面板外启动的进程时以 PID 回调，供调用方登记退出等待
+        self.on_adopt = on_adopt
+        if scan_cooldown is None:
+            try:
+                scan_cooldown = float(os.getenv('FRPC_SCAN_COOLDOWN_SECONDS', self.DEFAULT_SCAN_COOLDOWN))
+            except ValueError:
+                scan_cooldown = self.DEFAULT_SCAN_COOLDOWN
+        self.scan_cooldown = max(scan_cooldown, 0.0)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._create_time = None
+        self._process = None
+        self._last_empty_scan_at = 0.0
+        self._load_pidfile()
+
+    def _load_pidfile(self):
+        """从 pidfile 恢复上次记录的进程信息。"""
+        try:
+            if not os.path.exists(self.pidfile_path):
+                return
+            with open(self.pidfile_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            if payload.get('config_path') != self.config_path:
+                return
+            self._pid = int(payload['pid'])
+            self._create_time = float(payload['create_time'])
+        except Exception as e:
+            logger.warning(f'读取 frpc pidfile 失败，将回退为进程扫描: {str(e)}')
+            self._pid = None
+            self._create_time = None
+
+    def _write_pidfile(self, pid: int, create_time: float):
+        """原子写入 pidfile。"""
+        try:
+            os.makedirs(os.path.dirname(self.pidfile_path), exist_ok=True)
+            temp_path = f'{self.pidfile_path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'pid': pid,
+                    'create_time': create_time,
+                    'config_path': self.config_path,
+                }, f)
+            os.replace(temp_path, self.pidfile_path)
+        except Exception as e:
+            logger.warning(f'写入 frpc pidfile 失败: {str(e)}')
+
+    def _remove_pidfile(self):
+        """删除 pidfile。"""
+        try:
+            if os.path.exists(self.pidfile_path):
+                os.remove(self.pidfile_path)
+        except Exception as e:
+            logger.warning(f'删除 frpc pidfile 失败: {str(e)}')
+
+    def matches(self, proc: psutil.Process) -> bool:
+        """判断进程是否为当前配置对应的 frpc。"""
+        try:
+            return proc.name() == self.PROCESS_NAME and self.config_path in proc.cmdline()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return False
+
+    def track(self, pid: int):
+        """登记新的 frpc 进程。"""
+        try:
+            proc = psutil.Process(pid)
+            create_time = proc.create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            self.clear()
+            return None
+
+        with self._lock:
+            self._pid = pid
+            self._create_time = create_time
+            self._process = proc
+            self._last_empty_scan_at = 0.0
+        self._write_pidfile(pid, create_time)
+        return proc
+
+    def clear(self):
+        """清空跟踪信息。"""
+        with self._lock:
+            self._pid = None
+            self._create_time = None
+            self._process = None
+        self._remove_pidfile()
+
+    def forget(self, pid: int):
+        """进程退出后清空跟踪信息；已改为跟踪其他 PID 时不做处理。"""
+        with self._lock:
+            if self._pid != pid:
+                return
+        self.clear()
+
+    def cached(self):
+        """返回最近一次确认的 (PID, 启动时间)，只读内存不访问进程表；未跟踪时返回 None。"""
+        with self._lock:
+            if self._pid is None or self._create_time is None:
+                return None
+            return self._pid, self._create_time
+
+    def _check_tracked(self):
+        """O(1) 校验已跟踪的 PID 是否仍是同一个存活的 frpc 进程。"""
+        with self._lock:
+            pid = self._pid
+            create_time = self._create_time
+            proc = self._process
+
+        if pid is None:
+            return None
+
+        try:
+            if proc is None:
+                # 首次从 pidfile 恢复时额外校验命令行，防止误认其他进程
+                proc = psutil.Process(pid)
+                if not self.matches(proc):
+                    return None
+            elif not proc.is_running():
+                # psutil.Process 会缓存自己的 create_time，需由 is_running() 重新读取进程表比对，
+                # 才能发现 PID 已被其他进程复用
+                return None
+            if abs(proc.create_time() - create_time) > self.CREATE_TIME_TOLERANCE:
+                return None
+            if proc.status() == psutil.STATUS_ZOMBIE:
+                return None
+            with self._lock:
+                if self._pid == pid:
+                    self._process = proc
+            return proc
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+    def scan(self):
+        """全量扫描进程表，返回所有匹配的 frpc 进程。"""
+        matched = []
+        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+            try:
+                if proc.info['name'] == self.PROCESS_NAME and self.config_path in (proc.info['cmdline'] or []):
+                    matched.append(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        return matched
+
+    def _check_or_clear(self):
+        """校验已跟踪的进程，失效时清空跟踪信息并允许立即扫描。"""
+        proc = self._check_tracked()
+        if proc is not None:
+            return proc
+
+        with self._lock:
+            had_tracked_pid = self._pid is not None
+        if had_tracked_pid:
+            # 跟踪的进程刚刚失效，立即允许一次扫描以发现可能的替代进程
+            self.clear()
+            self.request_scan()
+        return None
+
+    def _scan_due(self, force_scan: bool = False) -> bool:
+        return force_scan or (time.time() - self._last_empty_scan_at) >= self.scan_cooldown
+
+    def request_scan(self):
+        """结束扫描冷却期：启停、进程退出等事件后下一次查询立即扫描，及时发现面板外启动的 frpc。"""
+        self._last_empty_scan_at = 0.0
+
+    def adopt(self, candidates):
+        """从扫描结果中接管第一个可跟踪的进程；没有候选进程时进入扫描冷却期。"""
+        for candidate in candidates:
+            tracked = self.track(candidate.pid)
+            if tracked is not None:
+                logger.info(f'进程扫描发现 frpc 进程，已重新跟踪 PID: {candidate.pid}')
+                if self.on_adopt is not None:
+                    self.on_adopt(candidate.pid)
+                return tracked
+        self._last_empty_scan_at = time.time()
+        return None
+
+    def find(self, allow_scan: bool = True, force_scan: bool = False):
+        """返回当前存活的 frpc 进程；跟踪的 PID 失效或被复用时才回退为全量扫描。"""
+        proc = self._check_or_clear()
+        if proc is not None:
+            return proc
+        if not allow_scan or not self._scan_due(force_scan):
+            return None
+        return self.adopt(self.scan())
+
+    @classmethod
+    def refresh_many(cls, trackers):
+        """为多个跟踪器共用一次进程表扫描：只有跟踪失效且不在冷却期的跟踪器参与，按配置路径分发结果。"""
+        pending = {}
+        for tracker in trackers:
+            if tracker._check_or_clear() is None and tracker._scan_due():
+                pending[tracker.config_path] = tracker
+        if not pending:
+            return
+
+        matched = {config_path: [] for config_path in pending}
+        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+            try:
+                if proc.info['name'] != cls.PROCESS_NAME:
+                    continue
+                for arg in proc.info['cmdline'] or ():
+                    if arg in matched:
+                        matched[arg].append(proc)
+                        break
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        for config_path, tracker in pending.items():
+            tracker.adopt(matched[config_path])
+
+    @property
+    def pid(self):
+        """返回当前跟踪的 PID（不做存活校验）。"""
+        with self._lock:
+            return self._pid
+
+
+class ExitWatcher:
+    """等待进程退出后回调：Linux 下阻塞在 pidfd 上由内核唤醒，否则回退为 wait。"""
+
+    def __init__(self, on_exit):
+        self._on_exit = on_exit
+        self._lock = threading.Lock()
+        self._watching = set()
+
+    def watch(self, pid: int, popen=None):
+        """为进程启动一个等待线程，同一 PID 只等待一次。"""
+        with self._lock:
+            if pid in self._watching:
+                return
+            self._watching.add(pid)
+        threading.Thread(target=self._wait, args=(pid, popen), name=f'frpc-exit-watch-{pid}', daemon=True).start()
+
+    def watching(self) -> list[int]:
+        """返回正在等待退出的 PID。"""
+        with self._lock:
+            return sorted(self._watching)
+
+    def _wait(self, pid: int, popen):
+        try:
+            if not self._wait_pidfd(pid):
+                if popen is not None:
+                    popen.wait()
+                else:
+                    psutil.Process(pid).wait()
+            if popen is not None:
+                # 回收子进程，避免残留僵尸进程
+                popen.poll()
+        except psutil.NoSuchProcess:
+            pass
+        except Exception as e:
+            logger.warning(f'等待 frpc 进程退出失败，PID: {pid}, 错误: {str(e)}')
+        finally:
+            with self._lock:
+                self._watching.discard(pid)
+        self._on_exit(pid)
+
+    @staticmethod
+    def _wait_pidfd(pid: int) -> bool:
+        """通过 pidfd 阻塞等待进程退出；平台不支持时返回 False。"""
+        if not hasattr(os, 'pidfd_open'):
+            return False
+        try:
+            fd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            return False
+        try:
+            select.select([fd], [], [])
+        finally:
+            os.close(fd)
+        return True
@@ -0,0 +1,162 @@
+"""Prometheus 文本格式指标。"""
+import bisect
+import math
+import threading
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_sample(name: str, labels: dict, value) -> str:
+    """格式化一行样本。"""
+    if labels:
+        pairs = ','.join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+        return f'{name}{{{pairs}}} {_format_value(value)}'
+    return f'{name} {_format_value(value)}'
+
+
+class _Family:
+    """同名指标的全部标签组合；写入只在该指标自己的锁内做一次字典操作，采集时复制后再格式化。"""
+
+    TYPE = ''
+
+    def __init__(self, name: str, documentation: str, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def header(self) -> list[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.TYPE}']
+
+    def _labels(self, key: tuple) -> dict:
+        return dict(zip(self.label_names, key))
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [format_sample(self.name, self._labels(key), value) for key, value in values]
+
+
+class Counter(_Family):
+    """只增不减的计数器。"""
+
+    TYPE = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Family):
+    """可任意设置的瞬时值。"""
+
+    TYPE = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Family):
+    """固定分桶的直方图，每个标签组合保存各桶计数、总和与总数。"""
+
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [各桶计数..., 超出最大桶的计数, 总和]
+                state = [0] * (len(self.buckets) + 1) + [0.0]
+                self._values[key] = state
+            state[index] += 1
+            state[-1] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = [(key, list(state)) for key, state in self._values.items()]
+        lines = self.header()
+        for key, state in values:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state[:-1]):
+                cumulative += count
+                lines.append(format_sample(f'{self.name}_bucket', {**labels, 'le': _format_value(float(bound))}, cumulative))
+            lines.append(format_sample(f'{self.name}_sum', labels, state[-1]))
+            lines.append(format_sample(f'{self.name}_count', labels, cumulative))
+        return lines
+
+
+class MetricsRegistry:
+    """登记指标与采集回调，按 Prometheus 文本格式输出。
+
+    采集回调在抓取时调用，返回 (名称, 类型, 说明, [(标签, 值), ...]) 列表，用于进程状态这类按需读取的值。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = []
+        self._collectors = []
+
+    def _register(self, family):
+        with self._lock:
+            self._families.append(family)
+        return family
+
+    def counter(self, name: str, documentation: str, label_names=()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names=()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names=(), buckets=DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def add_collector(self, collector):
+        """登记抓取时调用的采集回调。"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> str:
+        """输出全部指标。"""
+        with self._lock:
+            families = list(self._families)
+            collectors = list(self._collectors)
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        for collector in collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                lines.extend(format_sample(name, labels, value) for labels, value in samples)
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,61 @@
+"""代理分片规划。"""
+import json
+import zlib
+
+
+def canonical_json(value) -> str:
+    """返回键有序、无多余空白的 JSON 文本，用于比较配置内容。"""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+
+
+def _lookup(proxy: dict, dotted_key: str):
+    """按 a.b.c 形式的路径读取代理字段。"""
+    value = proxy
+    for part in dotted_key.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def shard_key(proxy: dict, group_key: str = '') -> str:
+    """返回代理的分片键：配置了分组字段且代理带有该字段时按分组聚合，否则按代理名。"""
+    if group_key:
+        value = _lookup(proxy, group_key)
+        if value not in (None, ''):
+            return f'group:{value}'
+    return f"name:{proxy.get('name', '')}"
+
+
+def shard_index(key: str, shard_count: int) -> int:
+    """按稳定哈希计算分片序号，与进程和 Python 的哈希随机化无关。"""
+    return zlib.crc32(key.encode('utf-8')) % shard_count
+
+
+def plan_shards(config: dict, shard_count: int, group_key: str = '', exclude_fields=()) -> list[dict]:
+    """把启用的代理按稳定哈希分配到 shard_count 份 frpc 配置，代理以外的字段各分片共用。
+
+    同一代理在分片数不变时始终落在同一分片，增删代理只影响其所在分片。
+    配置了管理接口端口时，第 index 个分片使用 port + index，避免多个进程争用同一端口。
+    """
+    base = {
+        key: value for key, value in config.items()
+        if key != 'proxies' and key not in exclude_fields
+    }
+    buckets = [[] for _ in range(shard_count)]
+    for proxy in config.get('proxies') or []:
+        if not isinstance(proxy, dict) or proxy.get('enabled', True) is False:
+            continue
+        buckets[shard_index(shard_key(proxy, group_key), shard_count)].append(
+            {key: value for key, value in proxy.items() if key != 'enabled'}
+        )
+
+    shards = []
+    web_server = base.get('webServer')
+    for index, proxies in enumerate(buckets):
+        shard = dict(base)
+        if isinstance(web_server, dict) and web_server.get('port'):
+            shard['webServer'] = {**web_server, 'port': int(web_server['port']) + index}
+        shard['proxies'] = proxies
+        shards.append(shard)
+    return shards
@@ -0,0 +1,142 @@
+"""frpc 进程资源采样。"""
+import logging
+import os
+import threading
+import time
+from array import array
+
+import psutil
+
+from app.utils.event_scheduler import EventScheduler
+
+logger = logging.getLogger(__name__)
+
+# 字段名与 array 类型码：时间戳、CPU 与内存用 8 字节，其余计数用 4 字节
+SAMPLE_FIELDS = (
+    ('time', 'd'),
+    ('cpu_percent', 'd'),
+    ('rss', 'q'),
+    ('threads', 'i'),
+    ('fds', 'i'),
+    ('connections', 'i'),
+)
+
+
+class ResourceSampler:
+    """按固定间隔采样 frpc 进程的 CPU、内存、线程、文件描述符与连接数，写入定长环形缓冲。
+
+    采样线程持有同一个 psutil.Process 对象，只在 PID 或进程启动时间变化时替换，CPU 占用率据此按两次采样的间隔计算；
+    进程未运行时不设定时器，线程无限期休眠。
+    """
+
+    SAMPLE_TIMER = 'sample'
+    DEFAULT_INTERVAL = 5.0
+    DEFAULT_CAPACITY = 360
+
+    def __init__(self, process_provider, interval: float = DEFAULT_INTERVAL, capacity: int = DEFAULT_CAPACITY):
+        self._process_provider = process_provider
+        self.interval = max(interval, 0.5)
+        self.capacity = max(capacity, 1)
+        self._lock = threading.Lock()
+        self._columns = {name: array(code, [0]) * self.capacity for name, code in SAMPLE_FIELDS}
+        self._count = 0
+        self._next = 0
+        self._process = None
+        self._scheduler = EventScheduler(self._handle_events, name='frpc-resource-sampler')
+
+    @classmethod
+    def from_env(cls, process_provider):
+        """根据环境变量构建采样间隔与保留的样本数。"""
+        def read_number(name: str, default, cast):
+            try:
+                return cast(os.getenv(name, default))
+            except (TypeError, ValueError):
+                return default
+
+        return cls(
+            process_provider,
+            interval=read_number('FRPC_RESOURCE_SAMPLE_SECONDS', cls.DEFAULT_INTERVAL, float),
+            capacity=read_number('FRPC_RESOURCE_HISTORY_SIZE', cls.DEFAULT_CAPACITY, int),
+        )
+
+    def start(self):
+        """启动采样线程并立即检查一次。"""
+        self._scheduler.start()
+        self._scheduler.notify('startup')
+
+    def stop(self):
+        """停止采样线程。"""
+        self._scheduler.stop()
+
+    def is_alive(self) -> bool:
+        """采样线程是否存活。"""
+        return self._scheduler.is_alive()
+
+    def wake(self, reason: str):
+        """进程启停后重新判断是否需要采样。"""
+        self._scheduler.notify(reason)
+
+    def _handle_events(self, reasons):
+        tracked = self._process_provider()
+        if tracked is None:
+            self._process = None
+            self._scheduler.cancel(self.SAMPLE_TIMER)
+            return
+        try:
+            # PID 可能已被复用，启动时间也相同才沿用原对象及其 CPU 基线
+            if (self._process is None or self._process.pid != tracked.pid
+                    or self._process.create_time() != tracked.create_time()):
+                self._process = psutil.Process(tracked.pid)
+                # 首次调用只建立 CPU 时间基线
+                self._process.cpu_percent(None)
+            self._record(self._sample(self._process))
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            self._process = None
+            return
+        except psutil.AccessDenied as e:
+            logger.debug(f'读取 frpc 进程资源被拒绝: {str(e)}')
+        self._scheduler.schedule(self.SAMPLE_TIMER, time.time() + self.interval)
+
+    @staticmethod
+    def _sample(process: psutil.Process) -> dict:
+        with process.oneshot():
+            sample = {
+                'time': time.time(),
+                'cpu_percent': round(process.cpu_percent(None), 1),
+                'rss': process.memory_info().rss,
+                'threads': process.num_threads(),
+                'fds': process.num_fds() if hasattr(process, 'num_fds') else process.num_handles(),
+            }
+        list_connections = getattr(process, 'net_connections', None) or process.connections
+        sample['connections'] = len(list_connections(kind='inet'))
+        return sample
+
+    def _record(self, sample: dict):
+        with self._lock:
+            for name, column in self._columns.items():
+                column[self._next] = sample[name]
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def _row(self, index: int) -> dict:
+        return {name: column[index] for name, column in self._columns.items()}
+
+    def latest(self) -> dict | None:
+        """返回最近一次采样，进程未运行时返回 None。"""
+        with self._lock:
+            if self._process is None or self._count == 0:
+                return None
+            return self._row((self._next - 1) % self.capacity)
+
+    def history(self, limit: int | None = None) -> dict:
+        """按列返回最近 limit 个样本（从旧到新）。"""
+        with self._lock:
+            count = self._count if limit is None else max(0, min(limit, self._count))
+            start = (self._next - count) % self.capacity
+            indexes = [(start + offset) % self.capacity for offset in range(count)]
+            return {
+                'interval': self.interval,
+                'capacity': self.capacity,
+                'samples': count,
+                **{name: [column[index] for index in indexes] for name, column in self._columns.items()},
+            }
@@ -0,0 +1,101 @@
+"""frpc verify 结果缓存。"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.utils.proxy_sharding import canonical_json
+
+logger = logging.getLogger(__name__)
+
+
+def verify_cache_key(config, binary_sha256: str) -> str:
+    """以规范化配置与可执行文件摘要计算缓存键，配置格式或键顺序不同但内容相同时命中同一条目。"""
+    digest = hashlib.sha256()
+    digest.update(binary_sha256.encode('utf-8'))
+    digest.update(b'\n')
+    digest.update(canonical_json(config).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class VerifyResultCache:
+    """按内容摘要缓存 frpc verify 结果的 LRU，持久化到磁盘，面板重启后仍可命中。
+
+    键已包含可执行文件的 SHA-256，替换 frpc 后旧条目不会再命中；clear() 用于同时释放这些条目。
+    """
+
+    DEFAULT_CAPACITY = 256
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY):
+        self.path = path
+        self.capacity = max(capacity, 1)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f'读取 verify 缓存失败，将重新校验: {str(e)}')
+            return
+        for entry in payload.get('entries', []) if isinstance(payload, dict) else []:
+            if isinstance(entry, dict) and isinstance(entry.get('key'), str):
+                self._entries[entry['key']] = {
+                    'success': bool(entry.get('success')),
+                    'message': str(entry.get('message', '')),
+                    'checked_at': entry.get('checked_at', 0.0),
+                }
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def _save_locked(self):
+        """原子写入缓存文件，条目按最近使用顺序排列。"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = f'{self.path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'entries': [{'key': key, **entry} for key, entry in self._entries.items()]},
+                    f,
+                    ensure_ascii=False
+                )
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning(f'写入 verify 缓存失败: {str(e)}')
+
+    def get(self, key: str):
+        """返回缓存的 {success, message, checked_at}，未命中时返回 None。"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return dict(entry)
+
+    def put(self, key: str, success: bool, message: str):
+        """记录一次 verify 结果并写盘。"""
+        with self._lock:
+            self._entries[key] = {'success': success, 'message': message, 'checked_at': time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            self._save_locked()
+
+    def clear(self):
+        """清空缓存。"""
+        with self._lock:
+            if not self._entries:
+                return
+            self._entries.clear()
+            self._save_locked()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
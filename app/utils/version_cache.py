@@ -0,0 +1,72 @@
+"""frpc / frps 版本的磁盘缓存。"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def stat_fingerprint(path: str):
+    """返回文件的 (inode, mtime_ns, size) 指纹字符串，文件不存在时返回 None。"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f'{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_size}'
+
+
+def sha256_file(path: str) -> str:
+    """分块计算文件的 SHA-256。"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class VersionCacheFile:
+    """把版本探测结果保存到可执行文件旁的 JSON 文件，面板重启后无需重新执行命令即可展示。
+
+    frpc 条目以 inode、mtime_ns 与大小作为键，可执行文件被替换后自动失效；
+    frps 条目以版本探测地址作为键。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._saved = None
+
+    def load(self) -> dict:
+        """读取缓存文件，文件不存在或损坏时返回空字典。"""
+        with self._lock:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+            except FileNotFoundError:
+                payload = {}
+            except Exception as e:
+                logger.warning(f'读取版本缓存失败，将重新检测: {str(e)}')
+                payload = {}
+            if not isinstance(payload, dict):
+                payload = {}
+            self._saved = payload
+            return dict(payload)
+
+    def save(self, entries: dict):
+        """原子写入缓存，内容未变化时跳过写盘。"""
+        with self._lock:
+            if entries == self._saved:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                temp_path = f'{self.path}.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f, indent=2, ensure_ascii=False)
+                os.replace(temp_path, self.path)
+                self._saved = dict(entries)
+            except Exception as e:
+                logger.warning(f'写入版本缓存失败: {str(e)}')
@@ -0,0 +1,66 @@
+"""测量 validate_frpc_config 在不同代理数量下的耗时，并与逐对比较的冲突检测对照。
+
+逐对比较是单个代理校验逻辑重复 n 次时的复杂度（O(n²)），只在代理数不超过 --pairwise-limit 时运行。
+
+用法：python benchmarks/bench_input_validator.py [--counts 100,1000,10000,50000] [--pairwise-limit 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.input_validator import InputValidator, proxy_conflict_keys  # noqa: E402
+
+
+def make_config(count: int) -> dict:
+    proxies = []
+    for n in range(count):
+        if n % 4 == 3:
+            proxies.append({
+                'name': f'web-{n}', 'type': 'http', 'localIP': '127.0.0.1', 'localPort': 8080,
+                'customDomains': [f'app-{n}.example.com'], 'locations': ['/', '/api'],
+            })
+        else:
+            proxies.append({
+                'name': f'tcp-{n}', 'type': 'tcp' if n % 2 else 'udp', 'localIP': f'10.0.{n % 8}.1',
+                'localPort': 22, 'remotePort': 1024 + n % 64000,
+            })
+    return {'serverAddr': 'frps.example.com', 'serverPort': 7000, 'proxies': proxies}
+
+
+def pairwise_conflicts(proxies: list) -> int:
+    conflicts = 0
+    keys = [set(key for key, _ in proxy_conflict_keys(proxy)) for proxy in proxies]
+    for index, claimed in enumerate(keys):
+        for other in keys[:index]:
+            if claimed & other:
+                conflicts += 1
+    return conflicts
+
+
+def measure(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--counts', default='100,1000,10000,50000')
+    parser.add_argument('--pairwise-limit', type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'proxies':>8} {'validate_frpc_config':>22} {'per proxy':>10} {'pairwise conflicts':>20}")
+    for count in (int(item) for item in args.counts.split(',')):
+        config = make_config(count)
+        elapsed = min(measure(InputValidator.validate_frpc_config, config) for _ in range(3))
+        pairwise = '-'
+        if count <= args.pairwise_limit:
+            pairwise = f'{measure(pairwise_conflicts, config["proxies"]) * 1000:.1f}ms'
+        print(f'{count:>8} {elapsed * 1000:>20.1f}ms {elapsed / count * 1e6:>8.1f}us {pairwise:>20}')
+
+
+if __name__ == '__main__':
+    main()
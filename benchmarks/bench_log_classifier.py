@@ -0,0 +1,79 @@
+"""对比逐条 re.search 错误匹配（旧实现）与合并后的 LogClassifier 的吞吐量（行/秒）。
+
+用法：python benchmarks/bench_log_classifier.py [--lines 200000] [--error-ratio 0.01]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.log_classifier import ERROR_RULES, LogClassifier  # noqa: E402
+
+# 旧实现 _check_error_state 中逐行检查的模式
+LEGACY_PATTERNS = [
+    r'bind: cannot assign requested address',
+    r'connection refused',
+    r'connection reset',
+    r'connection timeout',
+    r'no route to host',
+    r'no such file or directory',
+    r'permission denied',
+    r'address already in use',
+    r'failed to start proxy',
+    r'failed to connect to server',
+    r'failed to login to server',
+]
+
+NORMAL_LINES = [
+    '2026-01-01 00:00:00.000 [I] [proxy/proxy_wrapper.go:205] [web-{n}] start proxy success',
+    '2026-01-01 00:00:00.000 [I] [client/service.go:295] [abcdef] login to server success, get run id [abcdef]',
+    '2026-01-01 00:00:00.000 [D] [proxy/proxy.go:100] [ssh-{n}] join connections, traffic in 1024 out 2048',
+]
+
+
+def legacy_classify(line: str):
+    for pattern in LEGACY_PATTERNS:
+        if re.search(pattern, line, re.IGNORECASE):
+            return pattern
+    return None
+
+
+def generate(count: int, error_ratio: float) -> list[str]:
+    rng = random.Random(1)
+    phrases = [phrase for _, _, phrase, _ in ERROR_RULES]
+    lines = []
+    for n in range(count):
+        if rng.random() < error_ratio:
+            lines.append(f'2026-01-01 00:00:00.000 [W] [client/control.go:172] [ssh-{n}] {rng.choice(phrases)}')
+        else:
+            lines.append(rng.choice(NORMAL_LINES).format(n=n))
+    return lines
+
+
+def throughput(func, lines) -> float:
+    started = time.perf_counter()
+    for line in lines:
+        func(line)
+    return len(lines) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--error-ratio', type=float, default=0.01)
+    args = parser.parse_args()
+
+    lines = generate(args.lines, args.error_ratio)
+    classifier = LogClassifier()
+    legacy = throughput(legacy_classify, lines)
+    combined = throughput(classifier.classify, lines)
+    print(f'legacy re.search x{len(LEGACY_PATTERNS)}: {legacy:>12,.0f} lines/s')
+    print(f'LogClassifier:          {combined:>12,.0f} lines/s  ({combined / legacy:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""对比日志检索在有分段索引与逐段全量扫描时的耗时。
+
+用法：python benchmarks/bench_log_search.py [--segments 20] [--segment-mb 10]
+生成的语料为 segments 个按小时轮转并 gzip 压缩的分段（默认约 200MB 明文），
+例如 --segments 40 --segment-mb 50 可生成约 2GB 的语料。测试目录在结束后删除。
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.log_classifier import default_classifier  # noqa: E402
+from app.utils.log_index import LogIndex  # noqa: E402
+from app.utils.log_segments import LogSegmentStore  # noqa: E402
+
+BASE_TIME = time.mktime((2026, 1, 1, 0, 0, 0, 0, 0, -1))
+FLAKY_PROXY = 'ssh-flaky'
+
+
+def segment_lines(segment: int, target_bytes: int, flapping: bool):
+    """生成一个小时内的日志；flapping 为 True 时在其中混入少量登录失败。"""
+    written = 0
+    line_no = 0
+    while written < target_bytes:
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(BASE_TIME + segment * 3600 + line_no // 30))
+        if flapping and line_no % 2000 == 0:
+            line = (f'{stamp}.000 [W] [client/control.go:172] [{FLAKY_PROXY}] '
+                    f'failed to login to server: dial tcp 10.0.0.1:7000: connection refused')
+        else:
+            line = (f'{stamp}.000 [I] [proxy/proxy_wrapper.go:205] [web-{line_no % 400}] '
+                    f'start proxy success, traffic in {line_no * 7 % 100000} out {line_no * 13 % 100000}')
+        written += len(line) + 1
+        line_no += 1
+        yield line
+
+
+def build_corpus(work_dir: str, segments: int, segment_mb: int):
+    log_path = os.path.join(work_dir, 'frpc.log')
+    store = LogSegmentStore(log_path, max_bytes=0, backup_count=segments + 1, rotate_interval=0)
+    index = LogIndex(classify=default_classifier.classify, clean=str.strip)
+    store.index_provider = index.take_active_snapshot
+    for segment in range(segments):
+        with open(log_path, 'w', encoding='utf-8') as f:
+            for line in segment_lines(segment, segment_mb * 1024 * 1024, flapping=segment == segments // 3):
+                f.write(line + '\n')
+                # 与运行时相同：写入时逐行登记索引
+                index.add_line(line, default_classifier.classify(line))
+        store.rotate()
+    # 最新分段保留明文，其余分段等待后台压缩完成
+    while any(segment['compressed'] is False for segment in store.segments()[1:]):
+        time.sleep(0.2)
+    open(log_path, 'w').close()
+    return store, index
+
+
+def full_scan(store: LogSegmentStore, index: LogIndex, filters: dict):
+    """不使用索引，逐段解压扫描。"""
+    matches = 0
+    for segment in store.segments():
+        with store.open_segment(segment) as f:
+            matches += len(index._scan_source(f, filters, None, 10 ** 9))
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, default=20)
+    parser.add_argument('--segment-mb', type=int, default=10)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        started = time.perf_counter()
+        store, index = build_corpus(work_dir, args.segments, args.segment_mb)
+        print(f'corpus: {args.segments} segments x {args.segment_mb}MB, built in {time.perf_counter() - started:.1f}s')
+
+        last_hour = BASE_TIME + (args.segments - 1) * 3600
+        cases = (
+            ('proxy + error class', {'proxy': FLAKY_PROXY, 'error_class': 'connection_failure'}),
+            ('last hour, level W', {'level': 'W', 'since': last_hour}),
+            ('text only (no index help)', {'query': 'login'}),
+        )
+        print(f"{'query':<28} {'indexed (ms)':>13} {'scanned':>8} {'full scan (ms)':>15}")
+        for label, filters in cases:
+            started = time.perf_counter()
+            result = index.search(store, limit=50, **filters)
+            indexed = (time.perf_counter() - started) * 1000
+            normalized = {
+                'query': filters.get('query', ''), 'level': index.normalize_level(filters.get('level')),
+                'proxy': filters.get('proxy'), 'error_class': filters.get('error_class'),
+                'since': filters.get('since'), 'until': None,
+            }
+            started = time.perf_counter()
+            full_scan(store, index, normalized)
+            scan = (time.perf_counter() - started) * 1000
+            print(f"{label:<28} {indexed:>13.1f} {len(result['scanned']):>8} {scan:>15.1f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""对比 get_logs 旧实现（readlines 整个文件）与反向块读取 tail_lines 的耗时。
+
+用法：python benchmarks/bench_log_tail.py [--sizes-mb 1,100,1024] [--lines 100]
+测试文件生成在临时目录中，结束后删除。
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.log_tail import tail_lines  # noqa: E402
+
+SAMPLE_LINE = (
+    '2026-10-18 01:00:00.000 [I] [proxy/proxy_manager.go:144] [abcdef] '
+    'proxy added: [ssh web api] login to server success, get run id [0123456789abcdef]\n'
+)
+
+
+def write_log(path: str, size_mb: int, blank_ratio: int = 0):
+    """生成约 size_mb MB 的日志；blank_ratio 大于 0 时每行之间插入若干空行。"""
+    block = (SAMPLE_LINE + '\n' * blank_ratio) * 1000
+    target = size_mb * 1024 * 1024
+    with open(path, 'w', encoding='utf-8') as f:
+        written = 0
+        while written < target:
+            f.write(block)
+            written += len(block)
+
+
+def readlines_tail(path: str, lines: int) -> list[str]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f.readlines()[-lines:] if line.strip()]
+
+
+def timed(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes-mb', default='1,100,1024')
+    parser.add_argument('--lines', type=int, default=100)
+    parser.add_argument('--skip-readlines-above-mb', type=int, default=1024,
+                        help='超过该大小时跳过旧实现，避免占用过多内存')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        print(f"{'size':>8} {'layout':>12} {'readlines (ms)':>15} {'tail_lines (ms)':>16}")
+        for size_mb in (int(item) for item in args.sizes_mb.split(',')):
+            for layout, blank_ratio in (('dense', 0), ('blank-runs', 50)):
+                path = os.path.join(work_dir, f'{size_mb}-{layout}.log')
+                write_log(path, size_mb, blank_ratio)
+                if size_mb <= args.skip_readlines_above_mb:
+                    old = f'{timed(readlines_tail, path, args.lines):15.1f}'
+                else:
+                    old = f"{'skipped':>15}"
+                new = timed(tail_lines, path, args.lines)
+                print(f'{size_mb:>6}MB {layout:>12} {old} {new:16.3f}')
+                os.remove(path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
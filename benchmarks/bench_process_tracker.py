@@ -0,0 +1,55 @@
+"""对比 frpc 状态查询在不同进程表规模下的耗时：PID 跟踪校验与全量扫描。
+
+用法：python benchmarks/bench_process_tracker.py [--sizes 0,500,2000] [--rounds 200]
+脚本会临时拉起指定数量的 sleep 进程以扩大进程表，结束时全部回收。
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil  # noqa: E402
+
+from app.utils.process_tracker import ProcessTracker  # noqa: E402
+
+
+def measure(func, rounds: int) -> float:
+    """返回单次调用的平均耗时（毫秒）。"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) * 1000 / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='0,500,2000', help='额外拉起的进程数，逗号分隔')
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    tracker = ProcessTracker(os.path.join(work_dir, 'frpc.json'), os.path.join(work_dir, 'frpc.pid'))
+    target = subprocess.Popen(['sleep', '3600'])
+    tracker.track(target.pid)
+    fillers = []
+    try:
+        print(f"{'processes':>10} {'tracked find (ms)':>18} {'full scan (ms)':>15}")
+        for size in sorted(int(item) for item in args.sizes.split(',')):
+            while len(fillers) < size:
+                fillers.append(subprocess.Popen(['sleep', '3600']))
+            total = len(psutil.pids())
+            tracked = measure(lambda: tracker.find(allow_scan=False), args.rounds)
+            scan = measure(tracker.scan, max(args.rounds // 20, 3))
+            print(f'{total:>10} {tracked:>18.3f} {scan:>15.3f}')
+    finally:
+        for proc in fillers + [target]:
+            proc.kill()
+            proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""对比修改单个代理后使配置生效的耗时：单进程完整重启 vs 代理分片只重启所在分片。
+
+每轮修改一个代理的 localPort，计时包含 frpc verify 校验、写入配置与重启进程。
+服务端地址指向本机未监听端口并设置 loginFailExit=false，frpc 持续重连而不退出，无需真实的 frps。
+FrpcManager.start 固定等待 2 秒确认进程存活，两种方式的差距来自 frpc 校验与加载代理的耗时，需使用真实的 frpc。
+
+用法：python benchmarks/bench_shard_restart.py --frpc /path/to/frpc [--counts 100,1000,5000] [--shards 4]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.runtime_settings import load_runtime_settings  # noqa: E402
+from app.services.frpc_registry import FrpcManagerRegistry  # noqa: E402
+from app.services.proxy_editor import WEB_ONLY_CONFIG_FIELDS, build_frpc_config  # noqa: E402
+from app.services.shard_supervisor import ShardSupervisor  # noqa: E402
+
+
+def make_config(count: int, shard_count: int) -> dict:
+    return {
+        'serverAddr': '127.0.0.1',
+        'serverPort': 1,
+        'loginFailExit': False,
+        'sharding': {'enabled': shard_count > 1, 'shardCount': max(shard_count, 1)},
+        'proxies': [
+            {'name': f'tcp-{n}', 'type': 'tcp', 'localIP': '127.0.0.1', 'localPort': 10000 + n,
+             'remotePort': 20000 + n, 'enabled': True}
+            for n in range(count)
+        ],
+    }
+
+
+def touch_proxy(config: dict, round_number: int) -> dict:
+    proxies = list(config['proxies'])
+    proxies[0] = {**proxies[0], 'localPort': 30000 + round_number}
+    return {**config, 'proxies': proxies}
+
+
+def make_verify(frpc_path: str):
+    def verify(temp_path):
+        result = subprocess.run([frpc_path, 'verify', '-c', temp_path], capture_output=True, text=True, timeout=60)
+        return result.returncode == 0, (result.stdout + result.stderr).strip()
+    return verify
+
+
+def bench_single(manager, config: dict, rounds: int, verify) -> float:
+    manager.config_store.save_frpc_config(build_frpc_config(config), validate=verify)
+    manager.start()
+    elapsed = []
+    try:
+        for round_number in range(rounds):
+            config = touch_proxy(config, round_number)
+            started = time.perf_counter()
+            manager.config_store.save_frpc_config(build_frpc_config(config), validate=verify)
+            success, message = manager.restart()
+            elapsed.append(time.perf_counter() - started)
+            if not success:
+                raise RuntimeError(message)
+    finally:
+        manager.stop()
+    return min(elapsed)
+
+
+def bench_sharded(supervisor, config: dict, rounds: int, verify) -> float:
+    supervisor.apply(config, verify=verify, exclude_fields=WEB_ONLY_CONFIG_FIELDS)
+    elapsed = []
+    try:
+        for round_number in range(rounds):
+            config = touch_proxy(config, round_number)
+            started = time.perf_counter()
+            result = supervisor.apply(config, verify=verify, exclude_fields=WEB_ONLY_CONFIG_FIELDS)
+            elapsed.append(time.perf_counter() - started)
+            if not result['success']:
+                raise RuntimeError(result)
+    finally:
+        supervisor.stop()
+    return min(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frpc', default=os.getenv('FRPC_BINARY_PATH'), help='frpc 可执行文件路径')
+    parser.add_argument('--counts', default='100,1000,5000')
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+    if not args.frpc or not os.path.isfile(args.frpc):
+        parser.error('请通过 --frpc 或 FRPC_BINARY_PATH 指定 frpc 可执行文件')
+    frpc_path = os.path.abspath(args.frpc)
+    verify = make_verify(frpc_path)
+
+    print(f"{'proxies':>8} {'single restart':>16} {f'{args.shards} shards':>12} {'speedup':>8}")
+    for count in (int(item) for item in args.counts.split(',')):
+        base_dir = tempfile.mkdtemp(prefix='bench-shard-')
+        os.environ['APP_BASE_DIR'] = base_dir
+        os.environ['FRPC_BINARY_PATH'] = frpc_path
+        os.environ.pop('FRPC_LOG_DIR', None)
+        os.environ['LOG_FILE'] = os.path.join(base_dir, 'logs', 'app.log')
+        registry = FrpcManagerRegistry()
+        try:
+            manager = registry.get_for_settings(load_runtime_settings(), 'bench')
+            single = bench_single(manager, make_config(count, 1), args.rounds, verify)
+            sharded = bench_sharded(
+                ShardSupervisor(manager, registry), make_config(count, args.shards), args.rounds, verify
+            )
+            print(f'{count:>8} {single * 1000:>14.0f}ms {sharded * 1000:>10.0f}ms {single / sharded:>7.1f}x')
+        finally:
+            registry.shutdown()
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,8 @@ from app.models import User
 from dotenv import load_dotenv
 import threading
 from app.utils.network_check import NetworkChecker
-from app.utils.frpc_manager import FrpcManager
+from app.services.frpc_registry import frpc_registry
+from app.services.shard_supervisor import get_shard_supervisor, is_shard_instance, is_sharding_enabled
 from eventlet import wsgi  # 这里要加上
 from flask_migrate import upgrade
 
@@ -40,14 +41,25 @@ def init_db():
 def network_status_callback(is_online: bool):
     """网络状态变化回调函数"""
     if is_online:
-        # 网络恢复，尝试重启 frpc 服务
-        frpc_manager = FrpcManager()
-        if not frpc_manager.is_running():
-            app.logger.info("Attempting to restart FRPC service after network recovery...")
-            frpc_manager.start()
-            app.logger.info("FRPC service successfully restarted after network recovery")
-        else:
-            app.logger.info("FRPC service is already running, no restart needed")
+        # 网络恢复，尝试重启全部已登记实例中未运行的 frpc 服务
+        for frpc_manager in frpc_registry.managers():
+            if is_shard_instance(frpc_manager.instance_id):
+                # 分片进程由所属实例的分片监管器统一拉起
+                continue
+            if not os.path.exists(frpc_manager.config_path):
+                continue
+            if is_sharding_enabled(frpc_manager):
+                # 分片模式下单进程保持停止，只重启监管器认为应当运行的分片
+                results = get_shard_supervisor(frpc_manager).recover()
+                started = sum(1 for item in results if item['action'] == 'started')
+                app.logger.info(f"Restarted {started} FRPC shard(s) after network recovery: {frpc_manager.instance_id}")
+                continue
+            if not frpc_manager.is_running():
+                app.logger.info(f"Attempting to restart FRPC service after network recovery: {frpc_manager.instance_id}")
+                frpc_manager.start()
+                app.logger.info(f"FRPC service successfully restarted after network recovery: {frpc_manager.instance_id}")
+            else:
+                app.logger.info(f"FRPC service is already running, no restart needed: {frpc_manager.instance_id}")
     else:
         app.logger.warning("Network connection lost, FRPC service may be affected")
 
@@ -57,6 +69,7 @@ def start_network_monitor():
     monitor_thread = threading.Thread(
         target=checker.start_monitoring,
         args=(network_status_callback,),
+        name='network-monitor',
         daemon=True
     )
     monitor_thread.start()
@@ -0,0 +1,69 @@
+"""测试公共配置。"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+
+class FakeFrpcAdmin:
+    """进程内的 frpc 管理接口替身：记录收到的请求，按 responses 中的 (状态码, 响应体) 应答。"""
+
+    def __init__(self):
+        self.requests = []
+        self.responses = {
+            '/api/status': (200, {}),
+            '/api/reload': (200, ''),
+        }
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                with fake._lock:
+                    fake.requests.append({
+                        'path': url.path,
+                        'query': parse_qs(url.query),
+                        'authorization': self.headers.get('Authorization'),
+                    })
+                    status, body = fake.responses.get(url.path, (404, 'not found'))
+                payload = body if isinstance(body, str) else json.dumps(body)
+                data = payload.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    @property
+    def endpoint(self):
+        return f'http://127.0.0.1:{self.port}', None
+
+    def paths(self) -> list[str]:
+        with self._lock:
+            return [item['path'] for item in self.requests]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_admin():
+    admin = FakeFrpcAdmin()
+    yield admin
+    admin.close()
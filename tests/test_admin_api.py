@@ -0,0 +1,164 @@
+"""frpc 管理接口客户端与代理状态轮询测试，使用进程内的管理接口替身。"""
+import time
+
+import pytest
+
+from app.utils.admin_api import FrpcAdminClient, ProxyStatusPoller
+
+POLL = ProxyStatusPoller.POLL_TIMER
+
+
+def status_payload(*items):
+    payload = {}
+    for name, status in items:
+        payload.setdefault('tcp', []).append({'name': name, 'type': 'tcp', 'status': status, 'err': ''})
+    return payload
+
+
+@pytest.fixture
+def client():
+    client = FrpcAdminClient()
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def make_poller(client, fake_admin):
+    pollers = []
+    state = {'running': True, 'endpoint': fake_admin.endpoint}
+
+    def factory(**kwargs):
+        poller = ProxyStatusPoller(
+            client, lambda: state['endpoint'], lambda: state['running'],
+            min_interval=1.0, max_interval=8.0, **kwargs
+        )
+        pollers.append(poller)
+        return poller
+
+    factory.state = state
+    yield factory
+    for poller in pollers:
+        poller.stop()
+
+
+def test_get_status_flattens_and_sorts(client, fake_admin):
+    fake_admin.responses['/api/status'] = (200, {
+        'tcp': [{'name': 'ssh', 'status': 'running', 'err': '', 'remote_addr': ':6000'}],
+        'http': [{'name': 'app', 'status': 'start error', 'err': 'port already used'}],
+    })
+    proxies = client.get_status(fake_admin.endpoint)
+    assert [(item['name'], item['type'], item['status']) for item in proxies] == [
+        ('app', 'http', 'start error'),
+        ('ssh', 'tcp', 'running'),
+    ]
+    assert proxies[0]['error'] == 'port already used'
+
+
+def test_client_reuses_session_until_endpoint_changes(client, fake_admin):
+    base_url, _ = fake_admin.endpoint
+    client.get_status((base_url, None))
+    session = client._session
+    client.get_status((base_url, None))
+    assert client._session is session
+    client.get_status((base_url, ('admin', 'secret')))
+    assert client._session is not session
+    assert fake_admin.requests[-1]['authorization'].startswith('Basic ')
+
+
+def test_interval_backs_off_while_status_is_unchanged(make_poller, fake_admin):
+    fake_admin.responses['/api/status'] = (200, status_payload(('ssh', 'running')))
+    poller = make_poller()
+
+    poller._handle_events(['startup'])
+    intervals = [poller.snapshot()['poll_interval']]
+    for _ in range(5):
+        poller._handle_events([POLL])
+        intervals.append(poller.snapshot()['poll_interval'])
+    assert intervals == [1.0, 2.0, 4.0, 8.0, 8.0, 8.0]
+    assert poller.snapshot()['state'] == 'ok'
+    assert poller.snapshot()['counts'] == {'running': 1}
+
+
+def test_status_change_and_wake_reset_interval(make_poller, fake_admin):
+    fake_admin.responses['/api/status'] = (200, status_payload(('ssh', 'running')))
+    poller = make_poller()
+    poller._handle_events(['startup'])
+    poller._handle_events([POLL])
+    poller._handle_events([POLL])
+    assert poller.snapshot()['poll_interval'] == 4.0
+
+    fake_admin.responses['/api/status'] = (200, status_payload(('ssh', 'start error')))
+    poller._handle_events([POLL])
+    assert poller.snapshot()['poll_interval'] == 1.0
+
+    poller._handle_events([POLL])
+    assert poller.snapshot()['poll_interval'] == 2.0
+    poller._handle_events(['reload', POLL])
+    assert poller.snapshot()['poll_interval'] == 1.0
+
+
+def test_errors_back_off_and_keep_last_items(make_poller, fake_admin):
+    fake_admin.responses['/api/status'] = (200, status_payload(('ssh', 'running')))
+    poller = make_poller()
+    poller._handle_events(['startup'])
+
+    fake_admin.responses['/api/status'] = (500, 'internal error')
+    intervals = []
+    for _ in range(4):
+        poller._handle_events([POLL])
+        intervals.append(poller.snapshot()['poll_interval'])
+    assert intervals == [2.0, 4.0, 8.0, 8.0]
+    snapshot = poller.snapshot()
+    assert snapshot['state'] == 'error'
+    assert [item['name'] for item in snapshot['items']] == ['ssh']
+
+    fake_admin.responses['/api/status'] = (200, status_payload(('ssh', 'running')))
+    poller._handle_events([POLL])
+    assert poller.snapshot()['state'] == 'ok'
+    assert poller.snapshot()['poll_interval'] == 1.0
+
+
+def test_unreachable_admin_api_is_an_error(make_poller, fake_admin):
+    poller = make_poller()
+    fake_admin.close()
+    poller._handle_events(['startup'])
+    assert poller.snapshot()['state'] == 'error'
+    assert poller.snapshot()['poll_interval'] == 2.0
+
+
+def test_no_requests_when_stopped_or_unconfigured(make_poller, fake_admin):
+    poller = make_poller()
+    make_poller.state['running'] = False
+    poller._handle_events(['startup'])
+    assert poller.snapshot()['state'] == 'stopped'
+
+    make_poller.state.update(running=True, endpoint=None)
+    poller._handle_events(['startup'])
+    assert poller.snapshot()['state'] == 'unavailable'
+    assert fake_admin.paths() == []
+
+
+def test_on_update_receives_previous_snapshot(make_poller, fake_admin):
+    updates = []
+    poller = make_poller(on_update=lambda previous, current: updates.append((previous['state'], current['state'])))
+    poller._handle_events(['startup'])
+    poller._handle_events([POLL])
+    assert updates == [('idle', 'ok'), ('ok', 'ok')]
+
+
+def test_poller_thread_polls_and_wakes(make_poller, fake_admin):
+    fake_admin.responses['/api/status'] = (200, status_payload(('ssh', 'running')))
+    poller = make_poller()
+    poller.start()
+    deadline = time.time() + 5
+    while poller.snapshot()['state'] != 'ok' and time.time() < deadline:
+        time.sleep(0.02)
+    assert poller.snapshot()['state'] == 'ok'
+
+    # 最短间隔 1 秒，wake 应立即触发下一次请求而不是等待定时器
+    count = len(fake_admin.paths())
+    poller.wake('reload')
+    deadline = time.time() + 0.5
+    while len(fake_admin.paths()) == count and time.time() < deadline:
+        time.sleep(0.02)
+    assert len(fake_admin.paths()) > count
@@ -0,0 +1,84 @@
+"""diff_configs 与 diff_named_list 的差异分类与线性耗时测试。"""
+import time
+
+from app.utils.config_diff import (
+    ACTION_NONE,
+    ACTION_RELOAD,
+    ACTION_RESTART,
+    ACTION_SHARD_RESTART,
+    diff_configs,
+    diff_named_list,
+    summarize_diff,
+)
+from app.utils.proxy_sharding import shard_index, shard_key
+
+
+def make_proxies(count, offset=0):
+    return [
+        {'name': f'p{n}', 'type': 'tcp', 'localIP': '127.0.0.1', 'localPort': 22, 'remotePort': 6000 + n + offset}
+        for n in range(count)
+    ]
+
+
+def make_config(proxies, **fields):
+    return {'serverAddr': '127.0.0.1', 'serverPort': 7000, 'proxies': proxies, **fields}
+
+
+def test_named_list_classifies_changes():
+    old = make_proxies(4)
+    new = [old[0], {**old[1], 'localPort': 2222}, old[3], {'name': 'p9', 'type': 'udp'}, {'name': 'p0'}, 'junk']
+    diff = diff_named_list(old, new)
+    assert diff['added'] == ['p9']
+    assert diff['removed'] == ['p2']
+    assert diff['modified'] == ['p0', 'p1']
+    assert diff['unchanged'] == 1
+    assert diff['duplicates'] == ['p0']
+
+
+def test_actions():
+    base = make_config(make_proxies(3))
+    assert diff_configs(base, base)['action'] == ACTION_NONE
+    assert diff_configs(base, make_config(make_proxies(2)))['action'] == ACTION_RELOAD
+    assert diff_configs(base, {**base, 'serverPort': 7001})['globals'] == ['serverPort']
+    assert diff_configs(base, {**base, 'serverPort': 7001})['action'] == ACTION_RESTART
+    assert diff_configs(base, {**base, 'autoRetry': {}}, ignore_fields=('autoRetry',))['action'] == ACTION_NONE
+    assert diff_configs(None, base)['proxies']['added'] == ['p0', 'p1', 'p2']
+
+
+def test_sharding_lists_old_and_new_shards_of_a_moved_proxy():
+    sharding = {'enabled': True, 'shardCount': 8, 'groupKey': 'group'}
+    old = make_config([{**proxy, 'group': 'a'} for proxy in make_proxies(3)])
+    new = make_config([dict(proxy) for proxy in old['proxies']])
+    new['proxies'][1]['group'] = 'b'
+
+    diff = diff_configs(old, new, sharding=sharding)
+    assert diff['action'] == ACTION_SHARD_RESTART
+    expected = {shard_index(shard_key(proxy, 'group'), 8) for proxy in (old['proxies'][1], new['proxies'][1])}
+    assert diff['affected_shards'] == sorted(expected)
+    assert '处理方式 shard_restart' in summarize_diff(diff)
+
+    with_visitor = {**new, 'visitors': [{'name': 'v'}]}
+    assert diff_configs(old, with_visitor, sharding=sharding)['action'] == ACTION_RELOAD
+
+
+def best_time(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def test_diff_time_grows_linearly_with_proxy_count():
+    def timed(count):
+        old = make_config(make_proxies(count))
+        new = make_config(make_proxies(count))
+        new['proxies'][count // 2] = {**new['proxies'][count // 2], 'localPort': 2222}
+        return best_time(lambda: diff_configs(old, new, sharding={'enabled': True, 'shardCount': 4}))
+
+    small = timed(10000)
+    large = timed(40000)
+    # 线性实现约为 4 倍，按对逐条比较的平方实现会达到 16 倍
+    assert large < small * 8
+    assert small < 1.0
@@ -0,0 +1,74 @@
+"""ConfigFile 锁外校验与并发更新测试。"""
+import threading
+
+import pytest
+
+from app.services.config_store import ConfigChangedError, ConfigFile
+
+
+def test_reads_are_not_blocked_while_validating(tmp_path):
+    config = ConfigFile(str(tmp_path / 'frpc.json'))
+    config.write({'version': 1})
+    validating = threading.Event()
+    release = threading.Event()
+
+    def slow_validate(temp_path):
+        validating.set()
+        release.wait(5)
+        return True, 'ok'
+
+    writer = threading.Thread(target=config.write, args=({'version': 2}, slow_validate))
+    writer.start()
+    try:
+        assert validating.wait(5)
+        reader = threading.Thread(target=lambda: config.read_versioned())
+        reader.start()
+        reader.join(1)
+        assert not reader.is_alive()
+        assert config.read() == {'version': 1}
+    finally:
+        release.set()
+        writer.join(5)
+    assert ConfigFile(config.path).read() == {'version': 2}
+
+
+def test_failed_validation_keeps_original_file(tmp_path):
+    config = ConfigFile(str(tmp_path / 'frpc.json'))
+    config.write({'version': 1})
+    assert config.write({'version': 2}, lambda temp_path: (False, 'bad')) == (False, 'bad')
+    assert ConfigFile(config.path).read() == {'version': 1}
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['frpc.json']
+
+
+def test_update_retries_when_file_changes_during_validation(tmp_path):
+    config = ConfigFile(str(tmp_path / 'config.json'))
+    config.write({'items': ['a']})
+    other = ConfigFile(config.path)
+    seen = []
+
+    def mutate(snapshot):
+        seen.append(list(snapshot['items']))
+        return {'items': list(snapshot['items']) + ['c']}
+
+    def validate(temp_path):
+        if len(seen) == 1:
+            other.write({'items': ['a', 'b']})
+        return True, ''
+
+    assert config.update(mutate, validate) == (True, '')
+    assert seen == [['a'], ['a', 'b']]
+    assert ConfigFile(config.path).read() == {'items': ['a', 'b', 'c']}
+
+
+def test_update_gives_up_after_repeated_conflicts(tmp_path):
+    config = ConfigFile(str(tmp_path / 'config.json'))
+    config.write({'count': 0})
+    other = ConfigFile(config.path)
+
+    def validate(temp_path):
+        other.write({'count': other.read()['count'] + 1})
+        return True, ''
+
+    with pytest.raises(ConfigChangedError):
+        config.update(lambda snapshot: {'count': -1}, validate)
+    assert ConfigFile(config.path).read() == {'count': ConfigFile.UPDATE_ATTEMPTS}
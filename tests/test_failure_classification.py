@@ -0,0 +1,39 @@
+"""自动重试失败原因识别测试。"""
+import pytest
+
+from app.runtime_settings import load_runtime_settings
+from app.utils.frpc_manager import FrpcManager
+from app.utils.log_classifier import CONNECTION_FAILURE, STARTUP_FAILURE
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv('APP_BASE_DIR', str(tmp_path))
+    monkeypatch.delenv('FRPC_LOG_DIR', raising=False)
+    return FrpcManager(runtime_settings=load_runtime_settings())
+
+
+def test_connection_failure_wins_over_later_startup_failure(manager):
+    manager._ingest_log_line('2026-01-01 00:00:00.000 [W] [client/control.go:1] login to server failed: connection refused')
+    # start() 随后把状态改为 “服务启动后立即退出” 并写入同样内容的日志行
+    manager.error_message = '服务启动后立即退出，请检查日志'
+    manager._ingest_log_line('2026-01-01 00:00:01 [错误] 服务启动后立即退出，请检查日志')
+    assert manager._classify_failure_reason({})[0] == CONNECTION_FAILURE
+
+
+def test_failures_outside_window_are_ignored(manager):
+    manager._ingest_log_line('2026-01-01 00:00:00.000 [W] [client/control.go:1] dial tcp: connection refused')
+    for n in range(FrpcManager.RECENT_FAILURE_LINES):
+        manager._ingest_log_line(f'2026-01-01 00:00:00.000 [I] [client/service.go:1] tick {n}')
+    # 状态中的错误信息同样参与判断，这里只验证日志窗口
+    manager.error_message = ''
+    manager._ingest_log_line('2026-01-01 00:00:05 [错误] 服务启动后立即退出，请检查日志')
+    assert manager._classify_failure_reason({'error_message': ''})[0] == STARTUP_FAILURE
+
+
+def test_log_reset_clears_recent_failures(manager):
+    manager._ingest_log_line('2026-01-01 00:00:00.000 [W] [client/control.go:1] dial tcp: connection refused')
+    manager._on_log_reset()
+    manager.error_state = False
+    manager.error_message = ''
+    assert manager._classify_failure_reason({'error_message': ''}) == (None, '')
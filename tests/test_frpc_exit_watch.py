@@ -0,0 +1,54 @@
+"""扫描接管的 frpc 进程退出后同样触发 _on_process_exit 的测试。"""
+import os
+import subprocess
+import threading
+
+import pytest
+
+from app.runtime_settings import load_runtime_settings
+from app.utils.frpc_manager import FrpcManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv('APP_BASE_DIR', str(tmp_path))
+    monkeypatch.delenv('FRPC_LOG_DIR', raising=False)
+    manager = FrpcManager(runtime_settings=load_runtime_settings())
+    yield manager
+    manager.shutdown()
+
+
+@pytest.fixture
+def external_frpc(tmp_path, manager):
+    """在面板之外启动一个进程名为 frpc、命令行带有实例配置路径的进程。"""
+    script = tmp_path / 'bin' / 'frpc'
+    script.parent.mkdir()
+    script.write_text('#!/bin/sh\nwhile true; do sleep 1; done\n')
+    script.chmod(0o755)
+    proc = subprocess.Popen([str(script), '-c', manager.config_path], start_new_session=True)
+    yield proc
+    if proc.poll() is None:
+        proc.kill()
+    proc.wait()
+
+
+def test_adopted_process_exit_is_watched(manager, external_frpc):
+    exited = threading.Event()
+    on_exit = manager.exit_watcher._on_exit
+
+    def record_exit(pid):
+        on_exit(pid)
+        if pid == external_frpc.pid:
+            exited.set()
+
+    manager.exit_watcher._on_exit = record_exit
+
+    proc = manager.process_tracker.find(force_scan=True)
+    assert proc is not None and proc.pid == external_frpc.pid
+    assert external_frpc.pid in manager.exit_watcher.watching()
+    assert manager.process_tracker.cached()[0] == external_frpc.pid
+
+    os.killpg(external_frpc.pid, 9)
+    external_frpc.wait()
+    assert exited.wait(5)
+    assert manager.process_tracker.cached() is None
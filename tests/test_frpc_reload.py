@@ -0,0 +1,70 @@
+"""通过管理接口热加载与显式重启的测试。"""
+import base64
+
+import pytest
+
+from app.runtime_settings import load_runtime_settings
+from app.utils.frpc_manager import FrpcManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch, fake_admin):
+    monkeypatch.setenv('APP_BASE_DIR', str(tmp_path))
+    monkeypatch.delenv('FRPC_LOG_DIR', raising=False)
+    manager = FrpcManager(runtime_settings=load_runtime_settings())
+    manager.config_store.save_frpc_config(make_config(fake_admin.port))
+    # 以正在运行的进程为前提，不启动真实的 frpc
+    monkeypatch.setattr(manager, '_find_process', lambda force_scan=False: object())
+    manager._running_global_fingerprint = manager._current_global_fingerprint()
+    yield manager
+    manager.shutdown()
+
+
+def make_config(port: int, proxies=('ssh',), server_port: int = 7000) -> dict:
+    return {
+        'serverAddr': '127.0.0.1',
+        'serverPort': server_port,
+        'webServer': {'addr': '0.0.0.0', 'port': port, 'user': 'admin', 'password': 'secret'},
+        'proxies': [{'name': name, 'type': 'tcp', 'localPort': 22, 'remotePort': 6000} for name in proxies],
+    }
+
+
+def test_reload_calls_admin_api(manager, fake_admin):
+    manager.config_store.save_frpc_config(make_config(fake_admin.port, proxies=('ssh', 'web')))
+    assert manager.reload() == (True, 'frpc 配置已热加载，现有连接未中断')
+
+    request = fake_admin.requests[0]
+    assert request['path'] == '/api/reload'
+    assert request['query'] == {'strictConfig': ['true']}
+    assert request['authorization'] == 'Basic ' + base64.b64encode(b'admin:secret').decode()
+
+
+def test_reload_reports_admin_api_error(manager, fake_admin):
+    fake_admin.responses['/api/reload'] = (500, 'proxy [web] already exists')
+    success, message = manager.reload()
+    assert not success
+    assert 'proxy [web] already exists' in message
+
+
+def test_global_change_is_not_reloaded(manager, fake_admin):
+    manager.config_store.save_frpc_config(make_config(fake_admin.port, server_port=7001))
+    success, message = manager.reload()
+    assert not success
+    assert message == '代理以外的配置已变化，需要完整重启'
+    assert fake_admin.paths() == []
+
+
+def test_restart_never_tries_reload(manager, fake_admin, monkeypatch):
+    calls = []
+    monkeypatch.setattr(manager, 'stop', lambda manual=True: calls.append('stop') or (True, ''))
+    monkeypatch.setattr(manager, 'start', lambda manual=True: calls.append('start') or (True, ''))
+    assert manager.restart() == (True, '')
+    assert calls == ['stop', 'start']
+    assert '/api/reload' not in fake_admin.paths()
+
+
+def test_reload_or_restart_falls_back_to_restart(manager, fake_admin, monkeypatch):
+    fake_admin.responses['/api/reload'] = (500, 'reload failed')
+    monkeypatch.setattr(manager, 'restart', lambda manual=True: (True, 'restarted'))
+    assert manager.reload_or_restart() == (True, 'restarted', 'restart')
+    assert fake_admin.paths().count('/api/reload') == 1
@@ -0,0 +1,52 @@
+"""代理配置校验测试。"""
+from app.utils.input_validator import InputValidator, proxy_conflict_keys
+
+
+def make_proxy(name, **fields):
+    return {'name': name, 'type': 'tcp', 'localIP': '127.0.0.1', 'localPort': 22, 'remotePort': 6000, **fields}
+
+
+def test_unhashable_type_is_reported_not_raised():
+    errors = InputValidator.validate_proxies([make_proxy('ssh', type=['tcp'])], [])
+    assert errors == ["代理配置 1 类型无效: ['tcp']"]
+    assert proxy_conflict_keys(make_proxy('ssh', type={'tcp': 1})) == []
+
+
+def test_missing_fields_are_reported_before_invalid_type():
+    errors = InputValidator.validate_proxies([{'name': 'ssh', 'type': 'ftp'}], [])
+    assert errors == [
+        '代理配置 1 缺少字段: localIP',
+        '代理配置 1 缺少字段: localPort',
+        '代理配置 1 类型无效: ftp',
+    ]
+
+
+def test_unhashable_locations_still_detect_conflicts():
+    web = {'name': 'web', 'type': 'http', 'localIP': '127.0.0.1', 'localPort': 80,
+           'customDomains': ['example.com'], 'locations': [['/a'], {'path': '/b'}]}
+    errors = InputValidator.validate_proxies([web, {**web, 'name': 'web2'}], [])
+    assert errors == ['代理配置 2 自定义域名 example.com 与代理配置 1 冲突'] * 2
+
+
+def test_remote_port_conflicts_respect_enabled_and_type():
+    proxies = [
+        make_proxy('a'),
+        make_proxy('b'),
+        make_proxy('c', type='udp'),
+        make_proxy('d', enabled=False),
+    ]
+    assert InputValidator.validate_proxies(proxies, []) == [
+        '代理配置 2 remotePort 6000 (tcp) 与代理配置 1 冲突',
+    ]
+
+
+def test_find_proxy_conflicts_with_unhashable_values():
+    proxies = [make_proxy('a', type=['tcp']), make_proxy('b')]
+    assert InputValidator.find_proxy_conflicts(proxies, make_proxy('c')) == [
+        'remotePort 6000 (tcp) 已被代理配置 2 使用',
+    ]
+
+
+def test_validate_frpc_config_rejects_unhashable_type():
+    config = {'serverAddr': '127.0.0.1', 'serverPort': 7000, 'proxies': [make_proxy('ssh', type=['tcp'])]}
+    assert InputValidator.validate_frpc_config(config) == ["代理配置 1 类型无效: ['tcp']"]
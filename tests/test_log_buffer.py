@@ -0,0 +1,51 @@
+"""LogRingBuffer 的容量淘汰、序号与统计测试。"""
+import threading
+
+from app.utils.log_buffer import LogRingBuffer
+
+
+def test_evicts_oldest_and_keeps_sequence():
+    buffer = LogRingBuffer(capacity=3)
+    seqs = [buffer.append(f'line {n}') for n in range(5)]
+    assert seqs == [1, 2, 3, 4, 5]
+    assert buffer.tail(10) == ['line 2', 'line 3', 'line 4']
+    assert buffer.tail(2) == ['line 3', 'line 4']
+    assert buffer.tail(0) == []
+    stats = buffer.stats()
+    assert (stats['size'], stats['first_seq'], stats['last_seq'], stats['dropped']) == (3, 3, 5, 2)
+
+
+def test_since_returns_newer_entries_and_applies_limit():
+    buffer = LogRingBuffer(capacity=10)
+    buffer.extend(f'line {n}' for n in range(6))
+    entries, last_seq = buffer.since(3)
+    assert entries == [(4, 'line 3'), (5, 'line 4'), (6, 'line 5')]
+    assert last_seq == 6
+    assert buffer.since(3, limit=2)[0] == [(5, 'line 4'), (6, 'line 5')]
+    assert buffer.since(6) == ([], 6)
+
+
+def test_clear_keeps_sequence_increasing():
+    buffer = LogRingBuffer(capacity=4)
+    buffer.extend(['a', 'b'])
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.stats()['approx_bytes'] == 0
+    assert buffer.append('c') == 3
+    assert buffer.since(0) == ([(3, 'c')], 3)
+
+
+def test_concurrent_appends_get_unique_sequences():
+    buffer = LogRingBuffer(capacity=100000)
+    results = []
+
+    def writer():
+        results.extend(buffer.append('x') for _ in range(1000))
+
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == list(range(1, 4001))
+    assert len(buffer) == 4000
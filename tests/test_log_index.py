@@ -0,0 +1,75 @@
+"""日志检索分页游标与活动索引快照的测试。"""
+import pytest
+
+from app.utils.log_index import LogCursorError, LogIndex
+from app.utils.log_segments import LogSegmentStore
+
+
+def log_line(n: int) -> str:
+    return f'2024-01-01 12:00:{n % 60:02d}.000 [I] [proxy/proxy.go:100] [abcdef] [web] line {n}'
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LogSegmentStore(str(tmp_path / 'frpc.log'), max_bytes=0, backup_count=5, rotate_interval=0)
+
+
+def write_active(store, index, numbers):
+    with open(store.log_path, 'a', encoding='utf-8') as f:
+        for n in numbers:
+            f.write(log_line(n) + '\n')
+            index.add_line(log_line(n))
+
+
+def rotate(store, index):
+    store.index_provider = index.take_active_snapshot
+    store.rotate()
+
+
+def page_texts(result):
+    return [match['text'].rsplit(' ', 1)[-1] for match in result['matches']]
+
+
+def test_pages_across_segments_newest_first(store):
+    index = LogIndex()
+    write_active(store, index, range(0, 5))
+    rotate(store, index)
+    write_active(store, index, range(5, 8))
+
+    first = index.search(store, limit=4)
+    assert page_texts(first) == ['7', '6', '5', '4']
+    second = index.search(store, cursor=first['next_cursor'], limit=4)
+    assert page_texts(second) == ['3', '2', '1', '0']
+    assert second['next_cursor'] is None
+
+
+def test_cursor_rejected_after_truncation_or_rotation(store):
+    index = LogIndex()
+    write_active(store, index, range(10))
+    cursor = index.search(store, limit=3)['next_cursor']
+
+    index.reset()
+    with pytest.raises(LogCursorError):
+        index.search(store, cursor=cursor, limit=3)
+
+    cursor = index.search(store, limit=3)['next_cursor']
+    rotate(store, index)
+    with pytest.raises(LogCursorError):
+        index.search(store, cursor=cursor, limit=3)
+
+
+@pytest.mark.parametrize('cursor', ['frpc.log.19700101-000000:1.000000:5', 'garbage', 'frpc.log::x'])
+def test_unknown_or_malformed_cursor_is_an_error(store, cursor):
+    index = LogIndex()
+    write_active(store, index, range(3))
+    with pytest.raises(LogCursorError):
+        index.search(store, cursor=cursor)
+
+
+def test_active_index_is_a_snapshot(store):
+    index = LogIndex()
+    write_active(store, index, range(3))
+    _, snapshot = index.active_index()
+    write_active(store, index, range(3, 6))
+    assert snapshot.lines == 3
+    assert index.active_index()[1].lines == 6
@@ -0,0 +1,108 @@
+"""LogSegmentStore 的轮转、gzip 压缩与 manifest 恢复测试。"""
+import gzip
+import json
+import os
+import threading
+
+import pytest
+
+from app.utils.log_segments import LogSegmentStore
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'frpc.log')
+
+
+def write(path, *lines):
+    with open(path, 'a', encoding='utf-8') as f:
+        for line in lines:
+            f.write(line + '\n')
+
+
+def wait_for_compression():
+    for thread in threading.enumerate():
+        if thread.name == 'frpc-log-compress':
+            thread.join(5)
+
+
+def test_rotation_renames_or_copy_truncates(log_path):
+    store = LogSegmentStore(log_path, max_bytes=10, rotate_interval=0)
+    write(log_path, 'first segment')
+    assert store.should_rotate(os.path.getsize(log_path))
+
+    segment = store.rotate()
+    assert not os.path.exists(log_path)
+    assert segment['bytes'] == len('first segment\n')
+
+    write(log_path, 'second segment')
+    inode = os.stat(log_path).st_ino
+    store.rotate(copy_truncate=True)
+    assert os.stat(log_path).st_ino == inode
+    assert os.path.getsize(log_path) == 0
+    wait_for_compression()
+    assert store.segments()[1]['name'] == f"{segment['name']}.gz"
+
+
+def test_empty_log_is_not_rotated(log_path):
+    store = LogSegmentStore(log_path, rotate_interval=0)
+    write(log_path)
+    assert store.rotate() is None
+    assert store.segments() == []
+
+
+def test_older_segments_are_gzipped_and_pruned(log_path):
+    store = LogSegmentStore(log_path, backup_count=2, rotate_interval=0)
+    for n in range(3):
+        write(log_path, f'segment {n}')
+        store.rotate()
+        wait_for_compression()
+
+    segments = store.segments()
+    assert len(segments) == 2
+    newest, older = segments
+    # 最新分段保留明文，更早的分段压缩
+    assert newest['compressed'] is False and not newest['name'].endswith('.gz')
+    assert older['compressed'] is True and older['name'].endswith('.gz')
+    with gzip.open(store.segment_path(older), 'rt', encoding='utf-8') as f:
+        assert f.read() == 'segment 1\n'
+    assert not os.path.exists(store.segment_path(older).removesuffix('.gz'))
+    assert len([name for name in os.listdir(os.path.dirname(log_path)) if name.startswith('frpc.log.2')]) == 2
+
+
+def test_tail_reads_across_plain_and_compressed_segments(log_path):
+    store = LogSegmentStore(log_path, rotate_interval=0)
+    for n in range(3):
+        write(log_path, f'line {n}a', f'line {n}b')
+        store.rotate()
+        wait_for_compression()
+    write(log_path, 'active')
+    assert store.tail(4) == ['line 1b', 'line 2a', 'line 2b', 'active']
+    assert store.tail(100)[0] == 'line 0a'
+
+
+def test_manifest_recovery_drops_missing_segments(log_path):
+    store = LogSegmentStore(log_path, rotate_interval=0)
+    write(log_path, 'kept')
+    kept = store.rotate()
+    write(log_path, 'removed')
+    removed = store.rotate()
+    wait_for_compression()
+    os.remove(store.segment_path(store.segments()[0]))
+
+    reloaded = LogSegmentStore(log_path, rotate_interval=0)
+    names = [segment['name'] for segment in reloaded.segments()]
+    assert removed['name'] not in names
+    assert [name.removesuffix('.gz') for name in names] == [kept['name']]
+
+
+def test_corrupt_manifest_is_regenerated(log_path):
+    write(log_path, 'active')
+    with open(f'{log_path}.manifest.json', 'w', encoding='utf-8') as f:
+        f.write('{not json')
+
+    store = LogSegmentStore(log_path, rotate_interval=0)
+    assert store.segments() == []
+    assert store.rotate()['bytes'] == len('active\n')
+    with open(store.manifest_path, encoding='utf-8') as f:
+        assert len(json.load(f)['segments']) == 1
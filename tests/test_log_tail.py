@@ -0,0 +1,34 @@
+"""tail_lines 的反向块读取测试。"""
+import random
+
+import pytest
+
+from app.utils.log_tail import tail_lines
+
+
+def naive_tail(content: str, lines: int) -> list[str]:
+    return [line.rstrip('\r') for line in content.split('\n') if line.strip()][-lines:]
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 7, 64, 4096])
+def test_matches_naive_tail(tmp_path, block_size):
+    rng = random.Random(block_size)
+    words = ['', '', '  ', 'ok', '日志行', 'x' * 50, 'login to server failed\r']
+    content = '\n'.join(rng.choice(words) for _ in range(500))
+    path = tmp_path / 'frpc.log'
+    path.write_bytes(content.encode('utf-8'))
+    for lines in (1, 5, 37, 1000):
+        assert tail_lines(str(path), lines, block_size=block_size) == naive_tail(content, lines)
+
+
+def test_long_runs_of_blank_lines(tmp_path):
+    path = tmp_path / 'frpc.log'
+    path.write_bytes(b'first\n' + b'\n' * 200000 + b'last\n')
+    assert tail_lines(str(path), 2, block_size=1024) == ['first', 'last']
+
+
+def test_end_offset_and_missing_file(tmp_path):
+    path = tmp_path / 'frpc.log'
+    path.write_bytes(b'a\nb\nc\n')
+    assert tail_lines(str(path), 10, end_offset=4) == ['a', 'b']
+    assert tail_lines(str(tmp_path / 'missing.log'), 10) == []
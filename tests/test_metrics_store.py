@@ -0,0 +1,48 @@
+"""指标环形缓冲的桶内聚合、环绕覆盖与序列淘汰测试。"""
+import time
+
+from app.utils.metrics_store import MetricRing, MetricsStore
+
+
+def test_bucket_keeps_average_and_max():
+    ring = MetricRing(60, 4)
+    for offset, value in ((0, 1.0), (10, 5.0), (59, 3.0), (60, 7.0)):
+        ring.add(600 + offset, value)
+    assert ring.range(600, 660) == [[600, 3.0, 5.0], [660, 7.0, 7.0]]
+
+
+def test_wrap_around_resets_slot_and_ignores_late_samples():
+    ring = MetricRing(1, 3)
+    for second in range(5):
+        ring.add(second, float(second))
+    # 第 3、4 秒覆盖了第 0、1 秒的槽位，窗口只保留最近 3 个桶
+    assert ring.range(0, 4) == [[2, 2.0, 2.0], [3, 3.0, 3.0], [4, 4.0, 4.0]]
+
+    ring.add(1, 100.0)
+    ring.add(4, 8.0)
+    assert ring.range(4, 4) == [[4, 6.0, 8.0]]
+
+
+def test_query_picks_coarse_ring_for_old_start():
+    store = MetricsStore(resolutions=((1, 10), (60, 10)))
+    base = int(time.time()) // 60 * 60 - 120
+    for second in range(120):
+        store.record('default', 'web', 'up', second % 2, timestamp=base + second)
+
+    result = store.query('default', 'web', 'up', start=base, end=base + 119)
+    assert result['resolution'] == 60
+    assert result['points'] == [[base, 0.5, 1.0], [base + 60, 0.5, 1.0]]
+
+    fine = store.query('default', 'web', 'up', start=base + 115, end=base + 119, resolution=1)
+    assert [point[1] for point in fine['points']] == [1.0, 0.0, 1.0, 0.0, 1.0]
+
+
+def test_series_limit_evicts_least_recently_written():
+    store = MetricsStore(resolutions=((1, 4),), max_series=2)
+    store.record('default', 'a', 'up', 1, timestamp=1)
+    store.record('default', 'b', 'up', 1, timestamp=1)
+    store.record('default', 'a', 'up', 1, timestamp=2)
+    store.record('default', 'c', 'up', 1, timestamp=2)
+    assert {item['proxy'] for item in store.series()} == {'a', 'c'}
+    assert store.stats()['evicted'] == 1
+    assert store.stats()['bytes'] == 2 * 4 * MetricRing.SLOT_BYTES
@@ -0,0 +1,100 @@
+"""管道捕获与守护进程交接测试。"""
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from app.utils.log_capture import PipeCapture
+
+pytestmark = pytest.mark.skipif(not PipeCapture.is_supported(), reason='需要命名管道')
+
+# 模拟 frpc：以读写方式打开管道作为输出，先写入远超管道缓冲区的日志，收到信号文件后再写一行
+WRITER = '''
+import os, sys, time
+fd = os.open(sys.argv[1], os.O_RDWR)
+for i in range(8000):
+    os.write(fd, b'%06d ' % i + b'x' * 100 + b'\\n')
+open(sys.argv[2], 'w').close()
+while not os.path.exists(sys.argv[3]):
+    time.sleep(0.02)
+os.write(fd, b'after-attach\\n')
+time.sleep(60)
+'''
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_keeper_drains_pipe_until_panel_attaches(tmp_path):
+    received = []
+    log_path = str(tmp_path / 'frpc.log')
+    capture = PipeCapture(str(tmp_path / 'frpc.stdout.fifo'), log_path, on_lines=received.extend)
+    capture.ensure_fifo()
+    written, attached = tmp_path / 'written', tmp_path / 'attached'
+    writer = subprocess.Popen([sys.executable, '-c', WRITER, capture.fifo_path, str(written), str(attached)])
+    try:
+        # 面板未读取管道：守护进程接管后 frpc 的写入不会阻塞
+        capture.ensure_keeper(writer.pid)
+        assert wait_for(written.exists), 'frpc 输出在管道写满后阻塞'
+        assert wait_for(lambda: os.path.getsize(log_path) == 8000 * 108)
+
+        # 面板重新附着：守护进程让出管道，后续输出由面板读取
+        capture.start()
+        attached.touch()
+        assert wait_for(lambda: 'after-attach' in received)
+        capture.stop()
+    finally:
+        writer.kill()
+        writer.wait()
+
+    # frpc 退出后守护进程随之退出
+    capture.reap_keeper(timeout=5)
+    assert capture.keeper_pid() is None
+    with open(log_path, 'rb') as f:
+        assert b'after-attach' not in f.read()
+
+
+# 模拟 frpc：写入一批日志后等待信号文件出现再退出
+SHORT_WRITER = '''
+import os, sys, time
+fd = os.open(sys.argv[1], os.O_RDWR)
+for i in range(500):
+    os.write(fd, b'%06d ' % i + b'x' * 100 + b'\\n')
+while not os.path.exists(sys.argv[2]):
+    time.sleep(0.01)
+'''
+
+
+def test_keeper_drains_to_eof_when_panel_and_frpc_exit_together(tmp_path):
+    import fcntl
+
+    log_path = str(tmp_path / 'frpc.log')
+    capture = PipeCapture(str(tmp_path / 'frpc.stdout.fifo'), log_path, on_lines=lambda lines: None)
+    capture.ensure_fifo()
+    # 测试进程充当持有锁的面板
+    lock_fd = os.open(capture.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    fcntl.flock(lock_fd, fcntl.LOCK_EX)
+    release = tmp_path / 'release'
+    writer = subprocess.Popen([sys.executable, '-c', SHORT_WRITER, capture.fifo_path, str(release)])
+    try:
+        capture.ensure_keeper(writer.pid)
+        time.sleep(0.3)
+        # 面板退出释放锁的同时 frpc 退出
+        release.touch()
+        os.close(lock_fd)
+        writer.wait(timeout=5)
+        capture.reap_keeper(timeout=5)
+    finally:
+        writer.kill()
+        writer.wait()
+
+    assert capture.keeper_pid() is None
+    assert os.path.getsize(log_path) == 500 * 108
@@ -0,0 +1,78 @@
+"""ProcessTracker 的 PID 复用与扫描冷却测试。"""
+import subprocess
+import sys
+
+import psutil
+import pytest
+
+from app.utils.process_tracker import ProcessTracker
+
+
+@pytest.fixture
+def child():
+    proc = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+    yield proc
+    proc.kill()
+    proc.wait()
+
+
+def make_tracker(tmp_path, **kwargs):
+    return ProcessTracker(str(tmp_path / 'frpc.json'), str(tmp_path / 'frpc.pid'), **kwargs)
+
+
+def test_tracked_process_is_found(tmp_path, child):
+    tracker = make_tracker(tmp_path)
+    assert tracker.track(child.pid) is not None
+    assert tracker.find(allow_scan=False).pid == child.pid
+
+
+def test_pid_reuse_is_detected(tmp_path, child):
+    """缓存的 psutil.Process 属于同一 PID 上更早的进程时，不能把新进程当作 frpc。"""
+    tracker = make_tracker(tmp_path)
+    tracker.track(child.pid)
+
+    # 模拟 PID 复用：跟踪记录与缓存对象都来自该 PID 上一个已退出的进程
+    stale_create_time = psutil.Process(child.pid).create_time() - 100
+    stale = psutil.Process(child.pid)
+    stale._create_time = stale_create_time
+    stale._ident = (child.pid, stale_create_time)
+    tracker._create_time = stale_create_time
+    tracker._process = stale
+
+    assert tracker.find(allow_scan=False) is None
+    assert tracker.pid is None
+
+
+def test_exited_process_is_cleared(tmp_path, child):
+    tracker = make_tracker(tmp_path)
+    tracker.track(child.pid)
+    child.kill()
+    child.wait()
+    assert tracker.find(allow_scan=False) is None
+    assert not (tmp_path / 'frpc.pid').exists()
+
+
+def test_request_scan_ends_cooldown(tmp_path, monkeypatch):
+    tracker = make_tracker(tmp_path, scan_cooldown=3600)
+    scans = []
+    monkeypatch.setattr(tracker, 'scan', lambda: scans.append(1) or [])
+
+    assert tracker.find() is None
+    assert tracker.find() is None
+    assert len(scans) == 1
+
+    tracker.request_scan()
+    assert tracker.find() is None
+    assert len(scans) == 2
+
+
+def test_cached_state_is_cleared_by_forget(tmp_path, child):
+    tracker = make_tracker(tmp_path)
+    tracker.track(child.pid)
+    assert tracker.cached() == (child.pid, psutil.Process(child.pid).create_time())
+
+    tracker.forget(child.pid + 1)
+    assert tracker.cached() is not None
+    tracker.forget(child.pid)
+    assert tracker.cached() is None
+    assert not (tmp_path / 'frpc.pid').exists()
@@ -0,0 +1,159 @@
+"""单个代理增删改的 ETag 前置条件与两个配置文件的提交测试。"""
+import os
+
+import pytest
+from werkzeug.http import parse_etags
+
+from app.services.config_store import ConfigStore
+from app.services.proxy_editor import (
+    ProxyEditError, build_frpc_config, delete_proxy, get_proxy, patch_proxy, put_proxy,
+)
+from app.utils.config_diff import diff_configs
+from app.utils.input_validator import ProxyConflictIndex
+
+
+def make_proxy(name, remote_port, **fields):
+    return {'name': name, 'type': 'tcp', 'localIP': '127.0.0.1', 'localPort': 22, 'remotePort': remote_port,
+            **fields}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ConfigStore(str(tmp_path / 'config.json'), str(tmp_path / 'frpc.json'))
+    store.save_web_config({
+        'serverAddr': '127.0.0.1',
+        'serverPort': 7000,
+        'autoRetry': {'enabled': False},
+        'proxies': [make_proxy('ssh', 6000, enabled=True), make_proxy('db', 6001, enabled=False)],
+    })
+    return store
+
+
+def reread(store):
+    """绕过缓存重新读取磁盘上的两个文件。"""
+    fresh = ConfigStore(store.web.path, store.frpc.path)
+    return fresh.get_web_config(), fresh.get_frpc_config()
+
+
+def test_etag_is_stable_and_changes_with_content(store):
+    proxy, etag = get_proxy(store, 'ssh')
+    assert get_proxy(store, 'ssh')[1] == etag
+    result = patch_proxy(store, 'ssh', {'localPort': 2222})
+    assert result['etag'] != etag
+    assert get_proxy(store, 'ssh') == ({**proxy, 'localPort': 2222}, result['etag'])
+
+
+def test_if_match_rejects_stale_etag(store):
+    _, etag = get_proxy(store, 'ssh')
+    patch_proxy(store, 'ssh', {'localPort': 2222}, if_match=parse_etags(f'"{etag}"'))
+
+    with pytest.raises(ProxyEditError) as error:
+        patch_proxy(store, 'ssh', {'localPort': 22}, if_match=parse_etags(f'"{etag}"'))
+    assert error.value.status_code == 412
+    with pytest.raises(ProxyEditError) as error:
+        delete_proxy(store, 'ssh', if_match=parse_etags(f'"{etag}"'))
+    assert error.value.status_code == 412
+    assert get_proxy(store, 'ssh')[0]['localPort'] == 2222
+
+
+def test_if_match_on_missing_proxy_fails(store):
+    with pytest.raises(ProxyEditError) as error:
+        put_proxy(store, 'web', make_proxy('web', 6002), if_match=parse_etags('*'))
+    assert error.value.status_code == 412
+
+
+def test_if_none_match_star_only_creates(store):
+    result = put_proxy(store, 'web', make_proxy('web', 6002), if_none_match=parse_etags('*'))
+    assert result['created']
+
+    with pytest.raises(ProxyEditError) as error:
+        put_proxy(store, 'web', make_proxy('web', 6003), if_none_match=parse_etags('*'))
+    assert error.value.status_code == 412
+    assert get_proxy(store, 'web')[0]['remotePort'] == 6002
+
+
+def test_conflicts_use_cached_index_across_edits(store):
+    put_proxy(store, 'web', make_proxy('web', 6002))
+    with pytest.raises(ProxyEditError) as error:
+        put_proxy(store, 'api', make_proxy('api', 6002))
+    assert error.value.status_code == 409
+    assert error.value.errors == ['remotePort 6002 (tcp) 已被代理配置 3 使用']
+
+    # 修改端口后旧端口释放，禁用的代理不占用端口
+    patch_proxy(store, 'web', {'remotePort': 6003})
+    put_proxy(store, 'api', make_proxy('api', 6002))
+    put_proxy(store, 'cache', make_proxy('cache', 6001))
+    delete_proxy(store, 'ssh')
+    with pytest.raises(ProxyEditError) as error:
+        put_proxy(store, 'ssh', make_proxy('ssh', 6003))
+    assert error.value.errors == ['remotePort 6003 (tcp) 已被代理配置 2 使用']
+
+
+def test_single_proxy_diff_and_index_match_full_rebuild(store):
+    edits = [
+        lambda: patch_proxy(store, 'ssh', {'localPort': 2222}),
+        lambda: put_proxy(store, 'web', make_proxy('web', 6002)),
+        lambda: patch_proxy(store, 'web', {'name': 'www'}),
+        lambda: patch_proxy(store, 'db', {'enabled': True}),
+        lambda: patch_proxy(store, 'ssh', {'enabled': False}),
+        lambda: patch_proxy(store, 'www', {'localPort': 22}),
+    ]
+    store.proxy_index(store.get_web_config()['proxies'])
+    _, cached = store._proxy_index
+    for edit in edits:
+        before = store.get_web_config()
+        result = edit()
+        after = store.get_web_config()
+        assert result['diff'] == diff_configs(build_frpc_config(before), build_frpc_config(after))
+        # 索引就地更新，与按新列表重建的结果一致
+        assert store._proxy_index[0] is after['proxies'] and store._proxy_index[1] is cached
+        rebuilt = ProxyConflictIndex(after['proxies'])
+        assert (cached._names, cached._claimed) == (rebuilt._names, rebuilt._claimed)
+
+
+def test_disabling_last_proxy_falls_back_to_full_diff(store):
+    result = patch_proxy(store, 'ssh', {'enabled': False})
+    assert result['diff']['action'] == 'restart'
+    assert reread(store)[1] is None
+    result = patch_proxy(store, 'db', {'enabled': True})
+    assert result['diff']['proxies']['added'] == ['db']
+    assert result['diff']['action'] == 'restart'
+
+
+def test_both_files_are_written_together(store):
+    put_proxy(store, 'web', make_proxy('web', 6002))
+    web_config, frpc_config = reread(store)
+    assert [proxy['name'] for proxy in web_config['proxies']] == ['ssh', 'db', 'web']
+    assert [proxy['name'] for proxy in frpc_config['proxies']] == ['ssh', 'web']
+    assert 'autoRetry' not in frpc_config
+
+    delete_proxy(store, 'ssh')
+    delete_proxy(store, 'web')
+    web_config, frpc_config = reread(store)
+    assert [proxy['name'] for proxy in web_config['proxies']] == ['db']
+    assert frpc_config is None
+
+
+def test_failed_verify_keeps_both_files(store):
+    put_proxy(store, 'web', make_proxy('web', 6002))
+    before = reread(store)
+    with pytest.raises(ProxyEditError) as error:
+        patch_proxy(store, 'web', {'localPort': 8080}, verify=lambda temp_path: (False, 'verify failed'))
+    assert error.value.status_code == 400
+    assert reread(store) == before
+    assert sorted(os.listdir(os.path.dirname(store.web.path))) == ['config.json', 'frpc.json']
+
+
+def test_frpc_json_is_restored_when_config_json_replace_fails(store, monkeypatch):
+    put_proxy(store, 'web', make_proxy('web', 6002))
+    before = reread(store)
+
+    def fail(temp_path, data):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(store.web, '_replace_locked', fail)
+    with pytest.raises(OSError):
+        patch_proxy(store, 'web', {'localPort': 8080})
+    assert reread(store) == before
+    assert store.get_frpc_config() == before[1]
+    assert sorted(os.listdir(os.path.dirname(store.web.path))) == ['config.json', 'frpc.json']
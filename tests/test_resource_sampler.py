@@ -0,0 +1,60 @@
+"""ResourceSampler 的进程切换测试。"""
+import subprocess
+import sys
+
+import psutil
+import pytest
+
+from app.utils.resource_sampler import ResourceSampler
+
+
+@pytest.fixture
+def child():
+    proc = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+    yield proc
+    proc.kill()
+    proc.wait()
+
+
+def make_sampler(provider):
+    sampler = ResourceSampler(provider)
+    # 不启动采样线程，定时器只登记不触发
+    return sampler
+
+
+def test_same_process_keeps_cpu_baseline(child):
+    tracked = psutil.Process(child.pid)
+    sampler = make_sampler(lambda: tracked)
+    sampler._handle_events(['startup'])
+    process = sampler._process
+    sampler._handle_events([ResourceSampler.SAMPLE_TIMER])
+    assert sampler._process is process
+    assert sampler.latest()['rss'] > 0
+
+
+def test_reused_pid_replaces_process(child):
+    """跟踪器返回同一 PID 上更晚启动的进程时，不能沿用旧进程对象及其 CPU 基线。"""
+    tracked = psutil.Process(child.pid)
+    sampler = make_sampler(lambda: tracked)
+    sampler._handle_events(['startup'])
+    stale = sampler._process
+
+    # 伪造 PID 复用：旧对象记录的是更早的启动时间
+    stale_create_time = stale.create_time() - 100
+    stale._create_time = stale_create_time
+    stale._ident = (child.pid, stale_create_time)
+
+    sampler._handle_events([ResourceSampler.SAMPLE_TIMER])
+    assert sampler._process is not stale
+    assert sampler._process.create_time() == tracked.create_time()
+
+
+def test_untracked_process_clears_sample(child):
+    state = {'tracked': psutil.Process(child.pid)}
+    sampler = make_sampler(lambda: state['tracked'])
+    sampler._handle_events(['startup'])
+    assert sampler.latest() is not None
+
+    state['tracked'] = None
+    sampler._handle_events(['process_exit'])
+    assert sampler.latest() is None
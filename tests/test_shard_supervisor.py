@@ -0,0 +1,138 @@
+"""代理分片按 diff 只应用受影响分片的测试，分片进程由替身代替。"""
+import pytest
+
+from app.runtime_settings import load_runtime_settings
+from app.services.config_store import ConfigStore
+from app.services.proxy_editor import WEB_ONLY_CONFIG_FIELDS
+from app.services.shard_supervisor import ShardSupervisor
+from app.utils.config_diff import ACTION_SHARD_RESTART, diff_configs
+from app.utils.proxy_sharding import shard_index, shard_key
+
+SHARDING = {'enabled': True, 'shardCount': 4, 'groupKey': ''}
+
+
+class FakeManager:
+    """只记录启停与热加载调用的 FrpcManager 替身。"""
+
+    def __init__(self, runtime_settings, instance_id):
+        self.runtime_settings = runtime_settings
+        self.instance_id = instance_id
+        self.frpc_work_dir = runtime_settings.frpc_work_dir
+        self.config_path = runtime_settings.frpc_config_path
+        self.config_store = ConfigStore(runtime_settings.web_config_path, runtime_settings.frpc_config_path)
+        self.running = False
+        self.calls = []
+
+    def is_running(self):
+        return self.running
+
+    def start(self):
+        self.calls.append('start')
+        self.running = True
+        return True, 'started'
+
+    def stop(self):
+        self.calls.append('stop')
+        self.running = False
+        return True, 'stopped'
+
+    def reload_or_restart(self):
+        self.calls.append('reload')
+        return True, 'reloaded', 'reload'
+
+    def notify_auto_retry_config_changed(self):
+        pass
+
+
+class FakeRegistry:
+    def __init__(self):
+        self.managers = {}
+
+    def get_for_settings(self, runtime_settings, instance_id, enable_auto_retry_watchdog=False):
+        if instance_id not in self.managers:
+            self.managers[instance_id] = FakeManager(runtime_settings, instance_id)
+        return self.managers[instance_id]
+
+    def remove(self, instance_id):
+        return self.managers.pop(instance_id, None) is not None
+
+
+@pytest.fixture
+def supervisor(tmp_path, monkeypatch):
+    monkeypatch.setenv('APP_BASE_DIR', str(tmp_path))
+    monkeypatch.delenv('FRPC_LOG_DIR', raising=False)
+    base = FakeManager(load_runtime_settings(), 'default')
+    return ShardSupervisor(base, FakeRegistry())
+
+
+def make_config(count=16):
+    return {
+        'serverAddr': '127.0.0.1',
+        'serverPort': 7000,
+        'sharding': SHARDING,
+        'proxies': [
+            {'name': f'p{n}', 'type': 'tcp', 'localIP': '127.0.0.1', 'localPort': 22, 'remotePort': 6000 + n,
+             'enabled': True}
+            for n in range(count)
+        ],
+    }
+
+
+def shard_calls(supervisor):
+    return {manager.instance_id: list(manager.calls) for manager in supervisor._registry.managers.values()}
+
+
+def test_one_proxy_edit_restarts_only_its_shard(supervisor):
+    config = make_config()
+    supervisor.apply(config, exclude_fields=WEB_ONLY_CONFIG_FIELDS)
+    for manager in supervisor._registry.managers.values():
+        manager.calls.clear()
+
+    edited = {**config, 'proxies': [dict(proxy) for proxy in config['proxies']]}
+    edited['proxies'][5]['localPort'] = 2222
+    diff = diff_configs(config, edited, sharding=SHARDING)
+    expected = shard_index(shard_key(edited['proxies'][5]), SHARDING['shardCount'])
+    assert diff['action'] == ACTION_SHARD_RESTART
+    assert diff['affected_shards'] == [expected]
+
+    result = supervisor.apply_changes(edited, diff['affected_shards'], exclude_fields=WEB_ONLY_CONFIG_FIELDS)
+    assert [(item['index'], item['action']) for item in result['shards']] == [(expected, 'reloaded')]
+    assert shard_calls(supervisor) == {
+        f'default:shard-{index}': ['reload'] if index == expected else []
+        for index in range(SHARDING['shardCount'])
+    }
+
+
+def test_stopped_shards_only_receive_config(supervisor):
+    config = make_config()
+    edited = {**config, 'proxies': config['proxies'][:-1]}
+    diff = diff_configs(config, edited, sharding=SHARDING)
+
+    result = supervisor.apply_changes(edited, diff['affected_shards'], exclude_fields=WEB_ONLY_CONFIG_FIELDS)
+    (item,) = result['shards']
+    assert item['action'] == 'saved'
+    manager = supervisor._registry.managers[item['instance']]
+    assert manager.calls == []
+    assert 'p15' not in [proxy['name'] for proxy in manager.config_store.get_frpc_config()['proxies']]
+
+
+def test_recover_skips_manually_stopped_shards(supervisor):
+    supervisor.apply(make_config(), exclude_fields=WEB_ONLY_CONFIG_FIELDS)
+    supervisor.stop()
+    assert supervisor.recover() == []
+    assert not supervisor.running_shards()
+
+    supervisor.start()
+    shard = supervisor._registry.managers['default:shard-0']
+    shard.running = False
+    assert [item['index'] for item in supervisor.recover() if item['action'] == 'started'] == [0]
+
+
+def test_disable_stops_and_unregisters_shards(supervisor):
+    supervisor.apply(make_config(), exclude_fields=WEB_ONLY_CONFIG_FIELDS)
+    shards = list(supervisor._registry.managers.values())
+
+    assert supervisor.disable() == list(range(SHARDING['shardCount']))
+    assert all(not manager.running for manager in shards)
+    assert supervisor._registry.managers == {}
+    assert supervisor.existing_indexes() == []
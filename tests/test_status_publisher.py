@@ -0,0 +1,71 @@
+"""状态发布首帧推送与 WebSocket 发送串行化的测试。"""
+import json
+import threading
+import time
+
+from app.services.runtime_state import StatusPublisher, WebSocketHub
+
+
+class RecordingClient:
+    """记录收到的消息，并检测是否有两个线程同时写入。"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.messages = []
+        self.active = 0
+        self.overlapped = False
+
+    def send(self, message):
+        if self.fail:
+            raise ConnectionError('closed')
+        self.active += 1
+        if self.active > 1:
+            self.overlapped = True
+        time.sleep(0.001)
+        self.messages.append(json.loads(message))
+        self.active -= 1
+
+
+def make_publisher():
+    hub = WebSocketHub()
+    publisher = StatusPublisher(hub)
+    publisher._provider = lambda instance_ids: {
+        instance_id: {'type': 'service_status', 'instance': instance_id} for instance_id in instance_ids
+    }
+    return hub, publisher
+
+
+def test_subscribe_sends_first_snapshot_through_hub():
+    hub, publisher = make_publisher()
+    client = RecordingClient()
+    hub.add(client)
+
+    publisher.subscribe(client, 'edge')
+    assert client.messages == [{'type': 'service_status', 'instance': 'edge'}]
+
+
+def test_subscribe_discards_client_when_first_send_fails():
+    hub, publisher = make_publisher()
+    client = RecordingClient(fail=True)
+    hub.add(client)
+
+    publisher.subscribe(client)
+    assert hub.snapshot() == []
+    assert hub.subscriber_count(StatusPublisher.TOPIC) == 0
+
+
+def test_concurrent_sends_to_one_client_do_not_interleave():
+    hub = WebSocketHub()
+    client = RecordingClient()
+    hub.add(client)
+
+    threads = [
+        threading.Thread(target=lambda n=n: [hub.send([client], {'n': n}) for _ in range(20)])
+        for n in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(client.messages) == 80
+    assert not client.overlapped